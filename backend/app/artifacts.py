@@ -0,0 +1,228 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - DIŞA AKTARIM ARTIFACT DEPOSU
+================================================================
+
+📋 DOSYA AMACI:
+Bu dosya, 5. adımda render edilen .docx kitapçıklarını ve ZIP arşivlerini
+yerel diskte içerik adresli (content-addressed) olarak saklayan depoyu içerir.
+Anahtar, render'a giren içeriğin (ilan, rol, sorular, şablon) özetidir; hiçbir
+soru değişmediyse tekrar indirmeler render yapmadan diskten döner.
+
+🎯 KAPSAM:
+1. 🔑 ANAHTAR:
+   - export.py tarafından hesaplanan SHA-256 özeti
+   - Sorular yeniden üretildiğinde/düzenlendiğinde içerik, dolayısıyla anahtar
+     değişir: eski artifact'lar kendiliğinden geçersiz olur (ayrı silme gerekmez)
+
+2. 💾 YAZMA:
+   - Geçici dosyaya yazılıp os.replace ile atomik olarak yerine konur
+   - Yarıda kalan (istemci bağlantıyı kopardı) ZIP akışları depoya girmez
+
+3. 🧹 TAHLİYE:
+   - Toplam boyut EXPORT_CACHE_MAX_BYTES'ı aşınca en eski erişilen dosyalar silinir
+   - Okumalar dosyayı önce açar (open_reader); tahliye dosyayı silse de açık
+     handle'dan gönderim tamamlanır
+
+🔧 KONFIGÜRASYON:
+- EXPORT_CACHE_ENABLED: "false" ile tamamen kapatılır
+- EXPORT_CACHE_DIR: depo dizini (varsayılan ./export_cache)
+- EXPORT_CACHE_MAX_BYTES: en fazla toplam boyut (varsayılan 1 GB)
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Any, Optional, BinaryIO
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CACHE_ENABLED = os.getenv("EXPORT_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", "./export_cache")
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Her kaç yazmada bir tahliye çalıştırılacağı
+EVICTION_INTERVAL = 50
+
+
+class ArtifactWriter:
+    """Depoya akış halinde yazılan tek bir artifact (commit edilene kadar görünmez)"""
+
+    def __init__(self, store: "ArtifactStore", key: str, suffix: str):
+        self._store = store
+        self._final_path = store.path(key, suffix)
+        os.makedirs(os.path.dirname(self._final_path), exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(self._final_path), suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes):
+        self._file.write(data)
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp_path, self._final_path)
+        self._store._record_write()
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class ArtifactStore:
+    """Diskte içerik adresli, thread-safe artifact deposu"""
+
+    def __init__(
+        self,
+        root: str = EXPORT_CACHE_DIR,
+        max_bytes: int = EXPORT_CACHE_MAX_BYTES,
+        enabled: bool = EXPORT_CACHE_ENABLED
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._writes_since_eviction = 0
+        self._lock = threading.Lock()
+
+    def path(self, key: str, suffix: str) -> str:
+        """Anahtarın dosya yolu (ilk iki karakter alt dizin - tek dizinde binlerce dosya olmasın)"""
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def open_reader(self, key: str, suffix: str) -> Optional[BinaryIO]:
+        """
+        Artifact'ı okumak için aç ve erişim zamanını güncelle; yoksa None.
+
+        Yol yerine açık handle döner: eşzamanlı bir tahliye dosyayı silse bile
+        (POSIX'te yalnızca dizin girdisi kalkar) handle sonuna kadar okunabilir.
+        Kapatmak çağıranın sorumluluğundadır.
+        """
+        if not self.enabled:
+            return None
+        path = self.path(key, suffix)
+        try:
+            reader = open(path, "rb")
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Açıldıktan sonra tahliye edildi: handle yine geçerli
+            pass
+        with self._lock:
+            self.hits += 1
+        return reader
+
+    def get(self, key: str, suffix: str) -> Optional[bytes]:
+        """Artifact içeriğini döndür; yoksa None"""
+        reader = self.open_reader(key, suffix)
+        if reader is None:
+            return None
+        with reader:
+            return reader.read()
+
+    def put(self, key: str, suffix: str, data: bytes):
+        """Artifact'ı atomik olarak yaz (hatalar loglanır, dışa aktarımı bozmaz)"""
+        if not self.enabled:
+            return
+        try:
+            writer = ArtifactWriter(self, key, suffix)
+        except OSError as e:
+            logger.warning(f"Export cache yazma hatası: {str(e)}")
+            return
+        try:
+            writer.write(data)
+            writer.commit()
+        except OSError as e:
+            writer.abort()
+            logger.warning(f"Export cache yazma hatası: {str(e)}")
+
+    def open_writer(self, key: str, suffix: str) -> Optional[ArtifactWriter]:
+        """Akış halinde yazmak için writer aç (depo kapalıysa veya dizin yazılamıyorsa None)"""
+        if not self.enabled:
+            return None
+        try:
+            return ArtifactWriter(self, key, suffix)
+        except OSError as e:
+            logger.warning(f"Export cache yazma hatası: {str(e)}")
+            return None
+
+    def _record_write(self):
+        with self._lock:
+            self.stores += 1
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction < EVICTION_INTERVAL:
+                return
+            self._writes_since_eviction = 0
+        self._evict()
+
+    def _scan(self):
+        """Depodaki (yol, boyut, son erişim) kayıtları"""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Toplam boyut max_bytes'ı aşıyorsa en eski erişilen dosyaları sil"""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort(key=lambda entry: entry[2])
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        logger.info(f"Export cache tahliyesi: {removed} dosya silindi")
+
+    def clear(self) -> int:
+        """Tüm artifact'ları sil, silinen dosya sayısını döndür"""
+        entries = self._scan()
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root, ignore_errors=True)
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss sayaçları, dosya sayısı ve toplam boyut"""
+        entries = self._scan() if self.enabled else []
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "path": self.root,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(entries),
+            "total_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes
+        }
+
+
+# Uygulama genelinde paylaşılan depo
+artifact_store = ArtifactStore()
@@ -0,0 +1,549 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - WORD DIŞA AKTARIM
+=====================================================
+
+📋 DOSYA AMACI:
+Bu dosya, 5. adımda üretilen soruların aday bazında Word (.docx) kitapçıklarına
+dönüştürülmesini ve ZIP olarak paketlenmesini içerir. Her rol/aday kitapçığı
+birbirinden bağımsız olduğundan render işlemi bir süreç havuzuna dağıtılır;
+dışa aktarım süresi aday sayısıyla değil çekirdek sayısıyla ölçeklenir.
+
+🎯 KAPSAM:
+1. 📦 PAYLOAD:
+   - Veritabanından okunan ilan/rol/soru bilgileri, süreçler arası taşınabilen
+     (picklable) sade dict'lere dönüştürülür - her aday için yalnızca kendi soruları
+
+2. 🖨️ RENDER:
+   - Aday başına S (sadece sorular) ve C (sorular + beklenen cevaplar) dosyası
+   - Rol başına bir kez python-docx ile şablon oluşturulur (süreç başına LRU cache);
+     aday kitapçıkları şablonun document.xml'ine doğrudan metin yerleştirilerek,
+     değişmeyen parçalar önceden sıkıştırılmış haliyle kopyalanarak üretilir
+   - EXPORT_WORKERS > 0 ise ProcessPoolExecutor, aksi halde aynı süreçte
+
+3. 🗜️ ZIP:
+   - Kitapçıklar rol ve aday sırasıyla, paralel render'dan bağımsız olarak
+     deterministik sırada ZIP'e yazılır
+   - ZIP bellekte biriktirilmez: her girdi bitince istemciye akıtılır
+     (StreamingResponse), render penceresi sınırlıdır
+
+4. 💾 ARTIFACT CACHE:
+   - Kitapçık ve ZIP anahtarları payload içeriğinin SHA-256 özetidir
+   - İçerik değişmediyse ZIP diskten, değişmeyen rollerin kitapçıkları
+     render edilmeden depodan gelir; soru düzenlenince anahtar değişir
+
+🔧 KONFIGÜRASYON:
+- EXPORT_WORKERS: süreç sayısı (varsayılan CPU sayısı, 0 = paralel render kapalı)
+- EXPORT_PARALLEL_MIN_BOOKLETS: bu sayının altındaki aday kitapçıkları süreç
+  havuzuna gönderilmeden render edilir (varsayılan 8)
+- EXPORT_MP_START_METHOD: süreç başlatma yöntemi (varsayılan spawn)
+- EXPORT_DOCX_TEMPLATE: temel .docx dosyası (kurumsal stil/antet için, varsayılan boş belge)
+- EXPORT_TEMPLATE_CACHE_SIZE: süreç başına saklanan rol şablonu sayısı (varsayılan 64)
+- EXPORT_STREAM_WINDOW: aynı anda render edilen en fazla kitapçık (varsayılan 2 × EXPORT_WORKERS)
+- EXPORT_CACHE_*: render edilen kitapçık ve ZIP'lerin disk deposu (bkz. artifacts.py)
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import re
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Any, List, Iterator, Optional, Tuple, BinaryIO
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from sqlalchemy.orm import Session
+
+from .artifacts import artifact_store
+from .metrics import export_booklet_render, export_booklets_total, export_zip_duration
+
+logger = logging.getLogger(__name__)
+
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", str(os.cpu_count() or 1)))
+EXPORT_PARALLEL_MIN_BOOKLETS = int(os.getenv("EXPORT_PARALLEL_MIN_BOOKLETS", "8"))
+EXPORT_MP_START_METHOD = os.getenv("EXPORT_MP_START_METHOD", "spawn")
+EXPORT_DOCX_TEMPLATE = os.getenv("EXPORT_DOCX_TEMPLATE") or None
+EXPORT_TEMPLATE_CACHE_SIZE = int(os.getenv("EXPORT_TEMPLATE_CACHE_SIZE", "64"))
+EXPORT_STREAM_WINDOW = int(os.getenv("EXPORT_STREAM_WINDOW", str(max(1, EXPORT_WORKERS) * 2)))
+
+# Tür isimleri
+TYPE_NAMES = {
+    'professional_experience': 'Mesleki Deneyim Soruları',
+    'theoretical_knowledge': 'Teorik Bilgi Soruları',
+    'practical_application': 'Pratik Uygulama Soruları'
+}
+
+# Render çıktısını değiştiren her düzenlemede artırılmalı (eski cache anahtarları geçersizleşir)
+RENDER_VERSION = 1
+
+_TURKISH_ASCII = str.maketrans("ŞÇĞİÖÜşçğıöü", "SCGIOUscgiou")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def ascii_name(text: str) -> str:
+    """Türkçe karakterleri dosya adları için ASCII karşılıklarıyla değiştir"""
+    return text.translate(_TURKISH_ASCII)
+
+
+def build_booklets(db: Session, contract, roles) -> List[Dict[str, Any]]:
+    """
+    İlan ve rollerden aday kitapçığı payload'larını oluştur.
+
+    Her payload tek bir rol/aday için render'a gereken her şeyi içerir
+    (ilan başlığı, pozisyon, o adaya düşen sorular); ORM nesnesi taşımaz.
+    """
+    # Render süreçleri bu modülü import eder; models/database onlara yüklenmesin
+    from .generation import load_role_questions
+
+    created_date = contract.created_at.strftime("%d.%m.%Y") if contract.created_at else "Belirtilmemiş"
+    # Tüm rollerin soruları tek sorguda, role göre gruplanmış
+    role_questions = load_role_questions(db, contract.id, [role.id for role in roles])
+    booklets = []
+    for role in roles:
+        logger.info(f"Rol işleniyor: {role.name}")
+
+        questions = role_questions[role.id]
+        logger.info(f"Rol {role.name} için {len(questions)} soru bulundu")
+
+        # Soruları türlerine göre grupla
+        questions_by_type: Dict[str, List[Any]] = {}
+        for q in questions:
+            questions_by_type.setdefault(q.question_type, []).append(q)
+
+        multiplier = int(role.salary_multiplier)
+        role_header = {
+            "contract_title": contract.title,
+            "created_date": created_date,
+            "role_name": role.name,
+            "salary_multiplier": multiplier,
+            "file_prefix": f"{ascii_name(role.name)} {multiplier}x"
+        }
+
+        # Her aday için soru dosyası oluştur
+        max_questions_per_type = max(len(q_list) for q_list in questions_by_type.values()) if questions_by_type else 0
+        for candidate_num in range(1, max_questions_per_type + 1):
+            booklets.append({
+                **role_header,
+                "candidate_num": candidate_num,
+                "sections": [
+                    (
+                        TYPE_NAMES.get(q_type, q_type),
+                        q_list[candidate_num - 1].question_text,
+                        q_list[candidate_num - 1].expected_answer
+                    )
+                    for q_type, q_list in questions_by_type.items()
+                    if len(q_list) >= candidate_num
+                ]
+            })
+    return booklets
+
+
+# Şablondaki yer tutucular (yalnızca aday bazında değişen alanlar)
+_CANDIDATE_PLACEHOLDER = "{{ADAY_NO}}"
+_TYPE_PLACEHOLDER = "<w:r><w:t>{{SORU_TIPI}}</w:t></w:r>"
+_QUESTION_PLACEHOLDER = "<w:r><w:t>{{SORU}}</w:t></w:r>"
+_ANSWER_PLACEHOLDER = "<w:r><w:t>{{CEVAP}}</w:t></w:r>"
+
+_PARAGRAPH = re.compile(r"<w:p/>|<w:p>.*?</w:p>", re.DOTALL)
+_RUN_SPECIAL_CHARS = re.compile(r"([\t\r\n])")
+_XML_INVALID_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _run_xml(text: Optional[str]) -> str:
+    """
+    Metni <w:r> XML'ine çevir - python-docx'in add_run() çıktısıyla birebir aynı:
+    sekme <w:tab/>, satır sonu <w:br/>, baş/son boşluklu metin xml:space="preserve".
+    """
+    parts = []
+    for chunk in _RUN_SPECIAL_CHARS.split(_XML_INVALID_CHARS.sub("", text or "")):
+        if not chunk:
+            continue
+        if chunk == "\t":
+            parts.append("<w:tab/>")
+        elif chunk in "\r\n":
+            parts.append("<w:br/>")
+        else:
+            escaped = chunk.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            if chunk != chunk.strip():
+                parts.append(f'<w:t xml:space="preserve">{escaped}</w:t>')
+            else:
+                parts.append(f"<w:t>{escaped}</w:t>")
+    return f"<w:r>{''.join(parts)}</w:r>" if parts else "<w:r/>"
+
+
+def _zip_entry(name: str, data: bytes, date_time: Tuple[int, ...]) -> Tuple[bytes, bytes]:
+    """
+    Tek bir ZIP girdisinin (yerel başlık + sıkıştırılmış veri, merkezi dizin kaydı)
+    parçalarını üret; merkezi dizin kaydındaki offset alanı sonradan doldurulur.
+    """
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    crc = zlib.crc32(data)
+    encoded_name = name.encode("utf-8")
+    dos_time = (date_time[3] << 11) | (date_time[4] << 5) | (date_time[5] // 2)
+    dos_date = ((date_time[0] - 1980) << 9) | (date_time[1] << 5) | date_time[2]
+    fields = (20, 0, zipfile.ZIP_DEFLATED, dos_time, dos_date, crc, len(compressed), len(data), len(encoded_name))
+    local = struct.pack("<IHHHHHIIIHH", 0x04034B50, *fields, 0) + encoded_name + compressed
+    central = struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, 20, *fields, 0, 0, 0, 0, 0, 0)
+    return local, central + encoded_name
+
+
+class DocxTemplate:
+    """
+    Bir rol için önceden render edilmiş .docx şablonu.
+
+    Başlık, ilan bilgileri ve rol başlığı python-docx ile bir kez üretilir;
+    soru bölümü paragraflarının XML'i prototip olarak ayrılır. Aday başına
+    yalnızca document.xml'e metin yerleştirilir ve sıkıştırılır; styles.xml
+    gibi değişmeyen parçalar şablon oluşturulurken bir kez sıkıştırılıp
+    olduğu gibi kopyalanır.
+    """
+
+    def __init__(self, header: Dict[str, Any], with_answers: bool):
+        self.with_answers = with_answers
+        doc = Document(EXPORT_DOCX_TEMPLATE or None)
+        title = doc.add_heading('MÜLAKAT SORULARI VE CEVAPLARI' if with_answers else 'MÜLAKAT SORULARI', 0)
+        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        # Contract bilgileri
+        doc.add_heading('İlan Bilgileri', level=1)
+        doc.add_paragraph(f'İlan Adı: {header["contract_title"]}')
+        doc.add_paragraph(f'Oluşturulma Tarihi: {header["created_date"]}')
+        doc.add_paragraph(f'Pozisyon: {header["role_name"]} ({header["salary_multiplier"]}x)')
+        doc.add_paragraph(f'Aday No: {_CANDIDATE_PLACEHOLDER}')
+        doc.add_paragraph()
+
+        role_title = f"{header['role_name']} (Aylık brüt sözleşme ücret tavanının {header['salary_multiplier']} katına kadar)"
+        doc.add_heading(role_title, level=2)
+
+        # Soru bölümü prototipleri: başlık, soru, beklenen cevap, boş satır
+        doc.add_heading('{{SORU_TIPI}}', level=3)
+        p = doc.add_paragraph()
+        p.add_run('1. ').bold = True
+        p.add_run('{{SORU}}')
+        answer_para = doc.add_paragraph()
+        answer_para.add_run('Beklenen Cevap: ').bold = True
+        answer_para.add_run('{{CEVAP}}')
+        doc.add_paragraph()
+
+        buffer = io.BytesIO()
+        doc.save(buffer)
+
+        self.parts: List[Tuple[str, bytes, bytes]] = []
+        self.date_time = (1980, 1, 1, 0, 0, 0)
+        document_xml = None
+        with zipfile.ZipFile(buffer) as package:
+            for info in package.infolist():
+                data = package.read(info.filename)
+                if info.filename == "word/document.xml":
+                    document_xml = data.decode("utf-8")
+                    self.date_time = info.date_time
+                    self.parts.append((info.filename, b"", b""))
+                else:
+                    local, central = _zip_entry(info.filename, data, info.date_time)
+                    self.parts.append((info.filename, local, central))
+
+        # Prototip paragrafları document.xml'den ayır
+        start = document_xml.rfind("<w:p>", 0, document_xml.index(_TYPE_PLACEHOLDER))
+        end = document_xml.rindex("<w:sectPr")
+        prototypes = _PARAGRAPH.findall(document_xml[start:end])
+        if len(prototypes) != 4:
+            raise ValueError(f"Docx şablonunda beklenmeyen bölüm yapısı ({len(prototypes)} paragraf)")
+        self.type_xml, self.question_xml, self.answer_xml, self.blank_xml = prototypes
+        self.head_xml = document_xml[:start]
+        self.tail_xml = document_xml[end:]
+
+    def render(self, candidate_num: int, sections: List[Tuple[str, str, Optional[str]]]) -> bytes:
+        """Aday numarası ve bölümleri yerleştirip .docx byte'larını döndür"""
+        body = [self.head_xml.replace(_CANDIDATE_PLACEHOLDER, str(candidate_num))]
+        for type_name, question_text, expected_answer in sections:
+            body.append(self.type_xml.replace(_TYPE_PLACEHOLDER, _run_xml(type_name)))
+            body.append(self.question_xml.replace(_QUESTION_PLACEHOLDER, _run_xml(question_text)))
+            if self.with_answers and expected_answer:
+                body.append(self.answer_xml.replace(_ANSWER_PLACEHOLDER, _run_xml(expected_answer)))
+            body.append(self.blank_xml)
+        body.append(self.tail_xml)
+        document_local, document_central = _zip_entry(
+            "word/document.xml", "".join(body).encode("utf-8"), self.date_time
+        )
+
+        output = io.BytesIO()
+        central_directory = []
+        for name, local, central in self.parts:
+            if name == "word/document.xml":
+                local, central = document_local, document_central
+            # Merkezi dizin kaydına yerel başlığın offset'ini yaz (son 4 byte'tan önceki alan)
+            offset = output.tell()
+            central_directory.append(central[:42] + struct.pack("<I", offset) + central[46:])
+            output.write(local)
+        directory_offset = output.tell()
+        directory = b"".join(central_directory)
+        output.write(directory)
+        output.write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, len(central_directory), len(central_directory),
+            len(directory), directory_offset, 0
+        ))
+        return output.getvalue()
+
+
+@lru_cache(maxsize=EXPORT_TEMPLATE_CACHE_SIZE)
+def _get_template(
+    contract_title: str,
+    created_date: str,
+    role_name: str,
+    salary_multiplier: int,
+    with_answers: bool
+) -> DocxTemplate:
+    """Rol şablonunu süreç başına bir kez oluştur (LRU cache)"""
+    header = {
+        "contract_title": contract_title,
+        "created_date": created_date,
+        "role_name": role_name,
+        "salary_multiplier": salary_multiplier
+    }
+    return DocxTemplate(header, with_answers)
+
+
+def _render_document(booklet: Dict[str, Any], with_answers: bool) -> bytes:
+    """Tek bir S (with_answers=False) veya C kitapçığını rol şablonundan .docx byte'larına render et"""
+    template = _get_template(
+        booklet["contract_title"],
+        booklet["created_date"],
+        booklet["role_name"],
+        booklet["salary_multiplier"],
+        with_answers
+    )
+    return template.render(booklet["candidate_num"], booklet["sections"])
+
+
+def render_candidate_booklet(booklet: Dict[str, Any]) -> List[Tuple[str, bytes]]:
+    """Bir adayın S ve C dosyalarını (dosya adı, içerik) olarak render et - süreç havuzunda çalışır"""
+    prefix = booklet["file_prefix"]
+    candidate_num = booklet["candidate_num"]
+    return [
+        (f"{prefix} S{candidate_num}.docx", _render_document(booklet, with_answers=False)),
+        (f"{prefix} C{candidate_num}.docx", _render_document(booklet, with_answers=True))
+    ]
+
+
+def _timed_render(booklet: Dict[str, Any]) -> Tuple[List[Tuple[str, bytes]], float]:
+    """render_candidate_booklet + süre; metrikler ana süreçte kaydedilsin diye süre sonuçla döner"""
+    started = time.perf_counter()
+    files = render_candidate_booklet(booklet)
+    return files, time.perf_counter() - started
+
+
+@lru_cache(maxsize=1)
+def _renderer_fingerprint() -> List[Any]:
+    """Render çıktısını etkileyen sabitler: sürüm ve temel .docx dosyasının kimliği"""
+    fingerprint: List[Any] = [RENDER_VERSION, EXPORT_DOCX_TEMPLATE]
+    if EXPORT_DOCX_TEMPLATE:
+        try:
+            stat = os.stat(EXPORT_DOCX_TEMPLATE)
+            fingerprint += [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            pass
+    return fingerprint
+
+
+def booklet_key(booklet: Dict[str, Any]) -> str:
+    """Kitapçığın içerik adresli cache anahtarı (ilan, rol, aday ve soru metinlerinin özeti)"""
+    payload = json.dumps([_renderer_fingerprint(), booklet], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def export_key(booklets: List[Dict[str, Any]]) -> str:
+    """Tüm ZIP arşivinin cache anahtarı (kitapçık anahtarlarının sıralı özeti)"""
+    digest = hashlib.sha256()
+    for booklet in booklets:
+        digest.update(booklet_key(booklet).encode("ascii"))
+    return digest.hexdigest()
+
+
+def _cached_booklet(key: str, booklet: Dict[str, Any]) -> Optional[List[Tuple[str, bytes]]]:
+    """Kitapçığın S ve C dosyaları depoda varsa (dosya adı, içerik) listesini döndür"""
+    prefix = booklet["file_prefix"]
+    candidate_num = booklet["candidate_num"]
+    files = []
+    for kind in ("S", "C"):
+        content = artifact_store.get(key, f".{kind}.docx")
+        if content is None:
+            return None
+        files.append((f"{prefix} {kind}{candidate_num}.docx", content))
+    return files
+
+
+def _store_booklet(key: str, files: List[Tuple[str, bytes]]):
+    for kind, (_, content) in zip(("S", "C"), files):
+        artifact_store.put(key, f".{kind}.docx", content)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Paylaşılan süreç havuzunu ilk kullanımda oluştur (EXPORT_WORKERS=0 ise None)"""
+    global _pool
+    if EXPORT_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = ProcessPoolExecutor(
+                    max_workers=EXPORT_WORKERS,
+                    mp_context=multiprocessing.get_context(EXPORT_MP_START_METHOD)
+                )
+            except (OSError, ValueError) as e:
+                logger.warning(f"Export süreç havuzu oluşturulamadı, seri render kullanılacak: {str(e)}")
+                return None
+        return _pool
+
+
+def shutdown_export_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def iter_rendered_booklets(booklets: List[Dict[str, Any]]) -> Iterator[Tuple[str, bytes]]:
+    """
+    Kitapçıkları render et ve (dosya adı, içerik) çiftlerini payload sırasıyla döndür.
+
+    Yeterli sayıda kitapçık varsa render süreç havuzunda paralel yapılır.
+    Aynı anda en fazla EXPORT_STREAM_WINDOW kitapçık havuzda bekler; tüketici
+    (ZIP akışı) yavaşsa render da yavaşlar, bellekte biten kitapçık birikmez.
+    Sonuçlar gönderim sırasıyla alındığı için çıktı sırası seri render ile aynıdır.
+    Artifact deposunda bulunan kitapçıklar render edilmez; yeni render edilenler depoya yazılır.
+    """
+    keyed = [(booklet_key(booklet), booklet) for booklet in booklets]
+    pool = _get_pool() if len(booklets) >= EXPORT_PARALLEL_MIN_BOOKLETS else None
+    if pool is None:
+        for key, booklet in keyed:
+            files = _cached_booklet(key, booklet)
+            if files is None:
+                files, elapsed = _timed_render(booklet)
+                export_booklet_render.observe(elapsed)
+                export_booklets_total.inc(source="rendered")
+                _store_booklet(key, files)
+            else:
+                export_booklets_total.inc(source="cached")
+            yield from files
+        return
+
+    def submit(key: str, booklet: Dict[str, Any]) -> Tuple[str, bool, Future]:
+        files = _cached_booklet(key, booklet)
+        if files is None:
+            return key, False, pool.submit(_timed_render, booklet)
+        future = Future()
+        future.set_result((files, None))
+        return key, True, future
+
+    remaining = iter(keyed)
+    window = deque(submit(key, b) for key, b in islice(remaining, EXPORT_STREAM_WINDOW))
+    try:
+        while window:
+            key, cached, future = window.popleft()
+            files, elapsed = future.result()
+            if cached:
+                export_booklets_total.inc(source="cached")
+            else:
+                export_booklet_render.observe(elapsed)
+                export_booklets_total.inc(source="rendered")
+                _store_booklet(key, files)
+            for next_key, booklet in islice(remaining, 1):
+                window.append(submit(next_key, booklet))
+            yield from files
+    finally:
+        # İstemci bağlantıyı kopardıysa bekleyen render'ları iptal et
+        for _, _, future in window:
+            future.cancel()
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """
+    ZipFile'ın yazdığı byte'ları biriktiren, seek/tell desteklemeyen tampon.
+
+    Seek edilemeyen akışta zipfile her girdiyi data descriptor ile yazar;
+    böylece girdi tamamlanır tamamlanmaz byte'ları istemciye gönderilebilir.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_word_zip(booklets: List[Dict[str, Any]], cache_key: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Kitapçıkları render edip ZIP arşivini parça parça üret (StreamingResponse için).
+
+    Her girdi yazıldığında o girdinin byte'ları hemen döndürülür; bellekte
+    aynı anda yalnızca render penceresindeki kitapçıklar ve tek bir ZIP
+    girdisi bulunur. cache_key verilirse akış aynı anda artifact deposuna
+    yazılır ve yalnızca tamamlandığında (atomik olarak) görünür hale gelir.
+    """
+    writer = artifact_store.open_writer(cache_key, ".zip") if cache_key else None
+    buffer = _ZipStreamBuffer()
+    started = time.perf_counter()
+    try:
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for filename, content in iter_rendered_booklets(booklets):
+                zip_file.writestr(filename, content)
+                chunk = buffer.drain()
+                if writer:
+                    writer.write(chunk)
+                yield chunk
+        # Merkezi dizin (central directory) close() sırasında yazılır
+        chunk = buffer.drain()
+        if writer:
+            writer.write(chunk)
+            writer.commit()
+            writer = None
+        yield chunk
+    finally:
+        # Yarıda kalan akış depoya yazılmaz
+        if writer:
+            writer.abort()
+    export_zip_duration.observe(time.perf_counter() - started)
+    logger.info(f"ZIP akışı tamamlandı: {len(booklets)} aday kitapçığı")
+
+
+def cached_word_zip(booklets: List[Dict[str, Any]]) -> Tuple[str, Optional[BinaryIO]]:
+    """ZIP'in cache anahtarını ve depoda varsa açık dosya handle'ını döndür"""
+    key = export_key(booklets)
+    return key, artifact_store.open_reader(key, ".zip")
+
+
+def iter_cached_zip(reader: BinaryIO, chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+    """Depodan açılmış ZIP'i parça parça oku ve handle'ı kapat (StreamingResponse için)"""
+    with reader:
+        while True:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
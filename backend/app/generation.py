@@ -0,0 +1,509 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - SORU ÜRETİM SERVİSİ
+=======================================================
+
+📋 DOSYA AMACI:
+Bu dosya, bir rol için soru üretim isteğinin hazırlanması ve üretilen
+soruların veritabanına kaydedilmesi adımlarını içerir. Senkron endpoint
+(/api/step4/generate-questions) ve arka plan işleri (jobs.py) aynı
+mantığı bu modül üzerinden kullanır.
+
+🎯 KAPSAM:
+1. 📊 DAĞILIM HESABI:
+   - RoleQuestionConfig varsa onu kullanma
+   - Yoksa global config'e göre: pozisyon × aday çarpanı × aday başına soru
+
+2. 🧾 CONTEXT HAZIRLAMA:
+   - İlan, genel şartlar, rol ve zorluk bilgisinden job context üretme
+
+3. 💾 KAYIT:
+   - Tam mod: rolün eski sorularını silip yenilerini ekleme
+   - Artımlı mod: yalnızca eksik/geçersiz soruları üretme, fazlalığı silme
+   - Sorular ORM nesnesi olarak değil tek bir toplu INSERT ile yazılır; birden
+     fazla rolün sonucu aynı DELETE/INSERT'lerle kaydedilir
+
+4. 🗂️ TOPLU YÜKLEME:
+   - Roller konfigürasyonlarıyla (selectinload), soru tipleri ve global config
+     ilan başına bir kez; sorular tek IN sorgusuyla alınıp role göre gruplanır
+   - Sorgu sayısı rol sayısından bağımsızdır (N+1 yok)
+
+📊 VERİ AKIŞI:
+GİRİŞ: Contract, Role (ORM nesneleri), DB session
+İŞLEM: Dağılım hesabı → context → generate_questions_with_4o_mini parametreleri
+ÇIKIŞ: Üretim parametreleri (dict), kaydedilen Question satırları
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import hashlib
+import json
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
+from .models import Contract, Role, Question, QuestionConfig
+from .question_types import question_type_registry
+from .utils import planned_question_counts
+
+logger = logging.getLogger(__name__)
+
+# Zorluk seviyesi helper fonksiyonları
+def get_difficulty_level_by_multiplier(salary_multiplier: float):
+    """Maaş katsayısına göre zorluk seviyesi belirle - Profesyonel Rubrik Modeli"""
+    if salary_multiplier <= 2:
+        return {
+            "level": "2x",
+            "name": "🟢 ORTA SEVİYE UYGULAYICI",
+            "description": "2-4 yıl tecrübe - Günlük operasyonu eksiksiz yürütme, temel optimizasyon",
+            "experience_years": "2-4 yıl",
+            "focus": "K1: 30% • K2: 40% • K3: 25% • K4: 5% • K5: 0%",
+            "question_distribution": {
+                "K1_temel_bilgi": 30,
+                "K2_uygulamali": 40, 
+                "K3_hatacozumleme": 25,
+                "K4_tasarim": 5,
+                "K5_stratejik_liderlik": 0
+            }
+        }
+    elif salary_multiplier <= 3:
+        return {
+            "level": "3x",
+            "name": "🟡 KIDEMLI UZMAN", 
+            "description": "5-8 yıl tecrübe - Çapraz disiplinde hâkimiyet, mentorluk, kritik problem çözümü",
+            "experience_years": "5-8 yıl",
+            "focus": "K1: 15% • K2: 25% • K3: 35% • K4: 20% • K5: 5%",
+            "question_distribution": {
+                "K1_temel_bilgi": 15,
+                "K2_uygulamali": 25,
+                "K3_hatacozumleme": 35,
+                "K4_tasarim": 20,
+                "K5_stratejik_liderlik": 5
+            }
+        }
+    elif salary_multiplier <= 4:
+        return {
+            "level": "4x",
+            "name": "🟠 MİMAR/TEKNİK LİDER", 
+            "description": "≥10 yıl tecrübe - Strateji, büyük ölçekli mimari, metodoloji, ekip & süreç yönetimi",
+            "experience_years": "≥10 yıl", 
+            "focus": "K1: 5% • K2: 15% • K3: 25% • K4: 35% • K5: 20%",
+            "question_distribution": {
+                "K1_temel_bilgi": 5,
+                "K2_uygulamali": 15,
+                "K3_hatacozumleme": 25,
+                "K4_tasarim": 35,
+                "K5_stratejik_liderlik": 20
+            }
+        }
+    else:
+        return {
+            "level": "5x",
+            "name": "🔴 ENTERPRISE UZMAN",
+            "description": "15+ yıl tecrübe - Enterprise mimari, strategik kararlar, teknoloji liderliği", 
+            "experience_years": "15+ yıl",
+            "focus": "K1: 0% • K2: 10% • K3: 20% • K4: 40% • K5: 30%",
+            "question_distribution": {
+                "K1_temel_bilgi": 0,
+                "K2_uygulamali": 10,
+                "K3_hatacozumleme": 20,
+                "K4_tasarim": 40,
+                "K5_stratejik_liderlik": 30
+            }
+        }
+
+
+def load_contract_roles(db: Session, contract_id: int, role_id: Optional[int] = None) -> List[Role]:
+    """İlanın rollerini (role_id verilirse yalnızca o rolü) soru konfigürasyonlarıyla birlikte yükle"""
+    query = db.query(Role).options(selectinload(Role.question_configs)).filter(Role.contract_id == contract_id)
+    if role_id:
+        query = query.filter(Role.id == role_id)
+    return query.all()
+
+
+def load_role_questions(db: Session, contract_id: int, role_ids: List[int]) -> Dict[int, List[Question]]:
+    """Rollerin sorularını tek sorguda al, role göre grupla (her grup Question.id sırasıyla)"""
+    questions_by_role: Dict[int, List[Question]] = {role_id: [] for role_id in role_ids}
+    if not role_ids:
+        return questions_by_role
+
+    questions = db.query(Question).filter(
+        Question.contract_id == contract_id,
+        Question.role_id.in_(role_ids)
+    ).order_by(Question.id).all()
+    for q in questions:
+        questions_by_role[q.role_id].append(q)
+    return questions_by_role
+
+
+def load_generation_context(
+    db: Session,
+    contract_id: int,
+    roles: Optional[List[Role]] = None,
+    incremental: bool = False
+) -> Dict[str, Any]:
+    """
+    Rol döngüsünden önce ilan genelindeki üretim verisini bir kez yükle.
+
+    Dönen dict: question_types (aktif, sıralı), global_config ve artımlı modda
+    questions_by_role (rollerin mevcut soruları).
+    """
+    context = {
+        "question_types": question_type_registry.active(db),
+        "global_config": db.query(QuestionConfig).filter(
+            QuestionConfig.contract_id == contract_id
+        ).first(),
+        "questions_by_role": None
+    }
+    if incremental and roles:
+        context["questions_by_role"] = load_role_questions(db, contract_id, [role.id for role in roles])
+    return context
+
+
+def compute_question_distribution(
+    db: Session,
+    contract_id: int,
+    role: Role,
+    context: Optional[Dict[str, Any]] = None
+) -> Dict[str, int]:
+    """Rol için soru tipi bazında üretilecek soru sayılarını hesapla (Step 3'teki mantıkla aynı)"""
+    if context is None:
+        context = load_generation_context(db, contract_id)
+
+    # Rol konfigürasyonları (load_contract_roles ile önceden yüklenmişse sorgu yapılmaz)
+    configs = role.question_configs
+    question_types = context["question_types"]
+
+    config_map = {config.question_type_id: config for config in configs}
+
+    # Debug: Hesaplama bilgilerini logla
+    logger.info(f"Role: {role.name}")
+    logger.info(f"Position count: {role.position_count}")
+    logger.info(f"Configs found: {len(configs)}")
+    logger.info(f"Config map keys: {list(config_map.keys())}")
+
+    question_distribution = {}
+
+    global_config = context["global_config"]
+
+    if global_config:
+        for qt in question_types:
+            config = config_map.get(qt.id)
+
+            if config and hasattr(config, 'question_count'):
+                # Mevcut konfigürasyon varsa onu kullan
+                count = config.question_count
+            else:
+                # Global config'e göre hesapla (Step 3'teki mantık)
+                candidate_count = role.position_count * global_config.candidate_multiplier
+                distribution = global_config.question_type_distribution or {}
+
+                # distribution bir dict değilse default değer kullan
+                if isinstance(distribution, dict):
+                    questions_per_candidate = distribution.get(qt.code, 1)
+                else:
+                    questions_per_candidate = 1
+
+                count = candidate_count * questions_per_candidate
+
+            question_distribution[qt.code] = count
+            logger.info(f"Question type {qt.code}: {count} questions")
+    else:
+        # Global config yoksa default değerler
+        for qt in question_types:
+            config = config_map.get(qt.id)
+            count = config.question_count if (config and hasattr(config, 'question_count')) else 5
+            question_distribution[qt.code] = count
+            logger.info(f"Question type {qt.code}: {count} questions (default)")
+
+    return question_distribution
+
+
+def build_job_context(contract: Contract, role: Role, role_difficulty: Dict[str, Any]) -> str:
+    """Soru üretimi için ilan + rol context metnini hazırla"""
+    return f"""
+İLAN BAŞLIĞI: {contract.title}
+
+GENEL ŞARTLAR:
+{contract.general_requirements or "Genel şartlar belirtilmemiş"}
+
+ROL: {role.name}
+MAAŞ KATSAYISI: {role.salary_multiplier}x
+POZİSYON SAYISI: {role.position_count}
+ÖZEL ŞARTLAR:
+{role.requirements or "Özel şartlar belirtilmemiş"}
+
+ZORLUK SEVİYESİ: {role_difficulty['description']}
+"""
+
+
+def build_role_generation_request(
+    db: Session,
+    contract: Contract,
+    role: Role,
+    incremental: bool = False,
+    context: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Bir rol için generate_questions_with_4o_mini parametrelerini hazırla.
+
+    Dönen dict: job_context, fingerprint, roles, question_config, start_numbers,
+    incremental_plan, role_difficulty ve usage_tags anahtarlarını içerir. incremental=True
+    ise question_config yalnızca eksik soru sayılarını içerir. Birden çok rol
+    için çağrılıyorsa context load_generation_context ile bir kez yüklenmelidir.
+    """
+    if context is None:
+        context = load_generation_context(db, contract.id, [role], incremental=incremental)
+    question_distribution = compute_question_distribution(db, contract.id, role, context)
+
+    # Zorluk seviyesi hesapla
+    role_difficulty = get_difficulty_level_by_multiplier(role.salary_multiplier)
+    fingerprint = role_fingerprint(contract, role)
+
+    question_config = {
+        "professional_experience": question_distribution.get("professional_experience", 5),
+        "theoretical_knowledge": question_distribution.get("theoretical_knowledge", 5),
+        "practical_application": question_distribution.get("practical_application", 5),
+        "difficulty_level": role_difficulty["level"]
+    }
+
+    incremental_plan = None
+    start_numbers = None
+    if incremental:
+        existing = (context.get("questions_by_role") or {}).get(role.id)
+        incremental_plan = plan_incremental_generation(
+            db, contract.id, role.id, question_config, fingerprint, existing=existing
+        )
+        question_config = incremental_plan["deficit_config"]
+        start_numbers = incremental_plan["start_numbers"]
+        logger.info(
+            f"Artımlı üretim - {role.name}: korunan {incremental_plan['kept']}, "
+            f"eksik {question_config}, silinecek {len(incremental_plan['delete_ids'])}"
+        )
+
+    return {
+        "job_context": build_job_context(contract, role, role_difficulty),
+        "fingerprint": fingerprint,
+        "roles": [{
+            "name": role.name,
+            "salary_multiplier": role.salary_multiplier,
+            "position_count": role.position_count,
+            "special_requirements": role.requirements
+        }],
+        "question_config": question_config,
+        "start_numbers": start_numbers,
+        "incremental_plan": incremental_plan,
+        "role_difficulty": role_difficulty,
+        # Telemetri kayıtlarının ilan/rol etiketi
+        "usage_tags": {"contract_id": contract.id, "role_id": role.id}
+    }
+
+
+def store_generated_questions(
+    db: Session,
+    contract_id: int,
+    role_id: int,
+    model_name: str,
+    generation_request: Dict[str, Any],
+    questions: Dict[str, List[Dict[str, Any]]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Üretim sonucunu moda göre kaydet (commit çağıran tarafta).
+
+    Rolün güncel soru setini tipe göre döndürür: tam modda üretilen sorular,
+    artımlı modda korunan + yeni üretilen sorular.
+    """
+    return store_generated_question_sets(
+        db, contract_id, model_name, [(role_id, generation_request, questions)]
+    )[role_id]
+
+
+def store_generated_question_sets(
+    db: Session,
+    contract_id: int,
+    model_name: str,
+    results: List[Tuple[int, Dict[str, Any], Dict[str, List[Dict[str, Any]]]]]
+) -> Dict[int, Dict[str, List[Dict[str, Any]]]]:
+    """
+    Birden fazla rolün üretim sonucunu (rol id, üretim isteği, sorular) kaydet (commit çağıran tarafta).
+
+    Sorgu sayısı rol sayısından bağımsızdır: tam moddaki rollerin eski soruları
+    tek DELETE, artımlı moddaki geçersiz/fazla sorular tek DELETE, tüm yeni
+    sorular tek toplu INSERT ile; artımlı rollerin güncel setleri tek IN sorgusuyla.
+    Dönen dict: rol id → store_generated_questions ile aynı yapıda sorular.
+    """
+    replace_role_ids = [role_id for role_id, request, _ in results if not request.get("incremental_plan")]
+    incremental_role_ids = [role_id for role_id, request, _ in results if request.get("incremental_plan")]
+    delete_ids = [
+        question_id
+        for _, request, _ in results if request.get("incremental_plan")
+        for question_id in request["incremental_plan"]["delete_ids"]
+    ]
+
+    if replace_role_ids:
+        db.query(Question).filter(
+            Question.contract_id == contract_id,
+            Question.role_id.in_(replace_role_ids)
+        ).delete(synchronize_session=False)
+    if delete_ids:
+        db.query(Question).filter(
+            Question.id.in_(delete_ids)
+        ).delete(synchronize_session=False)
+
+    # Soruları veritabanına toplu kaydet (rol, tip ve üretim sırası korunur)
+    rows = [
+        question_row_values(contract_id, role_id, model_name, question_type, q, request["fingerprint"])
+        for role_id, request, questions in results
+        for question_type, question_list in questions.items()
+        for q in question_list
+    ]
+    if rows:
+        db.execute(insert(Question), rows)
+
+    stored = {
+        role_id: questions
+        for role_id, request, questions in results if not request.get("incremental_plan")
+    }
+    if incremental_role_ids:
+        db.flush()
+        for role_id, role_questions in load_role_questions(db, contract_id, incremental_role_ids).items():
+            stored[role_id] = group_questions_by_type(role_questions)
+    return stored
+
+
+def role_fingerprint(contract: Contract, role: Role) -> str:
+    """
+    Soruların içeriğini etkileyen ilan/rol alanlarının özeti.
+
+    Pozisyon sayısı dahil değildir: yalnızca soru adedini değiştirir, mevcut
+    soruları geçersiz kılmaz.
+    """
+    payload = json.dumps([
+        contract.title,
+        contract.general_requirements,
+        role.name,
+        role.salary_multiplier,
+        role.requirements
+    ], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def plan_incremental_generation(
+    db: Session,
+    contract_id: int,
+    role_id: int,
+    question_config: Dict[str, Any],
+    fingerprint: str,
+    existing: Optional[List[Question]] = None
+) -> Dict[str, Any]:
+    """
+    Hedef soru dağılımını mevcut sorularla karşılaştır.
+
+    Geçersiz sorular (farklı fingerprint ile üretilmiş veya API hatası yüzünden
+    yer tutucu olan) ile hedefi aşan fazlalık silinmek üzere işaretlenir; geri
+    kalanı korunur ve yalnızca eksik kadar yeni soru üretilir. Fingerprint'i
+    olmayan eski kayıtlar geçerli sayılır.
+
+    Dönen dict: delete_ids, kept ({tip: adet}), deficit_config (üretim için
+    question_config) ve start_numbers (yeni soruların numara başlangıcı).
+    Yeni sorular silinenler dahil o tipteki en yüksek numaranın devamından
+    numaralanır: numara prompt'a ve LLM cache anahtarına girdiği için korunan
+    bir sorunun numarasını almak aynı soruyu (cache'ten) tekrar üretirdi.
+    Numarası kayıtlı olmayan eski sorular sıralarıyla numaralanmış sayılır.
+    existing verilmezse rolün soruları veritabanından okunur.
+    """
+    if existing is None:
+        existing = load_role_questions(db, contract_id, [role_id])[role_id]
+
+    existing_by_type: Dict[str, List[Question]] = {}
+    for q in existing:
+        existing_by_type.setdefault(q.question_type, []).append(q)
+
+    targets = {
+        question_type: count
+        for question_type, _, count in planned_question_counts(question_config)
+    }
+
+    delete_ids = []
+    kept = {}
+    start_numbers = {}
+    deficit_config = {"difficulty_level": question_config.get("difficulty_level", "orta")}
+
+    for question_type, question_list in existing_by_type.items():
+        if question_type not in targets:
+            # Artık üretilmeyen (pasif veya sayısı 0 olan) tip
+            delete_ids.extend(q.id for q in question_list)
+
+    for question_type, target in targets.items():
+        valid = []
+        for q in existing_by_type.get(question_type, []):
+            metadata = q.generation_metadata or {}
+            stale = metadata.get("fingerprint") not in (None, fingerprint)
+            if stale or metadata.get("api_error"):
+                delete_ids.append(q.id)
+            else:
+                valid.append(q)
+
+        keep = valid[:target]
+        delete_ids.extend(q.id for q in valid[target:])
+        kept[question_type] = len(keep)
+        deficit_config[question_type] = target - len(keep)
+        start_numbers[question_type] = max(
+            [
+                (q.generation_metadata or {}).get("question_number") or position
+                for position, q in enumerate(existing_by_type.get(question_type, []), 1)
+            ],
+            default=0
+        )
+
+    return {
+        "delete_ids": delete_ids,
+        "kept": kept,
+        "deficit_config": deficit_config,
+        "start_numbers": start_numbers
+    }
+
+
+def group_questions_by_type(questions: List[Question]) -> Dict[str, List[Dict[str, Any]]]:
+    """Question satırlarını üretim çıktısıyla aynı yapıda tipe göre grupla"""
+    questions_by_type = {
+        "professional_experience": [],
+        "theoretical_knowledge": [],
+        "practical_application": []
+    }
+    for q in questions:
+        questions_by_type.setdefault(q.question_type, []).append({
+            "question": q.question_text,
+            "expected_answer": q.expected_answer,
+            "difficulty": q.difficulty
+        })
+    return questions_by_type
+
+
+def question_row_values(
+    contract_id: int,
+    role_id: int,
+    model_name: str,
+    question_type: str,
+    q: Dict[str, Any],
+    fingerprint: Optional[str] = None
+) -> Dict[str, Any]:
+    """Üretilen tek bir sorudan Question kolon değerlerini hazırla"""
+    generation_metadata = {"fingerprint": fingerprint}
+    if q.get("question_number") is not None:
+        # Artımlı üretim yeni soruları en yüksek numaranın devamından numaralar
+        generation_metadata["question_number"] = q["question_number"]
+    if "api_error" in q:
+        generation_metadata["api_error"] = True
+
+    return {
+        "role_id": role_id,
+        "contract_id": contract_id,
+        "question_text": q["question"],
+        "question_type": question_type,
+        "difficulty": q["difficulty"],
+        "expected_answer": q.get("expected_answer", ""),
+        "scoring_criteria": q.get("scoring_criteria", ""),
+        "llm_model": model_name,
+        "generation_metadata": generation_metadata
+    }
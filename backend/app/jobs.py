@@ -0,0 +1,292 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - ARKA PLAN ÜRETİM İŞLERİ
+===========================================================
+
+📋 DOSYA AMACI:
+Bu dosya, tam ilan soru üretimini HTTP isteğinden bağımsız bir arka plan
+işi olarak çalıştıran iş kuyruğunu içerir. POST isteği hemen bir job id
+döndürür; işçi thread'leri üretimi yürütür ve ilerleme durum endpoint'i
+üzerinden izlenir.
+
+🎯 KAPSAM:
+1. 📥 KUYRUK:
+   - Sınırlı sayıda işçi thread'i (GENERATION_JOB_WORKERS)
+   - Birden fazla ilan aynı anda kuyruğa alınabilir
+
+2. 📈 İLERLEME TAKİBİ:
+   - Rol ve soru tipi bazında tamamlanan/toplam/başarısız sayıları
+   - Geçen süre ve tahmini kalan süre (ETA)
+
+3. 💾 KALICILIK:
+   - Her rol tamamlandığında sorular commit edilir (uzun üretimde kayıp olmaz)
+   - QuestionConfig.generation_status: generating → completed / failed
+
+⚠️ NOT:
+İş kayıtları süreç belleğinde tutulur; sunucu yeniden başlarsa iş geçmişi
+kaybolur, ancak commit edilmiş sorular ve generation_status korunur.
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Union
+
+from .database import SessionLocal
+from .models import Contract, QuestionConfig
+from .generation import (
+    build_role_generation_request, store_generated_questions, load_contract_roles, load_generation_context
+)
+from .utils import generate_questions_with_4o_mini, planned_question_counts
+
+logger = logging.getLogger(__name__)
+
+# Bellekte tutulacak en fazla bitmiş iş sayısı
+MAX_FINISHED_JOBS = 200
+
+
+class GenerationJob:
+    """Tek bir ilan (veya rol) için arka plan soru üretim işi"""
+
+    def __init__(
+        self,
+        contract_id: int,
+        model_name: str,
+        role_id: Optional[int] = None,
+        batch_sizes: Optional[Union[int, Dict[str, int]]] = None,
+        use_cache: bool = True,
+        incremental: bool = False,
+        provider: Optional[str] = None
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.contract_id = contract_id
+        self.model_name = model_name
+        self.role_id = role_id
+        self.batch_sizes = batch_sizes
+        self.use_cache = use_cache
+        self.incremental = incremental
+        self.provider = provider
+        self.status = "queued"  # queued, running, completed, failed
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.roles: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_role(self, role_id: int, role_name: str, planned: List[tuple]) -> Dict[str, Any]:
+        """Rolü planlanan soru sayılarıyla ilerleme tablosuna ekle"""
+        role_progress = {
+            "role_id": role_id,
+            "role_name": role_name,
+            "status": "pending",  # pending, generating, completed, failed
+            "error": None,
+            "types": {
+                question_type: {"done": 0, "total": count, "failed": 0}
+                for question_type, _, count in planned
+            }
+        }
+        with self._lock:
+            self.roles.append(role_progress)
+        return role_progress
+
+    def record_question(self, role_progress: Dict[str, Any], question_type: str, ok: bool):
+        """Tamamlanan tek bir soruyu ilerlemeye işle (işçi thread'lerinden çağrılır)"""
+        with self._lock:
+            type_progress = role_progress["types"].setdefault(
+                question_type, {"done": 0, "total": 0, "failed": 0}
+            )
+            type_progress["done"] += 1
+            if not ok:
+                type_progress["failed"] += 1
+
+    def set_role_status(self, role_progress: Dict[str, Any], status: str, error: Optional[str] = None):
+        with self._lock:
+            role_progress["status"] = status
+            role_progress["error"] = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        """İşin anlık durumunu JSON'a uygun dict olarak döndür"""
+        with self._lock:
+            roles = [
+                {**role, "types": {code: dict(progress) for code, progress in role["types"].items()}}
+                for role in self.roles
+            ]
+
+        done = sum(t["done"] for role in roles for t in role["types"].values())
+        total = sum(t["total"] for role in roles for t in role["types"].values())
+        failed = sum(t["failed"] for role in roles for t in role["types"].values())
+
+        elapsed = None
+        eta = None
+        if self.started_at:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            if self.status == "running" and done > 0 and total > done:
+                eta = elapsed / done * (total - done)
+            elif self.status != "running":
+                eta = 0.0
+
+        return {
+            "job_id": self.job_id,
+            "contract_id": self.contract_id,
+            "role_id": self.role_id,
+            "model_name": self.model_name,
+            "provider": self.provider,
+            "mode": "incremental" if self.incremental else "full",
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "progress": {
+                "done": done,
+                "total": total,
+                "failed": failed,
+                "elapsed_seconds": round(elapsed, 2) if elapsed is not None else None,
+                "eta_seconds": round(eta, 2) if eta is not None else None
+            },
+            "roles": roles
+        }
+
+
+class GenerationJobManager:
+    """Üretim işlerini kuyruğa alan ve işçi thread'lerinde çalıştıran yönetici"""
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="generation-job")
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        contract_id: int,
+        model_name: str,
+        role_id: Optional[int] = None,
+        batch_sizes: Optional[Union[int, Dict[str, int]]] = None,
+        use_cache: bool = True,
+        incremental: bool = False,
+        provider: Optional[str] = None
+    ) -> GenerationJob:
+        """Yeni bir üretim işi oluştur ve kuyruğa al"""
+        job = GenerationJob(
+            contract_id=contract_id,
+            model_name=model_name,
+            role_id=role_id,
+            batch_sizes=batch_sizes,
+            use_cache=use_cache,
+            incremental=incremental,
+            provider=provider
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        logger.info(f"Üretim işi kuyruğa alındı: {job.job_id} (contract {contract_id})")
+        return job
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, contract_id: Optional[int] = None) -> List[GenerationJob]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if contract_id is not None:
+            jobs = [job for job in jobs if job.contract_id == contract_id]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _prune(self):
+        """Bellekte tutulan bitmiş iş sayısını sınırla (en eskiler silinir)"""
+        finished = [job for job in self._jobs.values() if job.status in ("completed", "failed")]
+        if len(finished) > MAX_FINISHED_JOBS:
+            finished.sort(key=lambda job: job.created_at)
+            for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+                del self._jobs[job.job_id]
+
+    def _set_generation_status(self, db, contract_id: int, status: str):
+        """QuestionConfig.generation_status alanını güncelle (config varsa)"""
+        config = db.query(QuestionConfig).filter(
+            QuestionConfig.contract_id == contract_id
+        ).first()
+        if config:
+            config.generation_status = status
+            db.commit()
+
+    def _run(self, job: GenerationJob):
+        """İşi işçi thread'inde çalıştır: her rol üretilir ve ayrı commit edilir"""
+        job.status = "running"
+        job.started_at = time.time()
+        db = SessionLocal()
+        try:
+            self._set_generation_status(db, job.contract_id, "generating")
+
+            contract = db.query(Contract).filter(Contract.id == job.contract_id).first()
+            if not contract:
+                raise ValueError("İlan bulunamadı")
+
+            roles = load_contract_roles(db, job.contract_id, job.role_id)
+            generation_context = load_generation_context(db, job.contract_id, roles, incremental=job.incremental)
+
+            # Önce tüm rolleri planla ki toplam ilerleme baştan bilinsin
+            plans = []
+            for role in roles:
+                generation_request = build_role_generation_request(
+                    db, contract, role, incremental=job.incremental, context=generation_context
+                )
+                planned = planned_question_counts(generation_request["question_config"])
+                plans.append((role, generation_request, job.add_role(role.id, role.name, planned)))
+
+            failed_roles = 0
+            for role, generation_request, role_progress in plans:
+                job.set_role_status(role_progress, "generating")
+
+                def on_question(question_type, index, ok, role_progress=role_progress):
+                    job.record_question(role_progress, question_type, ok)
+
+                result = generate_questions_with_4o_mini(
+                    model_name=job.model_name,
+                    job_context=generation_request["job_context"],
+                    roles=generation_request["roles"],
+                    question_config=generation_request["question_config"],
+                    progress_callback=on_question,
+                    batch_sizes=job.batch_sizes,
+                    use_cache=job.use_cache,
+                    start_numbers=generation_request["start_numbers"],
+                    provider=job.provider,
+                    usage_tags=generation_request["usage_tags"]
+                )
+
+                if result["success"]:
+                    store_generated_questions(
+                        db, job.contract_id, role.id, job.model_name, generation_request, result["questions"]
+                    )
+                    db.commit()
+                    job.set_role_status(role_progress, "completed")
+                else:
+                    failed_roles += 1
+                    job.set_role_status(role_progress, "failed", result.get("error", "Soru üretiminde hata"))
+
+            job.status = "failed" if failed_roles else "completed"
+            if failed_roles:
+                job.error = f"{failed_roles} rol için soru üretilemedi"
+            self._set_generation_status(db, job.contract_id, job.status)
+            logger.info(f"Üretim işi tamamlandı: {job.job_id} ({job.status})")
+
+        except Exception as e:
+            logger.error(f"Üretim işi hatası ({job.job_id}): {str(e)}")
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            try:
+                self._set_generation_status(db, job.contract_id, "failed")
+            except Exception:
+                db.rollback()
+        finally:
+            job.finished_at = time.time()
+            db.close()
@@ -0,0 +1,264 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - LLM YANIT CACHE'İ
+=====================================================
+
+📋 DOSYA AMACI:
+Bu dosya, soru üretimi sırasında yapılan LLM çağrılarının yanıtlarını
+diskte (SQLite) saklayan kalıcı cache'i içerir. Aynı prompt ile yapılan
+tekrar çağrılar (geçici bir hatadan sonra 4. adımı yeniden çalıştırma,
+değişmeyen bir rolü tekrar üretme) API'ye gitmeden cache'ten döner.
+
+🎯 KAPSAM:
+1. 🔑 ANAHTAR:
+   - SHA-256(model, system prompt, user prompt, örnekleme parametreleri, slot)
+   - Prompt'lar boşluk farklarından etkilenmemesi için normalize edilir
+
+2. 🧹 TAHLİYE:
+   - TTL: LLM_CACHE_TTL_SECONDS (varsayılan 7 gün)
+   - Boyut: LLM_CACHE_MAX_ENTRIES (varsayılan 50.000) - en eski erişilenler silinir
+
+3. ⚡ EŞZAMANLILIK:
+   - Okumalar thread başına ayrı bağlantıdan, yazma kilidi alınmadan yapılır (WAL)
+   - Hit'te last_access yalnızca kayıttaki değer LAST_ACCESS_RESOLUTION'dan eskiyse
+     güncellenir; güncellemeler bellekte biriktirilip toplu yazılır (TOUCH_BATCH_SIZE
+     dolunca, her set()'te ve tahliyeden önce)
+
+4. 📊 METRİKLER:
+   - hit / miss / store sayaçları, kayıt sayısı
+
+🔧 KONFIGÜRASYON:
+- LLM_CACHE_ENABLED: "false" ile tamamen kapatılır
+- LLM_CACHE_PATH: cache dosyası (varsayılan ./llm_cache.db)
+- İstek bazında bypass: use_cache=False
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+# Her kaç yazmada bir tahliye çalıştırılacağı
+EVICTION_INTERVAL = 100
+
+# last_access bu kadar saniyeden yeniyse hit'te güncellenmez (LRU için yeterli çözünürlük)
+LAST_ACCESS_RESOLUTION = 60.0
+
+# Bekleyen last_access güncellemeleri bu sayıya ulaşınca tek transaction'da yazılır
+TOUCH_BATCH_SIZE = 100
+
+
+def _normalize(text: str) -> str:
+    """Prompt'taki boşluk/satır sonu farklarını anahtardan arındır"""
+    return " ".join(text.split())
+
+
+class LLMResponseCache:
+    """SQLite tabanlı, thread-safe LLM yanıt cache'i"""
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._writes_since_eviction = 0
+        # Yazma bağlantısını ve yazmaları korur
+        self._lock = threading.Lock()
+        # Sayaçları ve bekleyen last_access güncellemelerini korur (I/O yapılmaz)
+        self._stats_lock = threading.Lock()
+        self._pending_touches: Dict[str, float] = {}
+        self._readers = threading.local()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Yazma bağlantısını ilk kullanımda aç, şemayı oluştur (lock altında çağrılır)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_responses_last_access ON llm_responses (last_access)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any], slot: Any = None) -> str:
+        """Model, mesajlar, örnekleme parametreleri ve slot indeksinden cache anahtarı üret"""
+        payload = {
+            "model": model,
+            "messages": [[m.get("role"), _normalize(m.get("content") or "")] for m in messages],
+            "params": params,
+            "slot": slot
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _reader(self) -> sqlite3.Connection:
+        """Thread'e özel okuma bağlantısı (WAL: okumalar yazıcıyı ve birbirini beklemez)"""
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            if self._conn is None:
+                with self._lock:
+                    # Şema yazma bağlantısıyla bir kez oluşturulur
+                    self._connection()
+            conn = sqlite3.connect(self.path)
+            self._readers.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Anahtara ait geçerli yanıtı döndür; yoksa veya süresi dolmuşsa None"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        query = "SELECT response, created_at, last_access FROM llm_responses WHERE key = ?"
+        try:
+            if self.path == ":memory:":
+                # Bellek içi veritabanı bağlantıya özel: tek bağlantıdan lock altında okunur
+                with self._lock:
+                    row = self._connection().execute(query, (key,)).fetchone()
+            else:
+                row = self._reader().execute(query, (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache okuma hatası: {str(e)}")
+            row = None
+
+        if row and now - row[1] <= self.ttl_seconds:
+            flush = False
+            with self._stats_lock:
+                self.hits += 1
+                if now - row[2] >= LAST_ACCESS_RESOLUTION:
+                    self._pending_touches[key] = now
+                    flush = len(self._pending_touches) >= TOUCH_BATCH_SIZE
+            if flush:
+                with self._lock:
+                    try:
+                        self._flush_touches(self._connection())
+                    except sqlite3.Error as e:
+                        logger.warning(f"LLM cache yazma hatası: {str(e)}")
+            return row[0]
+
+        if row:
+            with self._lock:
+                try:
+                    conn = self._connection()
+                    conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache yazma hatası: {str(e)}")
+        with self._stats_lock:
+            self.misses += 1
+        return None
+
+    def _flush_touches(self, conn: sqlite3.Connection):
+        """Bekleyen last_access güncellemelerini tek transaction'da yaz (lock altında çağrılır)"""
+        with self._stats_lock:
+            touches, self._pending_touches = self._pending_touches, {}
+        if not touches:
+            return
+        conn.executemany(
+            "UPDATE llm_responses SET last_access = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in touches.items()]
+        )
+        conn.commit()
+
+    def set(self, key: str, model: str, response: str):
+        """Yanıtı cache'e yaz; belirli aralıklarla tahliye çalıştır"""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                self._flush_touches(conn)
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, response, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now)
+                )
+                conn.commit()
+                with self._stats_lock:
+                    self.stores += 1
+                self._writes_since_eviction += 1
+                if self._writes_since_eviction >= EVICTION_INTERVAL:
+                    self._evict(conn, now)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache yazma hatası: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Süresi dolan kayıtları ve max_entries üstündeki en eski kayıtları sil"""
+        self._writes_since_eviction = 0
+        conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM llm_responses WHERE key IN ("
+            " SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        conn.commit()
+
+    def clear(self) -> int:
+        """Tüm cache kayıtlarını sil, silinen kayıt sayısını döndür"""
+        with self._lock:
+            conn = self._connection()
+            with self._stats_lock:
+                self._pending_touches = {}
+            deleted = conn.execute("DELETE FROM llm_responses").rowcount
+            conn.commit()
+            return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss sayaçları ve kayıt sayısı"""
+        with self._lock:
+            entries = 0
+            if self.enabled:
+                try:
+                    entries = self._connection().execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+                except sqlite3.Error:
+                    entries = 0
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "path": self.path,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": entries,
+                "pending_touches": len(self._pending_touches),
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries": self.max_entries
+            }
+
+
+# Uygulama genelinde paylaşılan cache
+response_cache = LLMResponseCache()
@@ -0,0 +1,314 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - LLM YANIT PARSER'I
+======================================================
+
+📋 DOSYA AMACI:
+Bu dosya, modelden gelen soru yanıtlarını ({"question", "expected_answer"}
+nesnesi veya bunların dizisi) ayrıştıran tek parser'ı içerir. Tekil üretim,
+batch üretim ve soru düzeltme aynı kodu kullanır.
+
+🎯 KAPSAM:
+1. ⚡ HIZLI YOL:
+   - Yanıt doğrudan geçerli JSON ise tek json.loads ile biter (çoğu yanıt)
+
+2. 🔍 ÇIKARMA:
+   - ```json ... ``` blokları, "json (" önekleri ve JSON öncesi/sonrası metin
+   - Artımlı parantez eşleştirici: string ve kaçış karakterlerini bilerek ilk
+     dengeli {...} / [...] bloğunu bulur (ilk { / son } kesmesinin aksine
+     sonraki metindeki parantezlerden etkilenmez)
+   - Yarıda kesilmiş batch dizilerinde tamamlanmış nesneler kurtarılır
+
+3. 🔧 ONARIM (yalnızca katı parse başarısız olursa):
+   - "metin", "\\n\\nAnahtar kelimeler: ..." olarak bölünmüş cevapları birleştirme
+   - Sondaki virgüller
+   - Değerin başında/sonunda çift tırnak (""metin"") - geçerli JSON'daki boş
+     string'lere ("") dokunulmaz
+
+4. 🧱 YAPILANDIRILMIŞ ÇIKTI (LLM_STRUCTURED_OUTPUT):
+   - off (varsayılan): yalnızca prompt'ta tarif edilen format
+   - json_object: response_format={"type": "json_object"}
+   - json_schema: response_format ile katı JSON şeması (OpenAI structured outputs;
+     vLLM vb. sunucularda destek sürüme bağlı)
+   - Yapılandırılmış modda batch yanıtı {"questions": [...]} nesnesidir (json_object
+     kök dizi kabul etmez)
+   - Yanıtlar önce pydantic ile doğrulanır; şemaya uymazsa yukarıdaki onarım
+     yoluna düşülür
+
+🔧 KULLANIM:
+- parse_question(text, structured) → {"question", "expected_answer"} veya None
+- parse_question_list(text, structured) → batch yanıtındaki geçerli sorular
+- strip_code_fences(text) → JSON bulunamazsa düz metin olarak kullanılacak içerik
+- response_format(batch) → sağlayıcıya gönderilecek response_format (kapalıysa None)
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+logger = logging.getLogger(__name__)
+
+STRUCTURED_OUTPUT_MODES = ("off", "json_object", "json_schema")
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "off").lower()
+if LLM_STRUCTURED_OUTPUT not in STRUCTURED_OUTPUT_MODES:
+    logger.warning(f"Geçersiz LLM_STRUCTURED_OUTPUT={LLM_STRUCTURED_OUTPUT}, 'off' kullanılıyor")
+    LLM_STRUCTURED_OUTPUT = "off"
+
+# strict=False: string içindeki ham satır sonlarını (modellerde yaygın) kabul et
+_decoder = json.JSONDecoder(strict=False)
+
+# ``` sonrasındaki dil etiketi ve satır sonu
+_FENCE_LANG_RE = re.compile(r'[ \t]*(?:json|JSON)?[ \t]*\n?')
+_JSON_PAREN_PREFIX_RE = re.compile(r'^"?json \(')
+# JSON parantez eşleştirmede önemli karakterler (arada kalan metin tek adımda atlanır)
+_STRUCTURAL_RE = re.compile(r'[{}\[\]"\\]')
+
+# "metin", "\n\nAnahtar kelimeler: ..." → "metin\n\nAnahtar kelimeler: ..."
+_SPLIT_KEYWORDS_RE = re.compile(r'",\s*"(\\n\\nAnahtar kelimeler:[^"]*)"')
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+# "anahtar": ""metin  →  "anahtar": "metin
+_DOUBLED_OPEN_QUOTE_RE = re.compile(r'(:\s*)""(?=[^\s,}\]])')
+# metin""  ,/}  →  metin"  ,/}
+_DOUBLED_CLOSE_QUOTE_RE = re.compile(r'(?<=[^\s:,\[{"\\])""(?=\s*[,}\]])')
+
+
+def strip_code_fences(text: str) -> str:
+    """Markdown kod bloğu ve "json (" öneklerini temizlenmiş metin"""
+    cleaned = text.strip()
+    fence = cleaned.find("```")
+    if fence != -1:
+        body_start = _FENCE_LANG_RE.match(cleaned, fence + 3).end()
+        body_end = cleaned.find("```", body_start)
+        # Kapanmamış blok: yanıt max_tokens'ta kesilmiş
+        return cleaned[body_start:body_end if body_end != -1 else len(cleaned)].strip()
+    if _JSON_PAREN_PREFIX_RE.match(cleaned):
+        return _JSON_PAREN_PREFIX_RE.sub("{", cleaned, count=1).strip()
+    return cleaned
+
+
+def _match_close(text: str, start: int) -> int:
+    """text[start]'taki { veya [ için eşleşen kapanışın indeksi; dengesizse -1"""
+    depth = 0
+    in_string = False
+    pos = start
+    search = _STRUCTURAL_RE.search
+    while True:
+        match = search(text, pos)
+        if match is None:
+            return -1
+        char = match.group()
+        pos = match.end()
+        if in_string:
+            if char == "\\":
+                pos += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return match.start()
+
+
+def _balanced_block(text: str, opener: str) -> Optional[str]:
+    """İlk dengeli opener bloğu ({...} veya [...]); yoksa None"""
+    start = text.find(opener)
+    while start != -1:
+        end = _match_close(text, start)
+        if end != -1:
+            return text[start:end + 1]
+        start = text.find(opener, start + 1)
+    return None
+
+
+def _repair(text: str) -> str:
+    # Her desen yalnızca ucuz bir ön kontrolden geçerse çalıştırılır
+    if "Anahtar kelimeler:" in text:
+        text = _SPLIT_KEYWORDS_RE.sub(r'\1"', text)
+    text = _TRAILING_COMMA_RE.sub(r'\1', text)
+    if '""' in text:
+        text = _DOUBLED_OPEN_QUOTE_RE.sub(r'\1"', text)
+        text = _DOUBLED_CLOSE_QUOTE_RE.sub('"', text)
+    return text
+
+
+def _loads(text: str, known_invalid: bool = False) -> Optional[Any]:
+    """Önce olduğu gibi, olmazsa onarılmış haliyle parse et"""
+    if not known_invalid:
+        try:
+            return _decoder.decode(text)
+        except ValueError:
+            pass
+    repaired = _repair(text)
+    if repaired == text:
+        return None
+    try:
+        return _decoder.decode(repaired)
+    except ValueError:
+        return None
+
+
+def _question_item(data: Any) -> Optional[Dict[str, str]]:
+    if not isinstance(data, dict):
+        return None
+    question = data.get("question")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    return {
+        "question": question.strip(),
+        "expected_answer": str(data.get("expected_answer") or "")
+    }
+
+
+class QuestionItem(BaseModel):
+    """Yapılandırılmış modda tek soru yanıtı"""
+    question: str = Field(min_length=1)
+    expected_answer: str = ""
+
+
+class QuestionBatch(BaseModel):
+    """Yapılandırılmış modda batch yanıtı"""
+    questions: List[QuestionItem]
+
+
+# OpenAI strict şeması: tüm alanlar zorunlu, ek alan yok
+_QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "expected_answer": {"type": "string"}
+    },
+    "required": ["question", "expected_answer"],
+    "additionalProperties": False
+}
+_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {"questions": {"type": "array", "items": _QUESTION_SCHEMA}},
+    "required": ["questions"],
+    "additionalProperties": False
+}
+
+
+def structured_output_enabled() -> bool:
+    return LLM_STRUCTURED_OUTPUT != "off"
+
+
+def response_format(batch: bool = False) -> Optional[Dict[str, Any]]:
+    """LLM_STRUCTURED_OUTPUT moduna göre chat completion response_format parametresi"""
+    if LLM_STRUCTURED_OUTPUT == "json_object":
+        return {"type": "json_object"}
+    if LLM_STRUCTURED_OUTPUT == "json_schema":
+        # SDK tipi yalnızca json_object'i tanımlasa da parametre olduğu gibi API'ye iletilir
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "interview_question_batch" if batch else "interview_question",
+                "strict": True,
+                "schema": _BATCH_SCHEMA if batch else _QUESTION_SCHEMA
+            }
+        }
+    return None
+
+
+def _validated_item(item: QuestionItem) -> Optional[Dict[str, str]]:
+    question = item.question.strip()
+    if not question:
+        return None
+    return {"question": question, "expected_answer": item.expected_answer}
+
+
+def parse_question(text: str, structured: bool = False) -> Optional[Dict[str, str]]:
+    """Tekil soru yanıtını {"question", "expected_answer"} olarak ayrıştır; bulunamazsa None"""
+    if structured:
+        try:
+            item = _validated_item(QuestionItem.model_validate_json(text))
+            if item:
+                return item
+        except ValidationError:
+            pass
+        logger.warning("Yapılandırılmış yanıt şemaya uymadı, onarım yoluna düşülüyor")
+
+    stripped = text.strip()
+    invalid = None
+    if stripped.startswith("{"):
+        try:
+            item = _question_item(_decoder.decode(stripped))
+            if item:
+                return item
+        except ValueError:
+            invalid = stripped
+
+    block = _balanced_block(strip_code_fences(stripped), "{")
+    if block is None:
+        return None
+    return _question_item(_loads(block, known_invalid=block == invalid))
+
+
+def _salvage_objects(text: str) -> List[Any]:
+    """Dizi parse edilemediğinde (ör. kesilmiş yanıt) tamamlanmış nesneleri tek tek topla"""
+    objects = []
+    start = text.find("{", text.find("[") + 1)
+    while start != -1:
+        end = _match_close(text, start)
+        if end == -1:
+            break
+        data = _loads(text[start:end + 1])
+        if data is not None:
+            objects.append(data)
+        start = text.find("{", end + 1)
+    return objects
+
+
+def parse_question_list(text: str, structured: bool = False) -> List[Dict[str, str]]:
+    """Batch yanıtındaki soru dizisini ayrıştır; [...] veya {"questions": [...]} kabul edilir"""
+    if structured:
+        try:
+            batch = QuestionBatch.model_validate_json(text)
+            items = [_validated_item(item) for item in batch.questions]
+            if all(items):
+                return items
+        except ValidationError:
+            pass
+        logger.warning("Yapılandırılmış batch yanıtı şemaya uymadı, onarım yoluna düşülüyor")
+
+    data = None
+    stripped = text.strip()
+    if stripped[:1] in ("[", "{"):
+        try:
+            data = _decoder.decode(stripped)
+        except ValueError:
+            pass
+
+    if data is None:
+        cleaned = strip_code_fences(stripped)
+        array_start = cleaned.find("[")
+        object_start = cleaned.find("{")
+        if object_start != -1 and (array_start == -1 or object_start < array_start):
+            block = _balanced_block(cleaned, "{")
+            data = _loads(block) if block else None
+        if data is None and array_start != -1:
+            block = _balanced_block(cleaned, "[")
+            data = _loads(block) if block else None
+        if data is None and array_start != -1:
+            data = _salvage_objects(cleaned)
+
+    if isinstance(data, dict):
+        data = data.get("questions", [])
+    if not isinstance(data, list):
+        return []
+
+    items = []
+    for entry in data:
+        item = _question_item(entry)
+        if item:
+            items.append(item)
+    return items
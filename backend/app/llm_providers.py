@@ -0,0 +1,362 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - LLM SAĞLAYICILARI
+=====================================================
+
+📋 DOSYA AMACI:
+Bu dosya, soru üretiminde kullanılan LLM arka uçlarını ortak bir arayüz
+arkasında toplar. Üretim kodu (utils.py) doğrudan OpenAI SDK'sını değil
+seçilen sağlayıcının complete() metodunu çağırır; böylece toplu işler
+ucuz/kendi sunucumuzdaki bir modele yönlendirilebilir ve tüm akış
+API anahtarı olmadan test/benchmark edilebilir.
+
+🎯 SAĞLAYICILAR:
+1. ☁️ openai:
+   - OpenAI API (OPENAI_API_KEY), rate_limiter.py bütçesi ve backoff ile
+
+2. 🖥️ local:
+   - OpenAI uyumlu herhangi bir sunucu (vLLM, Ollama, LM Studio, llama.cpp)
+   - LOCAL_LLM_BASE_URL, LOCAL_LLM_API_KEY, LOCAL_LLM_MODEL (model adını ezer)
+   - Kendi limiter'ı: LOCAL_LLM_RPM_LIMIT / LOCAL_LLM_TPM_LIMIT (varsayılan sınırsız)
+
+3. 🧪 mock:
+   - Süreç içi, deterministik sahte yanıtlar (aynı prompt → aynı soru)
+   - MOCK_LLM_LATENCY (sn), MOCK_LLM_FAILURE_RATE (0-1), MOCK_LLM_SEED
+   - Batch prompt'larında istenen sayıda elemanlı JSON dizisi döndürür
+   - Token kullanımı karakter sayısından tahmin edilir (~4 karakter/token)
+     (response_format verilmişse {"questions": [...]} nesnesi)
+
+🔧 SEÇİM:
+- Varsayılan: LLM_PROVIDER (varsayılan "openai")
+- İstek bazında: üretim endpoint'lerinde "provider" alanı
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from openai import OpenAI, RateLimitError, APIConnectionError, InternalServerError
+
+from .rate_limiter import RateLimiter, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+
+
+class LLMProvider:
+    """LLM arka uç arayüzü: mesajları alır, yanıt metnini döndürür"""
+
+    name = "base"
+
+    def complete(
+        self,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: int = 1000,
+        max_retries: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        raise NotImplementedError
+
+    def complete_with_usage(
+        self,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: int = 1000,
+        max_retries: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        complete() ile aynı, ayrıca kullanım bilgisini döndürür:
+        prompt_tokens, completion_tokens, total_tokens, retries (bilinmeyenler eksik).
+        Kullanım bildirmeyen sağlayıcılar için boş dict.
+        """
+        text = self.complete(
+            model_name, messages, temperature=temperature, max_tokens=max_tokens,
+            max_retries=max_retries, response_format=response_format
+        )
+        return text, {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name}
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI (veya OpenAI uyumlu) chat completions API'si, rate limiter üzerinden"""
+
+    def __init__(
+        self,
+        name: str = "openai",
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        limiter: RateLimiter = rate_limiter,
+        model_override: Optional[str] = None,
+        timeout: float = 60.0
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.limiter = limiter
+        self.model_override = model_override
+        # Yeniden denemeler SDK yerine limiter üzerinden yapılır (bütçe ve 429 farkındalığı için)
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+
+    def complete(
+        self,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: int = 1000,
+        max_retries: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        return self.complete_with_usage(
+            model_name, messages, temperature=temperature, max_tokens=max_tokens,
+            max_retries=max_retries, response_format=response_format
+        )[0]
+
+    def complete_with_usage(
+        self,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: int = 1000,
+        max_retries: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Chat completion çağrısını RPM/TPM bütçesine göre zamanla.
+
+        Çağrı öncesi tahmini token bütçesi ayrılır, yanıt başlıklarındaki
+        x-ratelimit-* değerleriyle limitler güncellenir ve gerçek kullanım
+        ile tahmin arasındaki fark iade edilir. 429, bağlantı/zaman aşımı ve
+        5xx hatalarında jitter'lı üstel backoff ile yeniden denenir.
+        """
+        limiter = self.limiter
+        if max_retries is None:
+            max_retries = limiter.max_retries
+        params = {"model": self.model_override or model_name, "messages": messages, "max_tokens": max_tokens}
+        if temperature is not None:
+            params["temperature"] = temperature
+        if response_format is not None:
+            params["response_format"] = response_format
+        estimated_tokens = limiter.estimate_tokens(messages, max_tokens)
+
+        attempt = 0
+        while True:
+            limiter.acquire(estimated_tokens)
+            actual_tokens = None
+            try:
+                raw_response = self.client.chat.completions.with_raw_response.create(**params)
+                limiter.update_from_headers(raw_response.headers)
+                response = raw_response.parse()
+                usage = getattr(response, "usage", None)
+                actual_tokens = getattr(usage, "total_tokens", None)
+                return response.choices[0].message.content, {
+                    "prompt_tokens": getattr(usage, "prompt_tokens", None),
+                    "completion_tokens": getattr(usage, "completion_tokens", None),
+                    "total_tokens": actual_tokens,
+                    "retries": attempt
+                }
+            except RateLimitError as e:
+                if attempt >= max_retries:
+                    raise
+                pause = limiter.on_rate_limited(e.response.headers)
+                delay = limiter.backoff_delay(attempt, minimum=pause)
+                logger.warning(f"{self.name} rate limit (429), {delay:.2f} sn sonra tekrar denenecek")
+            except (APIConnectionError, InternalServerError) as e:
+                if attempt >= max_retries:
+                    raise
+                delay = limiter.backoff_delay(attempt)
+                logger.warning(f"{self.name} geçici hata ({type(e).__name__}), {delay:.2f} sn sonra tekrar denenecek")
+            finally:
+                limiter.release(estimated_tokens, actual_tokens)
+            attempt += 1
+            limiter.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "base_url": self.base_url,
+            "model_override": self.model_override,
+            "scheduler": self.limiter.stats()
+        }
+
+
+class MockLLMError(RuntimeError):
+    """Mock sağlayıcının failure_rate ile ürettiği yapay API hatası"""
+
+
+class MockProvider(LLMProvider):
+    """
+    Süreç içi deterministik sahte LLM.
+
+    Yanıt ve hata kararı (seed, mesajlar) özetinden türetilir: aynı prompt her
+    çalıştırmada aynı soruyu döndürür veya aynı şekilde hata verir. Böylece
+    benchmark sonuçları eşzamanlılık sırasından bağımsız tekrarlanabilir.
+    """
+
+    name = "mock"
+
+    _BATCH_COUNT = re.compile(r"toplam (\d+) adet")
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _digest(self, model_name: str, messages: List[Dict[str, str]]) -> str:
+        payload = json.dumps([self.seed, model_name, messages], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def complete(
+        self,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: int = 1000,
+        max_retries: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        return self.complete_with_usage(
+            model_name, messages, temperature=temperature, max_tokens=max_tokens,
+            max_retries=max_retries, response_format=response_format
+        )[0]
+
+    def complete_with_usage(
+        self,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: int = 1000,
+        max_retries: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        digest = self._digest(model_name, messages)
+        with self._lock:
+            self.calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        if int(digest[:8], 16) / 0xFFFFFFFF < self.failure_rate:
+            with self._lock:
+                self.failures += 1
+            raise MockLLMError(f"Mock LLM yapay hata ({digest[:8]})")
+
+        prompt = (messages[-1].get("content") or "") if messages else ""
+        match = self._BATCH_COUNT.search(prompt)
+        if match:
+            items = [self._question(digest, i) for i in range(int(match.group(1)))]
+            # Yapılandırılmış modda kök dizi yerine {"questions": [...]} (json_object gibi)
+            if response_format is not None:
+                text = json.dumps({"questions": items}, ensure_ascii=False)
+            else:
+                text = json.dumps(items, ensure_ascii=False)
+        else:
+            text = json.dumps(self._question(digest, 0), ensure_ascii=False)
+        return text, self._usage(messages, text)
+
+    @staticmethod
+    def _usage(messages: List[Dict[str, str]], text: str) -> Dict[str, Any]:
+        """Karakter sayısından tahmini token kullanımı (~4 karakter/token)"""
+        prompt_tokens = sum(len(message.get("content") or "") for message in messages) // 4
+        completion_tokens = len(text) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "retries": 0
+        }
+
+    @staticmethod
+    def _question(digest: str, index: int) -> Dict[str, str]:
+        tag = f"{digest[:10]}-{index + 1}"
+        return {
+            "question": f"Mock soru {tag}: Bu konudaki deneyiminizi açıklayınız.",
+            "expected_answer": (
+                f"Adayın mock konu {tag} hakkında bilgi ve deneyim göstermesi beklenir."
+                "\n\nAnahtar kelimeler: mock, deneyim, analiz, uygulama"
+            )
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "latency": self.latency,
+                "failure_rate": self.failure_rate,
+                "seed": self.seed,
+                "calls": self.calls,
+                "failures": self.failures
+            }
+
+
+def _create_openai_provider() -> LLMProvider:
+    return OpenAIProvider(name="openai", api_key=os.getenv("OPENAI_API_KEY", "your_api_key_here"))
+
+
+def _create_local_provider() -> LLMProvider:
+    return OpenAIProvider(
+        name="local",
+        api_key=os.getenv("LOCAL_LLM_API_KEY", "not-needed"),
+        base_url=os.getenv("LOCAL_LLM_BASE_URL", "http://localhost:8000/v1"),
+        limiter=RateLimiter(
+            rpm_limit=int(os.getenv("LOCAL_LLM_RPM_LIMIT", "0")),
+            tpm_limit=int(os.getenv("LOCAL_LLM_TPM_LIMIT", "0"))
+        ),
+        model_override=os.getenv("LOCAL_LLM_MODEL") or None,
+        timeout=float(os.getenv("LOCAL_LLM_TIMEOUT", "120"))
+    )
+
+
+def _create_mock_provider() -> LLMProvider:
+    return MockProvider(
+        latency=float(os.getenv("MOCK_LLM_LATENCY", "0")),
+        failure_rate=float(os.getenv("MOCK_LLM_FAILURE_RATE", "0")),
+        seed=int(os.getenv("MOCK_LLM_SEED", "0"))
+    )
+
+
+_PROVIDER_FACTORIES: Dict[str, Callable[[], LLMProvider]] = {
+    "openai": _create_openai_provider,
+    "local": _create_local_provider,
+    "mock": _create_mock_provider
+}
+
+_providers: Dict[str, LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def available_providers() -> List[str]:
+    return sorted(set(_PROVIDER_FACTORIES) | set(_providers))
+
+
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    """İsimle (veya LLM_PROVIDER ile) sağlayıcıyı döndür; ilk kullanımda oluşturulur"""
+    key = (name or LLM_PROVIDER).lower()
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            factory = _PROVIDER_FACTORIES.get(key)
+            if factory is None:
+                raise ValueError(f"Bilinmeyen LLM sağlayıcısı: {key} (geçerli: {', '.join(available_providers())})")
+            provider = _providers[key] = factory()
+        return provider
+
+
+def register_provider(name: str, provider: LLMProvider):
+    """Sağlayıcıyı isimle kaydet/değiştir (benchmark ve özel arka uçlar için)"""
+    with _providers_lock:
+        _providers[name.lower()] = provider
@@ -35,6 +35,7 @@ GİRİŞ: İlan bilgileri, rol gereksinimleri, soru konfigürasyonları
 /api/step4/* - Soru üretimi
 /api/step5/* - Word çıktı üretimi
 /api/system/* - Sistem bilgileri
+/metrics - Prometheus metrikleri
 
 ⚠️  GÜVENLİK NOTU:
 OpenAI API anahtarı environment değişkeninde saklanmalıdır.
@@ -46,96 +47,65 @@ Production ortamında CORS ayarları gözden geçirilmelidir.
 """
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, StreamingResponse, FileResponse
-from typing import Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from docx import Document
-from docx.shared import Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 import json
 import time
 import logging
-import tempfile
 import os
-import zipfile
-import io
 import traceback
+import asyncio
+import functools
 import uvicorn
 
 # Logger ayarla
 logger = logging.getLogger(__name__)
 
 # Local imports
-from .database import engine, get_db, Base
+from .database import engine, get_db, Base, SessionLocal
+from .migrations import run_migrations, schema_lock
 from .models import Contract, Role, RoleQuestionConfig, QuestionType, Question, QuestionConfig, ContractData, SystemInfo, GenerationLog
-from .utils import generate_questions_with_4o_mini, generate_corrected_question_with_4o_mini, get_available_4o_mini_models
+from .utils import generate_questions_with_4o_mini, generate_corrected_question_with_4o_mini, get_available_4o_mini_models, planned_question_counts
+from .generation import (
+    build_role_generation_request, store_generated_questions, store_generated_question_sets,
+    load_contract_roles, load_role_questions, load_generation_context
+)
+from .jobs import GenerationJobManager
+from .llm_cache import response_cache
+from .rate_limiter import rate_limiter
+from .export import build_booklets, iter_word_zip, cached_word_zip, iter_cached_zip, ascii_name, shutdown_export_pool
+from .artifacts import artifact_store
+from .question_types import question_type_registry
+from .telemetry import telemetry, usage_summary
+from .llm_providers import LLM_PROVIDER, available_providers
+from .metrics import registry as metrics_registry, MetricsMiddleware, instrument_engine, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Veritabanı sorgu sayısı/süresi metrikleri
+instrument_engine(engine)
 
-# Zorluk seviyesi helper fonksiyonları
-def get_difficulty_level_by_multiplier(salary_multiplier: float):
-    """Maaş katsayısına göre zorluk seviyesi belirle - Profesyonel Rubrik Modeli"""
-    if salary_multiplier <= 2:
-        return {
-            "level": "2x",
-            "name": "🟢 ORTA SEVİYE UYGULAYICI",
-            "description": "2-4 yıl tecrübe - Günlük operasyonu eksiksiz yürütme, temel optimizasyon",
-            "experience_years": "2-4 yıl",
-            "focus": "K1: 30% • K2: 40% • K3: 25% • K4: 5% • K5: 0%",
-            "question_distribution": {
-                "K1_temel_bilgi": 30,
-                "K2_uygulamali": 40, 
-                "K3_hatacozumleme": 25,
-                "K4_tasarim": 5,
-                "K5_stratejik_liderlik": 0
-            }
-        }
-    elif salary_multiplier <= 3:
-        return {
-            "level": "3x",
-            "name": "🟡 KIDEMLI UZMAN", 
-            "description": "5-8 yıl tecrübe - Çapraz disiplinde hâkimiyet, mentorluk, kritik problem çözümü",
-            "experience_years": "5-8 yıl",
-            "focus": "K1: 15% • K2: 25% • K3: 35% • K4: 20% • K5: 5%",
-            "question_distribution": {
-                "K1_temel_bilgi": 15,
-                "K2_uygulamali": 25,
-                "K3_hatacozumleme": 35,
-                "K4_tasarim": 20,
-                "K5_stratejik_liderlik": 5
-            }
-        }
-    elif salary_multiplier <= 4:
-        return {
-            "level": "4x",
-            "name": "🟠 MİMAR/TEKNİK LİDER", 
-            "description": "≥10 yıl tecrübe - Strateji, büyük ölçekli mimari, metodoloji, ekip & süreç yönetimi",
-            "experience_years": "≥10 yıl", 
-            "focus": "K1: 5% • K2: 15% • K3: 25% • K4: 35% • K5: 20%",
-            "question_distribution": {
-                "K1_temel_bilgi": 5,
-                "K2_uygulamali": 15,
-                "K3_hatacozumleme": 25,
-                "K4_tasarim": 35,
-                "K5_stratejik_liderlik": 20
-            }
-        }
-    else:
-        return {
-            "level": "5x",
-            "name": "🔴 ENTERPRISE UZMAN",
-            "description": "15+ yıl tecrübe - Enterprise mimari, strategik kararlar, teknoloji liderliği", 
-            "experience_years": "15+ yıl",
-            "focus": "K1: 0% • K2: 10% • K3: 20% • K4: 40% • K5: 30%",
-            "question_distribution": {
-                "K1_temel_bilgi": 0,
-                "K2_uygulamali": 10,
-                "K3_hatacozumleme": 20,
-                "K4_tasarim": 40,
-                "K5_stratejik_liderlik": 30
-            }
-        }
+# Create tables (birden fazla worker aynı anda başlarsa şema işlemlerini tek worker yapar)
+with schema_lock(engine):
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+# Soru üretimi için ayrılmış executor - bloklayan LLM çağrıları event loop'u dondurmasın
+GENERATION_EXECUTOR_WORKERS = int(os.getenv("GENERATION_EXECUTOR_WORKERS", "4"))
+generation_executor = ThreadPoolExecutor(
+    max_workers=GENERATION_EXECUTOR_WORKERS,
+    thread_name_prefix="generation"
+)
+
+async def run_in_generation_executor(func, *args, **kwargs):
+    """Bloklayan bir fonksiyonu üretim executor'ında çalıştır ve sonucunu bekle"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(generation_executor, functools.partial(func, *args, **kwargs))
+
+# Arka plan soru üretim işleri (POST job id döndürür, durum polling ile izlenir)
+GENERATION_JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "2"))
+generation_jobs = GenerationJobManager(max_workers=GENERATION_JOB_WORKERS)
 
 # Default soru tiplerini ekle
 def create_default_question_types(db: Session):
@@ -179,6 +149,7 @@ def create_default_question_types(db: Session):
             existing.order_index = type_data["order_index"]
     
     db.commit()
+    question_type_registry.invalidate()
 
 app = FastAPI(title="Mülakat Soru Hazırlama API", version="1.0.0")
 
@@ -186,8 +157,19 @@ app = FastAPI(title="Mülakat Soru Hazırlama API", version="1.0.0")
 @app.on_event("startup")
 async def startup_event():
     db = next(get_db())
-    create_default_question_types(db)
-    db.close()
+    try:
+        # Worker'lar aynı kodlu soru tipini iki kez eklemesin
+        with schema_lock(engine):
+            create_default_question_types(db)
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    generation_executor.shutdown(wait=False, cancel_futures=True)
+    generation_jobs.shutdown()
+    shutdown_export_pool()
+    telemetry.shutdown()
 
 # CORS middleware
 app.add_middleware(
@@ -198,11 +180,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# HTTP istek sayısı/süresi metrikleri (route şablonu etiketiyle)
+app.add_middleware(MetricsMiddleware)
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "mulakat-backend"}
 
+# Prometheus scrape endpoint'i
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Süreç metriklerini Prometheus metin formatında döndür"""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Wizard Adım 1: İlan bilgilerini getir
 @app.get("/api/step1/contract/{contract_id}")
 async def get_contract(contract_id: int, db: Session = Depends(get_db)):
@@ -440,9 +431,7 @@ async def get_global_question_config(contract_id: int, db: Session = Depends(get
             db.refresh(config)
         
         # Aktif soru tiplerini de getir
-        question_types = db.query(QuestionType).filter(
-            QuestionType.is_active == True
-        ).order_by(QuestionType.order_index).all()
+        question_types = question_type_registry.active(db)
         
         return {
             "success": True,
@@ -550,23 +539,16 @@ async def get_role_question_configs(contract_id: int, db: Session = Depends(get_
             db.commit()
             db.refresh(global_config)
         
-        # Rolleri al
-        roles = db.query(Role).filter(Role.contract_id == contract_id).all()
+        # Rolleri konfigürasyonlarıyla birlikte al (rol başına ayrı sorgu yok)
+        roles = load_contract_roles(db, contract_id)
         
         # Aktif soru tiplerini al
-        question_types = db.query(QuestionType).filter(
-            QuestionType.is_active == True
-        ).order_by(QuestionType.order_index).all()
+        question_types = question_type_registry.active(db)
         
         role_configs = []
         for role in roles:
-            # Role ait konfigürasyonları al
-            configs = db.query(RoleQuestionConfig).filter(
-                RoleQuestionConfig.role_id == role.id
-            ).all()
-            
             # Konfigürasyonları soru tipine göre eşleştir
-            config_map = {config.question_type_id: config for config in configs}
+            config_map = {config.question_type_id: config for config in role.question_configs}
             
             question_type_configs = []
             for qt in question_types:
@@ -672,20 +654,65 @@ async def save_role_question_config(
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+def upsert_role_question_configs(db: Session, rows: List[Dict[str, Any]]):
+    """
+    Rol soru konfigürasyonlarını tek ifadede ekle/güncelle (commit çağıran tarafta).
+
+    SQLite ve PostgreSQL'de (role_id, question_type_id) tekil index'ine karşı
+    INSERT ... ON CONFLICT DO UPDATE executemany ile çalışır; diğer veritabanlarında
+    mevcut satırlar tek sorguda okunup ORM üzerinden güncellenir.
+    """
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(RoleQuestionConfig)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RoleQuestionConfig.role_id, RoleQuestionConfig.question_type_id],
+            set_={
+                "question_count": stmt.excluded.question_count,
+                "difficulty_level": stmt.excluded.difficulty_level,
+                "updated_at": datetime.utcnow()
+            }
+        )
+        db.execute(stmt, rows)
+        return
+
+    role_ids = {row["role_id"] for row in rows}
+    existing = {
+        (config.role_id, config.question_type_id): config
+        for config in db.query(RoleQuestionConfig).filter(RoleQuestionConfig.role_id.in_(role_ids))
+    }
+    for row in rows:
+        config = existing.get((row["role_id"], row["question_type_id"]))
+        if config:
+            config.question_count = row["question_count"]
+            config.difficulty_level = row["difficulty_level"]
+        else:
+            config = RoleQuestionConfig(**row)
+            db.add(config)
+            existing[(row["role_id"], row["question_type_id"])] = config
+
 # Wizard Adım 3: Tüm rol konfigürasyonlarını toplu kaydet
 @app.post("/api/step3/save-all-role-configs")
 async def save_all_role_configs(
     configs_data: Dict[str, Any],
     db: Session = Depends(get_db)
 ):
-    """Tüm rollerin soru konfigürasyonlarını toplu kaydet"""
+    """Tüm rollerin soru konfigürasyonlarını toplu kaydet (tek transaction)"""
 
     
     try:
         contract_id = configs_data.get("contract_id")
         role_configs = configs_data.get("role_configs", [])
         
-        saved_configs = []
+        # Aynı rol + soru tipi istekte birden fazla geçerse sonuncusu geçerli
+        rows_by_key: Dict[tuple, Dict[str, Any]] = {}
         
         for role_config in role_configs:
             role_id = role_config.get("role_id")
@@ -693,44 +720,17 @@ async def save_all_role_configs(
             
             for qt_config in question_types:
                 question_type_id = qt_config.get("question_type_id")
-                question_count = qt_config.get("question_count", 5)
-                # Zorluk seviyesi maaş katsayısına göre belirlenecek, şimdilik "Orta" default
-                difficulty_level = "Orta"
-                
-                # Mevcut konfigürasyonu kontrol et
-                existing_config = db.query(RoleQuestionConfig).filter(
-                    RoleQuestionConfig.role_id == role_id,
-                    RoleQuestionConfig.question_type_id == question_type_id
-                ).first()
-                
-                if existing_config:
-                    # Güncelle
-                    existing_config.question_count = question_count
-                    existing_config.difficulty_level = difficulty_level
-                    
-                    db.commit()
-                    db.refresh(existing_config)
-                    saved_config = existing_config
-                else:
-                    # Yeni oluştur
-                    new_config = RoleQuestionConfig(
-                        role_id=role_id,
-                        question_type_id=question_type_id,
-                        question_count=question_count,
-                        difficulty_level=difficulty_level
-                    )
-                    
-                    db.add(new_config)
-                    db.commit()
-                    db.refresh(new_config)
-                    saved_config = new_config
-                
-                saved_configs.append({
-                    "role_id": saved_config.role_id,
-                    "question_type_id": saved_config.question_type_id,
-                    "question_count": saved_config.question_count,
-                    "difficulty_level": saved_config.difficulty_level
-                })
+                rows_by_key[(role_id, question_type_id)] = {
+                    "role_id": role_id,
+                    "question_type_id": question_type_id,
+                    "question_count": qt_config.get("question_count", 5),
+                    # Zorluk seviyesi maaş katsayısına göre belirlenecek, şimdilik "Orta" default
+                    "difficulty_level": "Orta"
+                }
+        
+        saved_configs = list(rows_by_key.values())
+        upsert_role_question_configs(db, saved_configs)
+        db.commit()
         
         return {
             "success": True,
@@ -759,6 +759,10 @@ async def generate_questions_directly(
         contract_id = request_data.get("contract_id")
         model_name = request_data.get("model_name", "gpt-4o-mini")
         role_id = request_data.get("role_id")  # Tek rol için soru üretme
+        batch_sizes = request_data.get("batch_sizes")  # int veya {soru_tipi: adet} - çağrı başına soru
+        use_cache = request_data.get("use_cache", True)  # False: LLM yanıt cache'ini atla
+        incremental = request_data.get("mode") == "incremental"  # Sadece eksik/geçersiz soruları üret
+        provider = request_data.get("provider")  # openai, local, mock (varsayılan: LLM_PROVIDER)
         
         # Contract ve rolleri al
         contract = db.query(Contract).filter(Contract.id == contract_id).first()
@@ -766,152 +770,76 @@ async def generate_questions_directly(
             raise HTTPException(status_code=404, detail="İlan bulunamadı")
         
         # Eğer role_id belirtilmişse sadece o rolü al, yoksa tüm rolleri al
-        if role_id:
-            roles = db.query(Role).filter(Role.id == role_id, Role.contract_id == contract_id).all()
-        else:
-            roles = db.query(Role).filter(Role.contract_id == contract_id).all()
+        roles = load_contract_roles(db, contract_id, role_id)
         
-        all_questions = []
+        # Soru tipleri, global config (ve artımlı modda mevcut sorular) rol döngüsünden önce bir kez
+        generation_context = load_generation_context(db, contract_id, roles, incremental=incremental)
         
-        # Her rol için sorular üret
-        for role in roles:
-            # Rol konfigürasyonlarını al
-            configs = db.query(RoleQuestionConfig).filter(
-                RoleQuestionConfig.role_id == role.id
-            ).all()
-            
-            question_types = db.query(QuestionType).filter(
-                QuestionType.is_active == True
-            ).order_by(QuestionType.order_index).all()
-            
-            config_map = {config.question_type_id: config for config in configs}
-            
-            # Debug: Hesaplama bilgilerini logla
-            logger.info(f"Role: {role.name}")
-            logger.info(f"Position count: {role.position_count}")
-            logger.info(f"Configs found: {len(configs)}")
-            logger.info(f"Config map keys: {list(config_map.keys())}")
-            
-            # Soru dağılımını hesapla (Step 3'teki mantıkla aynı)
-            question_distribution = {}
-            
-            # Global config'i al
-            global_config = db.query(QuestionConfig).filter(
-                QuestionConfig.contract_id == contract_id
-            ).first()
-            
-            if global_config:
-                for qt in question_types:
-                    config = config_map.get(qt.id)
-                    
-                    if config and hasattr(config, 'question_count'):
-                        # Mevcut konfigürasyon varsa onu kullan
-                        count = config.question_count
-                    else:
-                        # Global config'e göre hesapla (Step 3'teki mantık)
-                        candidate_count = role.position_count * global_config.candidate_multiplier
-                        distribution = global_config.question_type_distribution or {}
-                        
-                        # distribution bir dict değilse default değer kullan
-                        if isinstance(distribution, dict):
-                            questions_per_candidate = distribution.get(qt.code, 1)
-                        else:
-                            questions_per_candidate = 1
-                            
-                        count = candidate_count * questions_per_candidate
-                    
-                    question_distribution[qt.code] = count
-                    logger.info(f"Question type {qt.code}: {count} questions")
-            else:
-                # Global config yoksa default değerler
-                for qt in question_types:
-                    config = config_map.get(qt.id)
-                    count = config.question_count if (config and hasattr(config, 'question_count')) else 5
-                    question_distribution[qt.code] = count
-                    logger.info(f"Question type {qt.code}: {count} questions (default)")
-            
-            # Zorluk seviyesi hesapla
-            role_difficulty = get_difficulty_level_by_multiplier(role.salary_multiplier)
-            
-            # Soru üretimi için context hazırla
-            job_context = f"""
-İLAN BAŞLIĞI: {contract.title}
-
-GENEL ŞARTLAR:
-{contract.general_requirements or "Genel şartlar belirtilmemiş"}
-
-ROL: {role.name}
-MAAŞ KATSAYISI: {role.salary_multiplier}x
-POZİSYON SAYISI: {role.position_count}
-ÖZEL ŞARTLAR:
-{role.requirements or "Özel şartlar belirtilmemiş"}
-
-ZORLUK SEVİYESİ: {role_difficulty['description']}
-"""
-            
-            # 4o mini API ile sorular üret
-            questions_result = generate_questions_with_4o_mini(
+        # Soru dağılımı, zorluk seviyesi ve context'i tüm roller için baştan hazırla (artımlı modda
+        # sadece eksikler)
+        plans = [
+            (
+                {"role_name": role.name, "role_id": role.id, "salary_multiplier": role.salary_multiplier},
+                build_role_generation_request(db, contract, role, incremental=incremental, context=generation_context)
+            )
+            for role in roles
+        ]
+        
+        # Her rol için sorular üret; veritabanına üretim sırasında değil, sonunda toplu yazılır
+        # (LLM çağrıları boyunca SQLite yazma kilidi tutulmaz, sorgu sayısı rol sayısından bağımsız)
+        generated = []
+        for role_info, generation_request in plans:
+            # 4o mini API ile sorular üret (executor'da - event loop bloklanmaz)
+            questions_result = await run_in_generation_executor(
+                generate_questions_with_4o_mini,
                 model_name=model_name,
-                job_context=job_context,
-                roles=[{
-                    "name": role.name,
-                    "salary_multiplier": role.salary_multiplier,
-                    "position_count": role.position_count,
-                    "special_requirements": role.requirements
-                }],
-                question_config={
-                    "professional_experience": question_distribution.get("professional_experience", 5),
-                    "theoretical_knowledge": question_distribution.get("theoretical_knowledge", 5),
-                    "practical_application": question_distribution.get("practical_application", 5),
-                    "difficulty_level": role_difficulty["level"]
-                }
+                job_context=generation_request["job_context"],
+                roles=generation_request["roles"],
+                question_config=generation_request["question_config"],
+                batch_sizes=batch_sizes,
+                use_cache=use_cache,
+                start_numbers=generation_request["start_numbers"],
+                provider=provider,
+                usage_tags=generation_request["usage_tags"]
             )
-            
+            generated.append((role_info, generation_request, questions_result))
+        
+        # Başarılı rollerin sorularını tek transaction'da kaydet (tam mod: eskileri sil;
+        # artımlı mod: sadece geçersiz/fazla olanları sil)
+        stored = store_generated_question_sets(db, contract_id, model_name, [
+            (role_info["role_id"], generation_request, questions_result["questions"])
+            for role_info, generation_request, questions_result in generated
+            if questions_result["success"]
+        ])
+        db.commit()
+        
+        all_questions = []
+        for role_info, generation_request, questions_result in generated:
             if questions_result["success"]:
-                # ÖNCE ESKİ SORULARI SİL (Bug Fix!)
-                db.query(Question).filter(
-                    Question.role_id == role.id,
-                    Question.contract_id == contract_id
-                ).delete()
-                
-                # Soruları veritabanına kaydet
-                questions = questions_result["questions"]
-                for question_type, question_list in questions.items():
-                    for q in question_list:
-                        new_question = Question(
-                            role_id=role.id,
-                            contract_id=contract_id,
-                            question_text=q["question"],
-                            question_type=question_type,
-                            difficulty=q["difficulty"],
-                            expected_answer=q.get("expected_answer", ""),
-                            scoring_criteria=q.get("scoring_criteria", ""),
-                            llm_model=model_name
-                        )
-                        db.add(new_question)
-                
-                all_questions.append({
-                    "role_name": role.name,
-                    "role_id": role.id,
-                    "salary_multiplier": role.salary_multiplier,
-                    "questions": questions,
-                    "difficulty_info": role_difficulty,
+                role_result = {
+                    **role_info,
+                    "questions": stored[role_info["role_id"]],
+                    "difficulty_info": generation_request["role_difficulty"],
                     "model_used": model_name,
                     "gpu_used": questions_result.get("gpu_used", False)
-                })
+                }
+                incremental_plan = generation_request["incremental_plan"]
+                if incremental_plan:
+                    role_result["incremental"] = {
+                        "kept": sum(incremental_plan["kept"].values()),
+                        "generated": sum(len(q_list) for q_list in questions_result["questions"].values()),
+                        "deleted": len(incremental_plan["delete_ids"])
+                    }
+                all_questions.append(role_result)
             else:
                 # Hata durumunda
                 all_questions.append({
-                    "role_name": role.name,
-                    "role_id": role.id,
-                    "salary_multiplier": role.salary_multiplier,
+                    **role_info,
                     "error": questions_result.get("error", "Soru üretiminde hata"),
                     "model_used": model_name,
                     "gpu_used": questions_result.get("gpu_used", False)
                 })
         
-        db.commit()
-        
         return {
             "success": True,
             "questions": all_questions,
@@ -924,6 +852,228 @@ ZORLUK SEVİYESİ: {role_difficulty['description']}
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Wizard Adım 4: Streaming soru üretimi (her soru üretildiği anda gönderilir, rol bitince kaydedilir)
+def _format_stream_event(event: str, data: Dict[str, Any], stream_format: str) -> str:
+    """Olayı NDJSON satırı veya Server-Sent Events bloğu olarak biçimlendir"""
+    payload = json.dumps({"event": event, **data}, ensure_ascii=False, default=str)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+@app.post("/api/step4/generate-questions/stream")
+async def generate_questions_stream(
+    request_data: Dict[str, Any],
+    db: Session = Depends(get_db)
+):
+    """
+    Soruları üretildikçe NDJSON (varsayılan) veya SSE (format="sse") olarak akıt.
+    
+    Her soru LLM çağrısı döner dönmez istemciye gönderilir. Rolün soruları rol
+    tamamlanınca tek transaction'da (eski soruların silinmesiyle birlikte) ve
+    üretim sırasıyla kaydedilir; bağlantı koparsa veya üretim hata verirse rolün
+    mevcut soruları olduğu gibi kalır. Kayıt executor'da yapılır, event loop bloklanmaz.
+    Olaylar: role_started, question, role_completed, role_failed, done.
+    """
+    try:
+        contract_id = request_data.get("contract_id")
+        model_name = request_data.get("model_name", "gpt-4o-mini")
+        role_id = request_data.get("role_id")  # Tek rol için soru üretme
+        batch_sizes = request_data.get("batch_sizes")  # int veya {soru_tipi: adet} - çağrı başına soru
+        use_cache = request_data.get("use_cache", True)  # False: LLM yanıt cache'ini atla
+        incremental = request_data.get("mode") == "incremental"  # Sadece eksik/geçersiz soruları üret
+        provider = request_data.get("provider")  # openai, local, mock (varsayılan: LLM_PROVIDER)
+        stream_format = "sse" if request_data.get("format") == "sse" else "ndjson"
+        
+        if provider and provider.lower() not in available_providers():
+            raise HTTPException(status_code=400, detail=f"Bilinmeyen LLM sağlayıcısı: {provider}")
+        
+        contract = db.query(Contract).filter(Contract.id == contract_id).first()
+        if not contract:
+            raise HTTPException(status_code=404, detail="İlan bulunamadı")
+        
+        roles = load_contract_roles(db, contract_id, role_id)
+        generation_context = load_generation_context(db, contract_id, roles, incremental=incremental)
+        
+        # Rol planlarını istek session'ı kapanmadan hazırla
+        plans = [
+            (role.id, role.name, build_role_generation_request(
+                db, contract, role, incremental=incremental, context=generation_context
+            ))
+            for role in roles
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    def persist_role(stream_db, plan_role_id, generation_request, questions):
+        """Rolün sorularını kaydet (tam mod: eskileri sil; artımlı mod: sadece geçersiz/fazla olanları sil)"""
+        store_generated_questions(
+            stream_db, contract_id, plan_role_id, model_name, generation_request, questions
+        )
+        stream_db.commit()
+    
+    async def event_stream():
+        stream_db = SessionLocal()
+        started = time.time()
+        total_questions = 0
+        try:
+            for plan_role_id, role_name, generation_request in plans:
+                yield _format_stream_event("role_started", {
+                    "role_id": plan_role_id,
+                    "role_name": role_name,
+                    "planned": {
+                        question_type: count
+                        for question_type, _, count in planned_question_counts(generation_request["question_config"])
+                    }
+                }, stream_format)
+                
+                loop = asyncio.get_running_loop()
+                queue: asyncio.Queue = asyncio.Queue()
+                
+                def on_question(question_type, index, question):
+                    loop.call_soon_threadsafe(queue.put_nowait, (question_type, index, question))
+                
+                generation = asyncio.ensure_future(run_in_generation_executor(
+                    generate_questions_with_4o_mini,
+                    model_name=model_name,
+                    job_context=generation_request["job_context"],
+                    roles=generation_request["roles"],
+                    question_config=generation_request["question_config"],
+                    batch_sizes=batch_sizes,
+                    use_cache=use_cache,
+                    start_numbers=generation_request["start_numbers"],
+                    question_callback=on_question,
+                    provider=provider,
+                    usage_tags=generation_request["usage_tags"]
+                ))
+                # Tüm soru callback'leri, üretim bitiş callback'inden önce kuyruğa girer
+                generation.add_done_callback(lambda _: queue.put_nowait(None))
+                
+                role_count = 0
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    question_type, index, question = item
+                    role_count += 1
+                    
+                    yield _format_stream_event("question", {
+                        "role_id": plan_role_id,
+                        "question_type": question_type,
+                        "index": index,
+                        "question": question["question"],
+                        "expected_answer": question.get("expected_answer", ""),
+                        "difficulty": question.get("difficulty"),
+                        "api_error": "api_error" in question
+                    }, stream_format)
+                
+                result = generation.result()
+                if result["success"]:
+                    # Tek transaction, tek toplu INSERT - bağlantı bu noktadan önce koparsa hiçbir şey silinmez
+                    await loop.run_in_executor(
+                        None, persist_role, stream_db, plan_role_id, generation_request, result["questions"]
+                    )
+                    total_questions += role_count
+                    yield _format_stream_event("role_completed", {
+                        "role_id": plan_role_id,
+                        "role_name": role_name,
+                        "generated": role_count
+                    }, stream_format)
+                else:
+                    yield _format_stream_event("role_failed", {
+                        "role_id": plan_role_id,
+                        "role_name": role_name,
+                        "error": result.get("error", "Soru üretiminde hata")
+                    }, stream_format)
+            
+            yield _format_stream_event("done", {
+                "total_roles": len(plans),
+                "total_questions": total_questions,
+                "elapsed_seconds": round(time.time() - started, 2),
+                "model_used": model_name
+            }, stream_format)
+        
+        except Exception as e:
+            logger.error(f"Streaming soru üretimi hatası: {str(e)}")
+            stream_db.rollback()
+            yield _format_stream_event("error", {"error": str(e)}, stream_format)
+        finally:
+            stream_db.close()
+    
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        event_stream(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Wizard Adım 4: Arka plan üretim işleri (uzun üretimler HTTP timeout'una takılmasın)
+@app.post("/api/step4/generation-jobs")
+async def create_generation_job(
+    request_data: Dict[str, Any],
+    db: Session = Depends(get_db)
+):
+    """Soru üretimini arka plan işi olarak kuyruğa al, job id'yi hemen döndür"""
+    try:
+        contract_id = request_data.get("contract_id")
+        model_name = request_data.get("model_name", "gpt-4o-mini")
+        role_id = request_data.get("role_id")  # Tek rol için soru üretme
+        batch_sizes = request_data.get("batch_sizes")  # int veya {soru_tipi: adet} - çağrı başına soru
+        use_cache = request_data.get("use_cache", True)  # False: LLM yanıt cache'ini atla
+        incremental = request_data.get("mode") == "incremental"  # Sadece eksik/geçersiz soruları üret
+        provider = request_data.get("provider")  # openai, local, mock (varsayılan: LLM_PROVIDER)
+        
+        if provider and provider.lower() not in available_providers():
+            raise HTTPException(status_code=400, detail=f"Bilinmeyen LLM sağlayıcısı: {provider}")
+        
+        contract = db.query(Contract).filter(Contract.id == contract_id).first()
+        if not contract:
+            raise HTTPException(status_code=404, detail="İlan bulunamadı")
+        
+        job = generation_jobs.submit(
+            contract_id=contract_id,
+            model_name=model_name,
+            role_id=role_id,
+            batch_sizes=batch_sizes,
+            use_cache=use_cache,
+            incremental=incremental,
+            provider=provider
+        )
+        
+        return {
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
+            "message": "Soru üretimi kuyruğa alındı"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/step4/generation-jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """Arka plan üretim işinin durumunu ve rol/tip bazında ilerlemesini getir"""
+    job = generation_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Üretim işi bulunamadı")
+    
+    return {
+        "success": True,
+        "job": job.to_dict()
+    }
+
+@app.get("/api/step4/generation-jobs")
+async def list_generation_jobs(contract_id: Optional[int] = None):
+    """Bilinen üretim işlerini listele (contract_id ile filtrelenebilir)"""
+    return {
+        "success": True,
+        "jobs": [job.to_dict() for job in generation_jobs.list(contract_id=contract_id)]
+    }
+
 # Soruları görüntüle
 @app.post("/api/step4/regenerate-single-question")
 async def regenerate_single_question(
@@ -941,6 +1091,7 @@ async def regenerate_single_question(
         question_index = request_data.get("question_index")
         correction_instruction = request_data.get("correction_instruction")
         model_name = request_data.get("model_name", "gpt-4o-mini")
+        provider = request_data.get("provider")  # openai, local, mock (varsayılan: LLM_PROVIDER)
         
         if not all([contract_id, role_id, question_type, question_index is not None, correction_instruction]):
             raise HTTPException(status_code=400, detail="Tüm parametreler gerekli")
@@ -980,13 +1131,16 @@ POZİSYON SAYISI: {role.position_count}
 {role.requirements or "Özel şartlar belirtilmemiş"}
 """
         
-        # Düzeltilmiş soruyu üret
-        result = generate_corrected_question_with_4o_mini(
+        # Düzeltilmiş soruyu üret (executor'da - event loop bloklanmaz)
+        result = await run_in_generation_executor(
+            generate_corrected_question_with_4o_mini,
             model_name=model_name,
             original_question=original_question.question_text,
             correction_instruction=correction_instruction,
             job_context=job_context,
-            question_type=question_type
+            question_type=question_type,
+            provider=provider,
+            usage_tags={"contract_id": contract_id, "role_id": role_id}
         )
         
         if not result["success"]:
@@ -1032,14 +1186,13 @@ async def get_generated_questions(
         # Rolleri al
         roles = db.query(Role).filter(Role.contract_id == contract_id).all()
         
+        # Tüm rollerin soruları tek sorguda, role göre gruplanmış
+        role_questions = load_role_questions(db, contract_id, [role.id for role in roles])
+        
         questions_by_role = []
         
         for role in roles:
-            # Bu role ait soruları al
-            questions = db.query(Question).filter(
-                Question.role_id == role.id,
-                Question.contract_id == contract_id
-            ).all()
+            questions = role_questions[role.id]
             
             # Soruları tipine göre grupla
             questions_by_type = {
@@ -1080,22 +1233,11 @@ async def get_generated_questions(
 async def get_question_types(db: Session = Depends(get_db)):
     """Aktif soru tiplerini getir"""
     try:
-        question_types = db.query(QuestionType).filter(
-            QuestionType.is_active == True
-        ).order_by(QuestionType.order_index).all()
+        question_types = question_type_registry.active(db)
         
         return {
             "success": True,
-            "question_types": [
-                {
-                    "id": qt.id,
-                    "name": qt.name,
-                    "description": qt.description,
-                    "code": qt.code,
-                    "order_index": qt.order_index
-                }
-                for qt in question_types
-            ]
+            "question_types": [qt.to_dict() for qt in question_types]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1125,6 +1267,7 @@ async def create_question_type(
         db.add(new_question_type)
         db.commit()
         db.refresh(new_question_type)
+        question_type_registry.invalidate()
         
         return {
             "success": True,
@@ -1170,6 +1313,7 @@ async def update_question_type(
         
         db.commit()
         db.refresh(question_type)
+        question_type_registry.invalidate()
         
         return {
             "success": True,
@@ -1207,11 +1351,13 @@ async def delete_question_type(
             # Soft delete - sadece deaktif et
             question_type.is_active = False
             db.commit()
+            question_type_registry.invalidate()
             return {"success": True, "message": "Soru tipi deaktif edildi"}
         else:
             # Hard delete - tamamen sil
             db.delete(question_type)
             db.commit()
+            question_type_registry.invalidate()
             return {"success": True, "message": "Soru tipi silindi"}
             
     except Exception as e:
@@ -1236,6 +1382,98 @@ async def get_4o_mini_models():
             "models": []
         }
 
+@app.get("/api/system/llm-cache")
+async def get_llm_cache_stats():
+    """LLM yanıt cache'inin hit/miss sayaçlarını ve kayıt sayısını getir"""
+    return {
+        "success": True,
+        "cache": response_cache.stats()
+    }
+
+@app.delete("/api/system/llm-cache")
+async def clear_llm_cache():
+    """LLM yanıt cache'ini temizle"""
+    try:
+        deleted = response_cache.clear()
+        return {
+            "success": True,
+            "message": f"{deleted} cache kaydı silindi"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/system/telemetry")
+async def get_telemetry_stats():
+    """LLM çağrı telemetrisi tamponunun kayıt/yazma/düşürme sayaçlarını getir"""
+    return {
+        "success": True,
+        "telemetry": telemetry.stats()
+    }
+
+@app.get("/api/telemetry/usage")
+async def get_llm_usage(
+    group_by: str = "contract",
+    contract_id: Optional[int] = None,
+    since_hours: Optional[float] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    LLM token, maliyet ve gecikme (p50/p95) özetini getir.
+
+    group_by: contract, role, question_type, model, provider veya call_kind.
+    contract_id ile tek ilana, since_hours ile son N saate daraltılır.
+    """
+    try:
+        # Tampondaki son çağrılar da rapora girsin
+        telemetry.flush()
+        since = datetime.utcnow() - timedelta(hours=since_hours) if since_hours else None
+        summary = usage_summary(db, group_by=group_by, contract_id=contract_id, since=since)
+        return {
+            "success": True,
+            **summary
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/system/export-cache")
+async def get_export_cache_stats():
+    """Word/ZIP artifact deposunun hit/miss sayaçlarını ve disk kullanımını getir"""
+    return {
+        "success": True,
+        "cache": artifact_store.stats()
+    }
+
+@app.delete("/api/system/export-cache")
+async def clear_export_cache():
+    """Word/ZIP artifact deposunu temizle"""
+    try:
+        deleted = artifact_store.clear()
+        return {
+            "success": True,
+            "message": f"{deleted} artifact silindi"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/system/llm-providers")
+async def get_llm_providers():
+    """Kullanılabilir LLM sağlayıcılarını ve varsayılanı getir"""
+    return {
+        "success": True,
+        "default": LLM_PROVIDER,
+        "providers": available_providers()
+    }
+
+@app.get("/api/system/llm-scheduler")
+async def get_llm_scheduler_stats():
+    """LLM rate limiter durumunu getir (bütçe, kuyruk derinliği, throttle süresi, 429 sayısı)"""
+    return {
+        "success": True,
+        "scheduler": rate_limiter.stats()
+    }
+
 # Word dosyası oluşturma endpoint'i
 
 
@@ -1269,136 +1507,44 @@ async def generate_word_document(
             roles = db.query(Role).filter(Role.contract_id == contract_id).all()
         logger.info(f"Roller bulundu: {len(roles)} adet")
         
-        # ZIP dosyası oluştur
-        import zipfile
-        import io
-        
-        zip_buffer = io.BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Her rol için dosyaları oluştur
-            for role in roles:
-                logger.info(f"Rol işleniyor: {role.name}")
-                
-                # Bu role ait soruları al
-                questions = db.query(Question).filter(
-                    Question.role_id == role.id,
-                    Question.contract_id == contract_id
-                ).all()
-                logger.info(f"Rol {role.name} için {len(questions)} soru bulundu")
-                
-                # Soruları türlerine göre grupla
-                questions_by_type = {}
-                for q in questions:
-                    if q.question_type not in questions_by_type:
-                        questions_by_type[q.question_type] = []
-                    questions_by_type[q.question_type].append(q)
-                
-                # Tür isimleri
-                type_names = {
-                    'professional_experience': 'Mesleki Deneyim Soruları',
-                    'theoretical_knowledge': 'Teorik Bilgi Soruları',
-                    'practical_application': 'Pratik Uygulama Soruları'
-                }
-                
-                # Her aday için soru dosyası oluştur
-                max_questions_per_type = max(len(q_list) for q_list in questions_by_type.values()) if questions_by_type else 0
-                logger.info(f"Maksimum soru sayısı: {max_questions_per_type}")
-                
-                for candidate_num in range(1, max_questions_per_type + 1):
-                    logger.info(f"Aday {candidate_num} için dosyalar oluşturuluyor...")
-                    
-                    # Soru dosyası (S) - Sadece sorular
-                    doc_s = Document()
-                    title_s = doc_s.add_heading('MÜLAKAT SORULARI', 0)
-                    title_s.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    
-                    # Contract bilgileri
-                    doc_s.add_heading('İlan Bilgileri', level=1)
-                    doc_s.add_paragraph(f'İlan Adı: {contract.title}')
-                    doc_s.add_paragraph(f'Oluşturulma Tarihi: {contract.created_at.strftime("%d.%m.%Y") if contract.created_at else "Belirtilmemiş"}')
-                    doc_s.add_paragraph(f'Pozisyon: {role.name} ({int(role.salary_multiplier)}x)')
-                    doc_s.add_paragraph(f'Aday No: {candidate_num}')
-                    doc_s.add_paragraph()
-                    
-                    # Bu aday için soruları ekle
-                    role_title = f"{role.name} (Aylık brüt sözleşme ücret tavanının {int(role.salary_multiplier)} katına kadar)"
-                    doc_s.add_heading(role_title, level=2)
-                    
-                    for q_type, q_list in questions_by_type.items():
-                        if len(q_list) >= candidate_num:
-                            doc_s.add_heading(type_names.get(q_type, q_type), level=3)
-                            question = q_list[candidate_num - 1]  # 0-indexed
-                            p = doc_s.add_paragraph()
-                            p.add_run(f'1. ').bold = True
-                            p.add_run(question.question_text)
-                            doc_s.add_paragraph()
-                    
-                    # Türkçe karakterleri temizle
-                    safe_role_name = role.name.replace("Ş", "S").replace("Ç", "C").replace("Ğ", "G").replace("İ", "I").replace("Ö", "O").replace("Ü", "U").replace("ş", "s").replace("ç", "c").replace("ğ", "g").replace("ı", "i").replace("ö", "o").replace("ü", "u")
-                    
-                    # Soru dosyasını ZIP'e ekle
-                    s_filename = f"{safe_role_name} {int(role.salary_multiplier)}x S{candidate_num}.docx"
-                    s_buffer = io.BytesIO()
-                    doc_s.save(s_buffer)
-                    s_buffer.seek(0)
-                    zip_file.writestr(s_filename, s_buffer.getvalue())
-                    logger.info(f"Soru dosyası eklendi: {s_filename}")
-                    
-                    # Cevap dosyası (C) - Sorular ve cevaplar
-                    doc_c = Document()
-                    title_c = doc_c.add_heading('MÜLAKAT SORULARI VE CEVAPLARI', 0)
-                    title_c.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    
-                    # Contract bilgileri
-                    doc_c.add_heading('İlan Bilgileri', level=1)
-                    doc_c.add_paragraph(f'İlan Adı: {contract.title}')
-                    doc_c.add_paragraph(f'Oluşturulma Tarihi: {contract.created_at.strftime("%d.%m.%Y") if contract.created_at else "Belirtilmemiş"}')
-                    doc_c.add_paragraph(f'Pozisyon: {role.name} ({int(role.salary_multiplier)}x)')
-                    doc_c.add_paragraph(f'Aday No: {candidate_num}')
-                    doc_c.add_paragraph()
-                    
-                    # Bu aday için soruları ve cevapları ekle
-                    doc_c.add_heading(role_title, level=2)
-                    
-                    for q_type, q_list in questions_by_type.items():
-                        if len(q_list) >= candidate_num:
-                            doc_c.add_heading(type_names.get(q_type, q_type), level=3)
-                            question = q_list[candidate_num - 1]  # 0-indexed
-                            p = doc_c.add_paragraph()
-                            p.add_run(f'1. ').bold = True
-                            p.add_run(question.question_text)
-                            if question.expected_answer:
-                                answer_para = doc_c.add_paragraph()
-                                answer_para.add_run('Beklenen Cevap: ').bold = True
-                                answer_para.add_run(question.expected_answer)
-                            doc_c.add_paragraph()
-                    
-                    # Cevap dosyasını ZIP'e ekle
-                    c_filename = f"{safe_role_name} {int(role.salary_multiplier)}x C{candidate_num}.docx"
-                    c_buffer = io.BytesIO()
-                    doc_c.save(c_buffer)
-                    c_buffer.seek(0)
-                    zip_file.writestr(c_filename, c_buffer.getvalue())
-                    logger.info(f"Cevap dosyası eklendi: {c_filename}")
+        if not roles:
+            raise HTTPException(status_code=404, detail="Rol bulunamadı")
         
-        # ZIP buffer'ı hazırla
-        zip_buffer.seek(0)
+        # Kitapçık payload'larını hazırla; render ve ZIP yazımı akış sırasında yapılır
+        booklets = build_booklets(db, contract, roles)
         
-        logger.info("ZIP dosyası oluşturuldu, Response döndürülüyor...")
+        logger.info(f"{len(booklets)} aday kitapçığı hazır, ZIP akışı başlatılıyor...")
         
         # ZIP dosyası ismi için rol adını temizle
-        safe_role_name_zip = role.name.replace(" ", "_").replace("Ş", "S").replace("Ç", "C").replace("Ğ", "G").replace("İ", "I").replace("Ö", "O").replace("Ü", "U").replace("ş", "s").replace("ç", "c").replace("ğ", "g").replace("ı", "i").replace("ö", "o").replace("ü", "u")
+        role = roles[-1]
+        safe_role_name_zip = ascii_name(role.name.replace(" ", "_"))
+        
+        content_disposition = f'attachment; filename="{safe_role_name_zip}_{int(role.salary_multiplier)}x.zip"'
+        
+        # İçerik değişmediyse daha önce üretilmiş ZIP'i diskten gönder (dosya şimdi açılır;
+        # gönderim sırasında tahliye edilse de açık handle'dan okunmaya devam eder)
+        cache_key, cached_zip = cached_word_zip(booklets)
+        if cached_zip:
+            logger.info(f"ZIP export cache'ten gönderiliyor: {cache_key[:12]}")
+            return StreamingResponse(
+                iter_cached_zip(cached_zip),
+                media_type='application/zip',
+                headers={
+                    'Content-Disposition': content_disposition,
+                    'Content-Length': str(os.fstat(cached_zip.fileno()).st_size),
+                    'X-Export-Cache': 'hit'
+                }
+            )
         
-        # ZIP dosyasını döndür
-        return Response(
-            content=zip_buffer.getvalue(),
+        # ZIP dosyasını akıt (senkron generator Starlette tarafından threadpool'da tüketilir)
+        return StreamingResponse(
+            iter_word_zip(booklets, cache_key=cache_key),
             media_type='application/zip',
-            headers={
-                'Content-Disposition': f'attachment; filename="{safe_role_name_zip}_{int(role.salary_multiplier)}x.zip"'
-            }
+            headers={'Content-Disposition': content_disposition, 'X-Export-Cache': 'miss'}
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Word dosyaları oluşturma hatası: {str(e)}")
         logger.error(f"Hata detayı: {type(e).__name__}")
@@ -0,0 +1,362 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - PROMETHEUS METRİKLERİ
+=========================================================
+
+📋 DOSYA AMACI:
+Bu dosya, uygulamanın işletim metriklerini süreç içinde toplayan ve
+GET /metrics üzerinden Prometheus metin formatında (0.0.4) sunan hafif
+bir metrik kaydını içerir. Harici paket gerekmez; herhangi bir Prometheus
+sunucusu (veya curl) endpoint'i doğrudan okuyabilir.
+
+🎯 METRİKLER:
+1. 🌐 HTTP (MetricsMiddleware - saf ASGI):
+   - http_requests_total{method, route, status}
+   - http_request_duration_seconds{method, route} (akış yanıtlarında son byte'a kadar)
+   - http_requests_in_progress
+   - route, eşleşen yol şablonudur (/api/step2/roles/{contract_id}); eşleşmeyenler "unmatched"
+
+2. 🤖 ÜRETİM / LLM (telemetry.record_llm_call ve utils):
+   - generations_in_progress: devam eden generate_questions_with_4o_mini çağrıları
+   - llm_calls_total{provider, call_kind, outcome}: success, error, cache_hit
+   - llm_call_duration_seconds{provider, call_kind}: cache hit'ler hariç
+   - llm_tokens_total{provider, type}: prompt, completion
+
+3. 🚦 LLM ZAMANLAYICI (rate_limiter.stats(), scrape anında okunur):
+   - llm_scheduler_queue_depth, llm_scheduler_in_flight, llm_scheduler_paused_seconds
+   - llm_scheduler_available_requests, llm_scheduler_available_tokens (limit yoksa boş)
+   - llm_scheduler_calls_total, llm_scheduler_throttled_calls_total,
+     llm_scheduler_throttle_seconds_total, llm_scheduler_rate_limited_responses_total,
+     llm_scheduler_retries_total
+
+4. 🗄️ VERİTABANI (SQLAlchemy cursor event'leri):
+   - db_queries_total{operation}, db_query_duration_seconds{operation}
+   - operation: SELECT, INSERT, UPDATE, DELETE, diğerleri OTHER
+
+5. 📄 DIŞA AKTARIM (export.py):
+   - export_booklet_render_seconds: kitapçık başına render süresi (havuz işçisinde ölçülür)
+   - export_booklets_total{source}: rendered, cached
+   - export_zip_duration_seconds: tamamlanan ZIP akışlarının süresi
+
+⚠️ NOT:
+- Değerler süreç başınadır; birden fazla uvicorn worker'ında her worker ayrı
+  scrape edilir veya Prometheus tarafında toplanır
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple, Callable, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .rate_limiter import rate_limiter
+
+# Starlette text/* yanıtlarına "; charset=utf-8" ekler
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Saniye cinsinden varsayılan histogram sınırları
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Etiketli metrik tabanı: değerler etiket değerleri tuple'ına göre tutulur"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [kova sayaçları (kümülatif değil), toplam, adet]
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class StatsCollector:
+    """
+    Kendi sayaçlarını tutan bir bileşenin stats() sözlüğünü scrape anında metriğe çevirir.
+
+    metrics: (metrik adı, tip, stats anahtarı, açıklama) dörtlüleri; değeri None
+    olan anahtarlar (ör. sınırsız bütçe) örneksiz yazılır.
+    """
+
+    def __init__(self, stats: Callable[[], Dict[str, Any]], metrics: Tuple[Tuple[str, str, str, str], ...]):
+        self.stats = stats
+        self.metrics = metrics
+
+    def render(self) -> str:
+        stats = self.stats()
+        lines = []
+        for name, type_name, key, documentation in self.metrics:
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {type_name}"]
+            value = stats.get(key)
+            if value is not None:
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """Kayıtlı metrikleri Prometheus metin formatında sunar"""
+
+    def __init__(self):
+        self._metrics: List[Union[_Metric, StatsCollector]] = []
+
+    def register(self, metric: Union[_Metric, StatsCollector]) -> Union[_Metric, StatsCollector]:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+process_start_time = registry.register(Gauge(
+    "process_start_time_seconds", "Sürecin başlangıç zamanı (unix saniye)"
+))
+process_start_time.set(time.time())
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP istek sayısı", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP istek süresi (yanıtın son byte'ına kadar)", ("method", "route")
+))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "İşlenmekte olan HTTP istekleri"
+))
+
+generations_in_progress = registry.register(Gauge(
+    "generations_in_progress", "Devam eden soru üretimleri (rol başına bir üretim çağrısı)"
+))
+llm_calls_total = registry.register(Counter(
+    "llm_calls_total", "LLM çağrıları (outcome: success, error, cache_hit)", ("provider", "call_kind", "outcome")
+))
+llm_call_duration = registry.register(Histogram(
+    "llm_call_duration_seconds", "LLM çağrı süresi (yeniden denemeler dahil, cache hit hariç)", ("provider", "call_kind")
+))
+llm_tokens_total = registry.register(Counter(
+    "llm_tokens_total", "Sağlayıcının bildirdiği token kullanımı", ("provider", "type")
+))
+
+# OpenAI çağrılarının paylaştığı zamanlayıcı (/api/system/llm-scheduler ile aynı kaynak)
+registry.register(StatsCollector(rate_limiter.stats, (
+    ("llm_scheduler_queue_depth", "gauge", "queue_depth", "Bütçe bekleyen LLM çağrıları"),
+    ("llm_scheduler_in_flight", "gauge", "in_flight", "Uçuştaki LLM çağrıları"),
+    ("llm_scheduler_paused_seconds", "gauge", "paused_for_seconds", "429 sonrası kalan toplu bekleme süresi"),
+    ("llm_scheduler_available_requests", "gauge", "available_requests", "Kovadaki kalan istek bütçesi (RPM)"),
+    ("llm_scheduler_available_tokens", "gauge", "available_tokens", "Kovadaki kalan token bütçesi (TPM)"),
+    ("llm_scheduler_calls_total", "counter", "total_calls", "Zamanlayıcıdan geçen çağrılar (yeniden denemeler dahil)"),
+    ("llm_scheduler_throttled_calls_total", "counter", "throttled_calls", "Bütçe için beklemek zorunda kalan çağrılar"),
+    ("llm_scheduler_throttle_seconds_total", "counter", "total_throttle_seconds", "Bütçe beklemesinde geçen toplam süre"),
+    ("llm_scheduler_rate_limited_responses_total", "counter", "rate_limited_responses", "Sunucudan alınan 429 yanıtları"),
+    ("llm_scheduler_retries_total", "counter", "retries", "Backoff ile yapılan yeniden denemeler")
+)))
+
+db_queries_total = registry.register(Counter(
+    "db_queries_total", "Veritabanı sorgu sayısı", ("operation",)
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Veritabanı sorgu süresi", ("operation",), buckets=DB_BUCKETS
+))
+
+export_booklet_render = registry.register(Histogram(
+    "export_booklet_render_seconds", "Aday kitapçığı (soru + cevap .docx) render süresi"
+))
+export_booklets_total = registry.register(Counter(
+    "export_booklets_total", "Dışa aktarılan kitapçıklar (source: rendered, cached)", ("source",)
+))
+export_zip_duration = registry.register(Histogram(
+    "export_zip_duration_seconds", "Tamamlanan ZIP akışlarının süresi"
+))
+
+
+def observe_llm_call(
+    provider: Optional[str],
+    call_kind: str,
+    latency: float,
+    usage: Optional[Dict[str, Any]],
+    cache_hit: bool,
+    status: str
+):
+    """telemetry.record_llm_call'dan çağrılır: LLM sayaç/histogramlarını güncelle"""
+    provider = provider or "unknown"
+    if cache_hit:
+        llm_calls_total.inc(provider=provider, call_kind=call_kind, outcome="cache_hit")
+        return
+    outcome = "success" if status == "success" else "error"
+    llm_calls_total.inc(provider=provider, call_kind=call_kind, outcome=outcome)
+    llm_call_duration.observe(latency, provider=provider, call_kind=call_kind)
+    if usage:
+        if usage.get("prompt_tokens"):
+            llm_tokens_total.inc(usage["prompt_tokens"], provider=provider, type="prompt")
+        if usage.get("completion_tokens"):
+            llm_tokens_total.inc(usage["completion_tokens"], provider=provider, type="completion")
+
+
+_DB_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+def instrument_engine(engine: Engine):
+    """Engine'e sorgu sayısı/süresi event'lerini bağla (executemany tek sorgu sayılır)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        operation = statement.lstrip()[:6].upper()
+        if operation not in _DB_OPERATIONS:
+            operation = "OTHER"
+        db_queries_total.inc(operation=operation)
+        db_query_duration.observe(elapsed, operation=operation)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # Hata alan sorgunun başlangıç zamanı yığında kalmasın
+        connection = context.connection
+        if connection is not None:
+            starts = connection.info.get("metrics_query_start")
+            if starts:
+                starts.pop()
+
+
+class MetricsMiddleware:
+    """HTTP istek sayısı/süresi için saf ASGI middleware (akış yanıtlarını da kapsar)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress.dec()
+            # Router eşleşen route'u scope'a yazar; yol şablonu etiket sayısını sınırlar
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_requests_total.inc(method=method, route=route_path, status=str(status_code))
+            http_request_duration.observe(time.perf_counter() - started, method=method, route=route_path)
@@ -0,0 +1,209 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - ŞEMA MİGRASYONLARI
+======================================================
+
+📋 DOSYA AMACI:
+Bu dosya, Base.metadata.create_all()'un mevcut tablolara uygulayamadığı
+şema değişikliklerini (index, kısıt, kolon) sürümlü ve idempotent adımlar
+olarak içerir. Yeni kurulumlarda tablolar modellerden zaten doğru oluşur;
+migrasyonlar eski veritabanlarını aynı duruma getirir.
+
+🎯 KAPSAM:
+1. 🗂️ SÜRÜM TAKİBİ:
+   - schema_migrations tablosunda uygulanan her adımın sürümü ve tarihi
+   - Her adım kendi transaction'ında; hata olursa sürüm kaydedilmez
+
+2. 🔧 ADIMLAR:
+   - 1: role_question_configs tekrar eden (role_id, question_type_id)
+     satırlarını temizleme (en son kaydedilen kalır) ve tekil index
+   - 2: sıcak sorgu şekilleri için index'ler - questions (role_id, contract_id[,
+     question_type], id), roles.contract_id, question_configs.contract_id
+   - 3: PostgreSQL'de JSON kolonlarını JSONB'ye çevirme (diğer veritabanlarında no-op)
+   - 4: generation_logs token/maliyet/telemetri kolonları ve (contract_id, created_at) index'i
+   - 5: generation_logs foreign key'lerinin kaldırılması (telemetri yalnızca eklenir;
+     SQLite'ta tablo yeniden kurulur) ve role_id index'i
+
+3. 🔒 ÇOKLU WORKER:
+   - schema_lock(): PostgreSQL'de advisory lock ile create_all + migrasyonları
+     tek worker'ın çalıştırmasını sağlar; diğerleri bekleyip uygulanmış sürümü görür
+
+🔧 KULLANIM:
+- main.py içinde schema_lock(engine) altında create_all ve run_migrations(engine)
+- Yeni adım: fonksiyonu yazıp MIGRATIONS listesinin sonuna sıradaki sürümle ekle
+- Adımlar SQLite ve PostgreSQL'de çalışacak şekilde yazılmalıdır
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .models import GenerationLog
+
+logger = logging.getLogger(__name__)
+
+
+def _unique_role_question_configs(conn: Connection):
+    """Aynı rol + soru tipi için birden fazla konfigürasyon varsa en sonuncusunu bırak, tekil index ekle"""
+    result = conn.execute(text(
+        "DELETE FROM role_question_configs WHERE id NOT IN ("
+        "SELECT MAX(id) FROM role_question_configs GROUP BY role_id, question_type_id)"
+    ))
+    if result.rowcount:
+        logger.info(f"role_question_configs: {result.rowcount} tekrar eden satır silindi")
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_role_question_configs_role_type "
+        "ON role_question_configs (role_id, question_type_id)"
+    ))
+
+
+# Sihirbaz endpoint'lerinin filtre/sıralama şekillerine karşılık gelen index'ler (modellerdekiyle aynı isimler)
+HOT_PATH_INDEXES = [
+    ("ix_questions_role_contract", "questions", "role_id, contract_id, id"),
+    ("ix_questions_role_contract_type", "questions", "role_id, contract_id, question_type, id"),
+    ("ix_roles_contract_id", "roles", "contract_id"),
+    ("ix_question_configs_contract_id", "question_configs", "contract_id"),
+]
+
+
+def _hot_path_indexes(conn: Connection):
+    """Rol/ilan bazlı okuma sorguları için composite index'leri ekle"""
+    for name, table, columns in HOT_PATH_INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+# create_all ile JSON olarak oluşturulmuş eski PostgreSQL kolonları (models.JSONType)
+JSONB_COLUMNS = [
+    ("question_configs", "question_type_distribution"),
+    ("questions", "generation_metadata"),
+    ("system_info", "available_models"),
+]
+
+
+def _postgres_jsonb_columns(conn: Connection):
+    """PostgreSQL'de json kolonlarını jsonb'ye çevir (yeni kurulumlar zaten jsonb)"""
+    if conn.dialect.name != "postgresql":
+        return
+    for table, column in JSONB_COLUMNS:
+        data_type = conn.execute(
+            text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+            ),
+            {"table": table, "column": column}
+        ).scalar()
+        if data_type == "json":
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb"))
+
+
+# telemetry.py'nin yazdığı, eski generation_logs tablosunda olmayan kolonlar
+GENERATION_LOG_COLUMNS = [
+    ("question_type", "VARCHAR(100)"),
+    ("provider", "VARCHAR(50)"),
+    ("call_kind", "VARCHAR(20)"),
+    ("question_count", "INTEGER"),
+    ("prompt_tokens", "INTEGER"),
+    ("completion_tokens", "INTEGER"),
+    ("total_tokens", "INTEGER"),
+    ("cost_usd", "FLOAT"),
+    ("retries", "INTEGER"),
+    ("cache_hit", "BOOLEAN"),
+]
+
+
+def _generation_log_telemetry(conn: Connection):
+    """generation_logs'a token/maliyet kolonlarını ekle (yeni kurulumlarda zaten var)"""
+    existing = {column["name"] for column in inspect(conn).get_columns("generation_logs")}
+    for name, column_type in GENERATION_LOG_COLUMNS:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE generation_logs ADD COLUMN {name} {column_type}"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_generation_logs_contract_created "
+        "ON generation_logs (contract_id, created_at)"
+    ))
+
+
+def _generation_log_without_foreign_keys(conn: Connection):
+    """generation_logs'tan contracts/roles foreign key'lerini kaldır, role_id index'ini ekle"""
+    inspector = inspect(conn)
+    foreign_keys = inspector.get_foreign_keys("generation_logs")
+    if foreign_keys and conn.dialect.name == "sqlite":
+        # SQLite ALTER TABLE ile kısıt kaldıramaz: tabloyu modelden yeniden kurup veriyi taşı
+        columns = [column["name"] for column in inspector.get_columns("generation_logs")]
+        columns = [name for name in columns if name in GenerationLog.__table__.columns]
+        for index in inspector.get_indexes("generation_logs"):
+            conn.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+        conn.execute(text("ALTER TABLE generation_logs RENAME TO generation_logs_old"))
+        GenerationLog.__table__.create(conn)
+        column_list = ", ".join(columns)
+        conn.execute(text(
+            f"INSERT INTO generation_logs ({column_list}) SELECT {column_list} FROM generation_logs_old"
+        ))
+        conn.execute(text("DROP TABLE generation_logs_old"))
+    else:
+        for foreign_key in foreign_keys:
+            conn.execute(text(f"ALTER TABLE generation_logs DROP CONSTRAINT {foreign_key['name']}"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_generation_logs_role_id ON generation_logs (role_id)"))
+
+
+# (sürüm, açıklama, adım) - sürümler artan sırada, uygulanmış sürüm asla değiştirilmez
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "role_question_configs (role_id, question_type_id) tekil", _unique_role_question_configs),
+    (2, "questions/roles/question_configs sıcak sorgu index'leri", _hot_path_indexes),
+    (3, "PostgreSQL JSON kolonları JSONB", _postgres_jsonb_columns),
+    (4, "generation_logs token/maliyet kolonları", _generation_log_telemetry),
+    (5, "generation_logs foreign key'siz (yalnızca ekleme)", _generation_log_without_foreign_keys),
+]
+
+# Şema işlemleri için sabit advisory lock anahtarı (PostgreSQL)
+SCHEMA_LOCK_KEY = 720_531_001
+
+
+@contextmanager
+def schema_lock(engine: Engine):
+    """Aynı veritabanına bağlı worker'lar arasında şema işlemlerini sıraya koy
+
+    PostgreSQL'de oturum seviyesinde pg_advisory_lock alınır; SQLite'ta tek dosyaya
+    yazma zaten serileştirildiği için no-op.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            conn.commit()
+
+
+def run_migrations(engine: Engine) -> int:
+    """Uygulanmamış migrasyonları sırayla çalıştır, uygulanan adım sayısını döndür"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(255), applied_at TIMESTAMP)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    count = 0
+    for version, name, step in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()}
+            )
+        logger.info(f"Migrasyon uygulandı: {version} - {name}")
+        count += 1
+    return count
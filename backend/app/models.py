@@ -52,7 +52,7 @@ Role (1) ←→ (N) Question
 - Veritabanı: SQLite (geliştirme), PostgreSQL uyumlu
 - Encoding: UTF-8 (Türkçe karakter desteği)
 - Timestamp: UTC timezone
-- JSON fields: PostgreSQL JSON/SQLite TEXT
+- JSON fields: PostgreSQL JSONB/SQLite TEXT (JSONType)
 
 🏗️ TABLO YAPISI:
 - contracts (ilanlar)
@@ -69,11 +69,15 @@ Role (1) ←→ (N) Question
 📅 TARİH: 2025
 🔄 VERSİYON: 1.0.0
 """
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Float, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
 
+# PostgreSQL'de JSONB (indekslenebilir, ikili saklama), diğer veritabanlarında JSON
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 class Contract(Base):
     """İlan bilgileri - 1. Adım"""
     __tablename__ = "contracts"
@@ -92,7 +96,7 @@ class Role(Base):
     __tablename__ = "roles"
     
     id = Column(Integer, primary_key=True, index=True)
-    contract_id = Column(Integer, ForeignKey("contracts.id"))
+    contract_id = Column(Integer, ForeignKey("contracts.id"), index=True)
     name = Column(String, index=True)
     salary_multiplier = Column(Float)
     position_count = Column(Integer)
@@ -252,20 +256,25 @@ class RoleQuestionConfig(Base):
     # İlişkiler
     role = relationship("Role", back_populates="question_configs")
     question_type = relationship("QuestionType", back_populates="question_configs")
+    
+    # Rol + soru tipi başına tek konfigürasyon (toplu upsert'in ON CONFLICT hedefi, bkz. migrations.py)
+    __table_args__ = (
+        Index("uq_role_question_configs_role_type", "role_id", "question_type_id", unique=True),
+    )
 
 class QuestionConfig(Base):
     """Global sınav ve soru konfigürasyonu - 3. ve 4. Adım"""
     __tablename__ = "question_configs"
     
     id = Column(Integer, primary_key=True, index=True)
-    contract_id = Column(Integer, ForeignKey("contracts.id"))
+    contract_id = Column(Integer, ForeignKey("contracts.id"), index=True)
     
     # Global sınav ayarları - 3. Adım
     candidate_multiplier = Column(Integer, default=10)  # Her pozisyon için kaç aday çağırılacak
     questions_per_candidate = Column(Integer, default=5)  # Her adaya kaç soru sorulacak
     
     # Soru türü dağılımı (JSON formatında - dinamik)
-    question_type_distribution = Column(JSON, default=lambda: {
+    question_type_distribution = Column(JSONType, default=lambda: {
         "professional_experience": 1,
         "theoretical_knowledge": 2, 
         "practical_application": 2
@@ -309,9 +318,15 @@ class Question(Base):
     
     # Metadata
     llm_model = Column(String(100))  # Kullanılan LLM modeli
-    generation_metadata = Column(JSON)  # Üretim metadata'sı
+    generation_metadata = Column(JSONType)  # Üretim metadata'sı
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Sıcak sorgular: rolün soruları (id sırasıyla) ve rolün belirli tipteki soruları (bkz. migrations.py)
+    __table_args__ = (
+        Index("ix_questions_role_contract", "role_id", "contract_id", "id"),
+        Index("ix_questions_role_contract_type", "role_id", "contract_id", "question_type", "id"),
+    )
 
 class SystemInfo(Base):
     """Sistem bilgileri ve GPU durumu"""
@@ -328,7 +343,7 @@ class SystemInfo(Base):
     
     # API bilgileri
     api_available = Column(Boolean, default=False)
-    available_models = Column(JSON)  # Mevcut modeller
+    available_models = Column(JSONType)  # Mevcut modeller
     
     # Sistem bilgileri
     python_version = Column(String(100))
@@ -338,19 +353,34 @@ class SystemInfo(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class GenerationLog(Base):
-    """Soru üretim logları"""
+    """Soru üretim logları (yalnızca eklenir; silinen ilan/rolün kayıtları kalır)"""
     __tablename__ = "generation_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    contract_id = Column(Integer, ForeignKey("contracts.id"))
-    role_id = Column(Integer, ForeignKey("roles.id"))  # Hangi role ait
+    # Foreign key yok: telemetri toplu yazılır, silinmiş ilan/role ait tek kayıt
+    # tüm yığını düşürmesin ve log'u olan rol silinebilsin
+    contract_id = Column(Integer)
+    role_id = Column(Integer, index=True)  # Hangi role ait
+    
+    question_type = Column(String(100))  # Hangi soru tipi için (düzeltmede de dolu)
     
     # Üretim bilgileri
     model_name = Column(String(100))
+    provider = Column(String(50))  # openai, local, mock
+    call_kind = Column(String(20))  # single, batch, correction
+    question_count = Column(Integer)  # Çağrıda istenen soru sayısı
     prompt_length = Column(Integer)
     response_length = Column(Integer)
     generation_time = Column(Float)  # Saniye
     
+    # Token ve maliyet (telemetry.py)
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    total_tokens = Column(Integer)
+    cost_usd = Column(Float)
+    retries = Column(Integer)
+    cache_hit = Column(Boolean, default=False)
+    
     # Durum
     status = Column(String(50))  # success, failed, partial
     error_message = Column(Text)
@@ -359,4 +389,9 @@ class GenerationLog(Base):
     raw_prompt = Column(Text)
     raw_response = Column(Text)
     
-    created_at = Column(DateTime, default=datetime.utcnow) 
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Kullanım raporları ilan + zaman aralığıyla filtrelenir
+        Index("ix_generation_logs_contract_created", "contract_id", "created_at"),
+    ) 
\ No newline at end of file
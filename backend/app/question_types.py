@@ -0,0 +1,134 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - SORU TİPİ KAYIT DEFTERİ
+===========================================================
+
+📋 DOSYA AMACI:
+Bu dosya, aktif soru tiplerinin süreç içinde (in-process) tutulan, sürümlü
+kopyasını içerir. Soru tipleri nadiren değişir ama üretim sırasında her rol ve
+her düzeltme için okunur; kayıt defteri bu okumaları veritabanına gitmeden
+bellekten karşılar.
+
+🎯 KAPSAM:
+1. 📚 ANLIK GÖRÜNTÜ:
+   - Aktif soru tipleri order_index sırasıyla, değiştirilemez QuestionTypeInfo
+     kayıtları olarak tutulur (session'a bağlı değil, thread'ler arası güvenli)
+   - İlk erişimde veya geçersiz kılındıktan sonra tek sorguyla yüklenir
+
+2. 🔄 GEÇERSİZ KILMA:
+   - /api/question-types oluşturma/güncelleme/silme endpoint'leri ve varsayılan
+     tiplerin eklenmesi commit sonrası invalidate() çağırır
+   - Her invalidate() sürümü artırır; eşzamanlı bir yükleme eski sürümle
+     başladıysa sonucu deftere yazılmaz (eski veri geri gelmez)
+   - Birden fazla worker'da diğer süreçlerdeki değişiklikler en geç
+     QUESTION_TYPE_REGISTRY_TTL saniye sonra görülür
+
+🔧 KONFIGÜRASYON:
+- QUESTION_TYPE_REGISTRY_TTL: anlık görüntünün en fazla yaşı, saniye
+  (varsayılan 60; 0 ise yalnızca invalidate() ile yenilenir)
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import QuestionType
+
+logger = logging.getLogger(__name__)
+
+QUESTION_TYPE_REGISTRY_TTL = float(os.getenv("QUESTION_TYPE_REGISTRY_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class QuestionTypeInfo:
+    """Aktif bir soru tipinin session'dan bağımsız kopyası (ORM nesnesiyle aynı alan adları)"""
+    id: int
+    name: str
+    code: str
+    description: Optional[str]
+    order_index: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "code": self.code,
+            "order_index": self.order_index
+        }
+
+
+class QuestionTypeRegistry:
+    """Aktif soru tiplerinin sürümlü, thread-safe bellek içi kopyası"""
+
+    def __init__(self, ttl: float = QUESTION_TYPE_REGISTRY_TTL):
+        self.ttl = ttl
+        self.version = 0
+        self._types: Optional[Tuple[QuestionTypeInfo, ...]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fresh(self) -> bool:
+        if self._types is None:
+            return False
+        return self.ttl <= 0 or time.monotonic() - self._loaded_at < self.ttl
+
+    def active(self, db: Optional[Session] = None) -> Tuple[QuestionTypeInfo, ...]:
+        """Aktif soru tipleri (order_index sırasıyla); gerekirse verilen session ile yükle"""
+        types = self._types
+        if types is not None and self._fresh():
+            return types
+
+        with self._lock:
+            if self._fresh():
+                return self._types
+            version = self.version
+
+        types = self._load(db)
+
+        with self._lock:
+            # Yükleme sürerken invalidate() çağrıldıysa sonuç eski olabilir: deftere yazma
+            if self.version == version:
+                self._types = types
+                self._loaded_at = time.monotonic()
+        return types
+
+    def _load(self, db: Optional[Session]) -> Tuple[QuestionTypeInfo, ...]:
+        session = db or SessionLocal()
+        try:
+            rows = session.query(
+                QuestionType.id,
+                QuestionType.name,
+                QuestionType.code,
+                QuestionType.description,
+                QuestionType.order_index
+            ).filter(
+                QuestionType.is_active == True
+            ).order_by(QuestionType.order_index).all()
+        finally:
+            if db is None:
+                session.close()
+        return tuple(QuestionTypeInfo(*row) for row in rows)
+
+    def pairs(self, db: Optional[Session] = None) -> List[Tuple[str, str]]:
+        """Aktif soru tipleri (kod, isim) çiftleri olarak"""
+        return [(qt.code, qt.name) for qt in self.active(db)]
+
+    def invalidate(self):
+        """Soru tipleri değişti: sürümü artır, bir sonraki erişimde yeniden yükle"""
+        with self._lock:
+            self.version += 1
+            self._types = None
+        logger.info(f"Soru tipi kayıt defteri geçersiz kılındı (sürüm {self.version})")
+
+
+# Uygulama genelinde paylaşılan kayıt defteri
+question_type_registry = QuestionTypeRegistry()
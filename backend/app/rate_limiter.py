@@ -0,0 +1,250 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - LLM RATE LIMITER / ZAMANLAYICI
+==================================================================
+
+📋 DOSYA AMACI:
+Bu dosya, OpenAI çağrılarını istemci tarafında dakikalık istek (RPM) ve
+token (TPM) bütçelerine göre sıraya koyan zamanlayıcıyı içerir. Eşzamanlı
+üretim 429 hatalarına körlemesine çarpmak yerine bütçe dolunca bekler.
+
+🎯 KAPSAM:
+1. 🪣 TOKEN BUCKET:
+   - RPM ve TPM için ayrı kovalar, saniyede limit/60 dolum
+   - Çağrı öncesi tahmini token (prompt uzunluğu/4 + max_tokens) ayrılır
+   - Yanıttaki gerçek kullanımla fark iade edilir/düşülür
+
+2. 📡 SUNUCU BAŞLIKLARI:
+   - x-ratelimit-limit/remaining/reset-{requests,tokens} ile limit ve kalan
+     bütçe sunucunun gördüğü değerlere çekilir
+   - 429 yanıtında retry-after / reset süresi kadar tüm çağrılar durdurulur
+
+3. 🔁 BACKOFF:
+   - Jitter'lı üstel bekleme (base × 2^deneme, üst sınır ile)
+
+4. 📊 METRİKLER:
+   - Kuyruk derinliği, uçuştaki çağrı, toplam throttle süresi, 429 sayısı
+
+🔧 KONFIGÜRASYON:
+- OPENAI_RPM_LIMIT (varsayılan 500), OPENAI_TPM_LIMIT (varsayılan 200000); 0 = sınırsız
+- OPENAI_MAX_RETRIES (varsayılan 3)
+- OPENAI_BACKOFF_BASE (varsayılan 0.5 sn), OPENAI_BACKOFF_MAX (varsayılan 30 sn)
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional, Mapping
+
+logger = logging.getLogger(__name__)
+
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "0.5"))
+OPENAI_BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", "30"))
+
+# Bekleyen çağrıların durumu en fazla bu aralıkla yeniden kontrol etmesi
+MAX_WAIT_SLICE = 1.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """'1s', '6m0s', '20ms', '1h2m3.5s' gibi reset sürelerini saniyeye çevir"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    multipliers = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(amount) * multipliers[unit] for amount, unit in parts)
+
+
+class _Bucket:
+    """Dakikalık limitli token bucket (limit 0 ise sınırsız)"""
+
+    def __init__(self, per_minute: int, now: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = now
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float):
+        if self.unlimited:
+            return
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """amount kadar bütçe için beklenmesi gereken süre (0 = hemen)"""
+        if self.unlimited:
+            return 0.0
+        # Kapasiteden büyük tek istek sonsuza kadar beklemesin: dolu kovayı yeter say
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) * 60.0 / self.capacity
+
+
+class RateLimiter:
+    """
+    RPM/TPM bütçeli, thread-safe LLM çağrı zamanlayıcısı.
+
+    clock/sleep varsayılan olarak time.monotonic/time.sleep'tir; testler
+    sanal saat vererek bütçe kararlarını gerçek zamandan bağımsız kılar.
+    """
+
+    def __init__(
+        self,
+        rpm_limit: int = OPENAI_RPM_LIMIT,
+        tpm_limit: int = OPENAI_TPM_LIMIT,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        backoff_base: float = OPENAI_BACKOFF_BASE,
+        backoff_max: float = OPENAI_BACKOFF_MAX,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.clock = clock
+        self.sleep = sleep
+        now = clock()
+        self.requests = _Bucket(rpm_limit, now)
+        self.tokens = _Bucket(tpm_limit, now)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+        # Metrikler
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.total_calls = 0
+        self.throttled_calls = 0
+        self.total_throttle_seconds = 0.0
+        self.rate_limited_responses = 0
+        self.retries = 0
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Prompt uzunluğundan kaba token tahmini (~4 karakter/token) + çıktı limiti"""
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        return prompt_chars // 4 + max_tokens
+
+    def acquire(self, estimated_tokens: int):
+        """Bütçe uygun olana kadar bekle, sonra 1 istek ve estimated_tokens ayır"""
+        started = self.clock()
+        waited = False
+        with self._lock:
+            self.queue_depth += 1
+        try:
+            while True:
+                with self._lock:
+                    now = self.clock()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    wait = max(
+                        self.blocked_until - now,
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(estimated_tokens)
+                    )
+                    if wait <= 0:
+                        if not self.requests.unlimited:
+                            self.requests.level -= 1
+                        if not self.tokens.unlimited:
+                            self.tokens.level -= estimated_tokens
+                        self.in_flight += 1
+                        self.total_calls += 1
+                        if waited:
+                            self.throttled_calls += 1
+                            self.total_throttle_seconds += now - started
+                        return
+                waited = True
+                self.sleep(min(wait, MAX_WAIT_SLICE))
+        finally:
+            with self._lock:
+                self.queue_depth -= 1
+
+    def release(self, estimated_tokens: int, actual_tokens: Optional[int] = None):
+        """Çağrı bitti: tahmin ile gerçek token kullanımı arasındaki farkı düzelt"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if actual_tokens is not None and not self.tokens.unlimited:
+                self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated_tokens - actual_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """x-ratelimit-* başlıklarına göre limitleri ve kalan bütçeyi güncelle"""
+        with self._lock:
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                try:
+                    if limit is not None and not bucket.unlimited:
+                        bucket.capacity = float(limit)
+                    if remaining is not None and not bucket.unlimited:
+                        bucket.level = min(bucket.level, float(remaining))
+                except ValueError:
+                    continue
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, str]] = None) -> float:
+        """429 alındı: tüm çağrıları sunucunun istediği süre kadar durdur, süreyi döndür"""
+        headers = headers or {}
+        retry_after_ms = parse_reset_duration(headers.get("retry-after-ms"))
+        if retry_after_ms is not None:
+            pause = retry_after_ms / 1000.0
+        else:
+            pause = parse_reset_duration(headers.get("retry-after")) or max(
+                parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0
+            )
+        with self._lock:
+            self.rate_limited_responses += 1
+            if pause:
+                self.blocked_until = max(self.blocked_until, self.clock() + pause)
+            # Sunucu bütçenin bittiğini söylüyor: yerel kovaları boşalt
+            self.requests.level = min(self.requests.level, 0.0)
+        return pause or 0.0
+
+    def backoff_delay(self, attempt: int, minimum: float = 0.0) -> float:
+        """Jitter'lı üstel bekleme süresi (attempt 0'dan başlar)"""
+        with self._lock:
+            self.retries += 1
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return max(minimum, delay * random.uniform(0.5, 1.0))
+
+    def stats(self) -> Dict[str, Any]:
+        """Zamanlayıcının anlık durumu ve birikmiş metrikleri"""
+        with self._lock:
+            now = self.clock()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "rpm_limit": None if self.requests.unlimited else self.requests.capacity,
+                "tpm_limit": None if self.tokens.unlimited else self.tokens.capacity,
+                "available_requests": None if self.requests.unlimited else round(self.requests.level, 2),
+                "available_tokens": None if self.tokens.unlimited else round(self.tokens.level, 2),
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "total_calls": self.total_calls,
+                "throttled_calls": self.throttled_calls,
+                "total_throttle_seconds": round(self.total_throttle_seconds, 3),
+                "rate_limited_responses": self.rate_limited_responses,
+                "retries": self.retries,
+                "paused_for_seconds": round(max(0.0, self.blocked_until - now), 3)
+            }
+
+
+# Uygulama genelinde paylaşılan zamanlayıcı
+rate_limiter = RateLimiter()
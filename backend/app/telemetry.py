@@ -0,0 +1,355 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - LLM KULLANIM TELEMETRİSİ
+============================================================
+
+📋 DOSYA AMACI:
+Bu dosya, her LLM çağrısının (tekil, batch, düzeltme ve cache hit'leri dahil)
+token kullanımını, gecikmesini, yeniden deneme sayısını, maliyetini ve durumunu
+generation_logs tablosuna yazan tamponlu kaydediciyi ve bu kayıtlar üzerinden
+ilan / rol / soru tipi bazında kullanım raporlarını içerir.
+
+🎯 KAPSAM:
+1. 📝 KAYIT:
+   - record_llm_call() yalnızca bellekteki tampona ekler (üretim thread'leri
+     veritabanı beklemez)
+   - Arka plan thread'i tamponu TELEMETRY_FLUSH_INTERVAL saniyede bir veya
+     TELEMETRY_BATCH_SIZE kayda ulaşınca tek bulk INSERT ile yazar
+   - Tampon TELEMETRY_MAX_BUFFER'ı aşarsa yeni kayıtlar düşürülür (sayaçta görünür)
+   - generation_logs'ta foreign key yoktur: ilan/rol sonradan silinse de yığın yazılır
+
+2. 💰 MALİYET:
+   - Model başına 1M token fiyatı (girdi / çıktı, USD); LLM_PRICING ile ezilir
+   - openai dışındaki sağlayıcılar ("local", "mock") yalnızca "sağlayıcı:model"
+     anahtarıyla fiyatlandırılmışsa ücretlidir
+
+3. 📊 RAPOR:
+   - usage_summary(): grup başına çağrı, cache hit, hata, token, maliyet ve
+     gecikme p50/p95 (cache hit'ler gecikme yüzdeliklerine katılmaz)
+
+🔧 KONFIGÜRASYON:
+- TELEMETRY_ENABLED: "false" ile kayıt tamamen kapatılır
+- TELEMETRY_FLUSH_INTERVAL: saniye (varsayılan 2)
+- TELEMETRY_BATCH_SIZE: bu kadar kayıt birikince hemen yaz (varsayılan 200)
+- TELEMETRY_MAX_BUFFER: tampon üst sınırı (varsayılan 10.000)
+- LLM_PRICING: JSON, ör. {"gpt-4o-mini": {"input": 0.15, "output": 0.60}}
+
+👨‍💻 GELIŞTIREN: AI Destekli Geliştirme
+📅 TARİH: 2025
+🔄 VERSİYON: 1.0.0
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import case, func, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .database import engine
+from .metrics import observe_llm_call
+from .models import Contract, Role, GenerationLog
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "true").lower() not in ("0", "false", "no")
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_FLUSH_INTERVAL", "2"))
+TELEMETRY_BATCH_SIZE = int(os.getenv("TELEMETRY_BATCH_SIZE", "200"))
+TELEMETRY_MAX_BUFFER = int(os.getenv("TELEMETRY_MAX_BUFFER", "10000"))
+
+# 1M token başına USD (girdi, çıktı)
+DEFAULT_PRICING = {
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "output": 10.00},
+    "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+}
+
+
+def _load_pricing() -> Dict[str, Dict[str, float]]:
+    pricing = dict(DEFAULT_PRICING)
+    raw = os.getenv("LLM_PRICING")
+    if raw:
+        try:
+            pricing.update(json.loads(raw))
+        except ValueError as e:
+            logger.warning(f"LLM_PRICING okunamadı, varsayılan fiyatlar kullanılıyor: {str(e)}")
+    return pricing
+
+
+LLM_PRICING = _load_pricing()
+
+# Rapor gruplama anahtarları
+GROUP_COLUMNS = {
+    "contract": GenerationLog.contract_id,
+    "role": GenerationLog.role_id,
+    "question_type": GenerationLog.question_type,
+    "model": GenerationLog.model_name,
+    "provider": GenerationLog.provider,
+    "call_kind": GenerationLog.call_kind,
+}
+
+
+def _price(provider: Optional[str], model_name: Optional[str]) -> Optional[Dict[str, float]]:
+    """Sağlayıcı + model için fiyat; tarihli model adları (gpt-4o-mini-2024-07-18) en uzun önekle eşleşir"""
+    if not model_name:
+        return None
+    exact = LLM_PRICING.get(f"{provider}:{model_name}")
+    if exact:
+        return exact
+    if provider != "openai":
+        return None
+    for name in sorted(LLM_PRICING, key=len, reverse=True):
+        if ":" not in name and model_name.startswith(name):
+            return LLM_PRICING[name]
+    return None
+
+
+def estimate_cost(
+    provider: Optional[str],
+    model_name: Optional[str],
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int]
+) -> Optional[float]:
+    """Token kullanımının USD maliyeti; fiyat bilinmiyorsa None"""
+    price = _price(provider, model_name)
+    if price is None or prompt_tokens is None:
+        return None
+    return (prompt_tokens * price["input"] + (completion_tokens or 0) * price["output"]) / 1_000_000
+
+
+class TelemetryBuffer:
+    """LLM çağrı kayıtlarını bellekte biriktirip arka planda toplu yazan kaydedici"""
+
+    def __init__(
+        self,
+        flush_interval: float = TELEMETRY_FLUSH_INTERVAL,
+        batch_size: int = TELEMETRY_BATCH_SIZE,
+        max_buffer: int = TELEMETRY_MAX_BUFFER,
+        enabled: bool = TELEMETRY_ENABLED,
+        bind: Engine = engine
+    ):
+        self.bind = bind
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.max_buffer = max_buffer
+        self.enabled = enabled
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.flush_errors = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, row: Dict[str, Any]):
+        """Kaydı tampona ekle (veritabanına gitmez)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append(row)
+            self.recorded += 1
+            pending = len(self._buffer)
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+                self._thread.start()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Tampondaki kayıtları tek bulk INSERT ile yaz, yazılan kayıt sayısını döndür"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(insert(GenerationLog), rows)
+            except Exception as e:
+                with self._lock:
+                    self.flush_errors += 1
+                    self.dropped += len(rows)
+                logger.warning(f"Telemetri yazılamadı ({len(rows)} kayıt düşürüldü): {str(e)}")
+                return 0
+            with self._lock:
+                self.written += len(rows)
+            return len(rows)
+
+    def shutdown(self):
+        """Arka plan thread'ini durdur ve kalan kayıtları yaz"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "recorded": self.recorded,
+                "written": self.written,
+                "pending": len(self._buffer),
+                "dropped": self.dropped,
+                "flush_errors": self.flush_errors,
+                "flush_interval": self.flush_interval,
+                "batch_size": self.batch_size
+            }
+
+
+# Uygulama genelinde paylaşılan kaydedici
+telemetry = TelemetryBuffer()
+
+
+def record_llm_call(
+    provider: Optional[str],
+    model_name: Optional[str],
+    call_kind: str,
+    latency: float,
+    prompt_length: int = 0,
+    response_length: int = 0,
+    usage: Optional[Dict[str, Any]] = None,
+    cache_hit: bool = False,
+    status: str = "success",
+    error_message: Optional[str] = None,
+    tags: Optional[Dict[str, Any]] = None,
+    question_count: int = 1
+):
+    """Tek bir LLM çağrısını (veya cache hit'ini) telemetri tamponuna ekle"""
+    # Prometheus metrikleri telemetri kapalıyken de güncellenir
+    observe_llm_call(provider, call_kind, latency, usage, cache_hit, status)
+    if not telemetry.enabled:
+        return
+    usage = usage or {}
+    tags = tags or {}
+    prompt_tokens = usage.get("prompt_tokens")
+    completion_tokens = usage.get("completion_tokens")
+    total_tokens = usage.get("total_tokens")
+    if total_tokens is None and prompt_tokens is not None:
+        total_tokens = prompt_tokens + (completion_tokens or 0)
+    # Her kayıt aynı anahtarlara sahip olmalı (executemany)
+    telemetry.record({
+        "contract_id": tags.get("contract_id"),
+        "role_id": tags.get("role_id"),
+        "question_type": tags.get("question_type"),
+        "model_name": model_name,
+        "provider": provider,
+        "call_kind": call_kind,
+        "question_count": question_count,
+        "prompt_length": prompt_length,
+        "response_length": response_length,
+        "generation_time": latency,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+        "cost_usd": 0.0 if cache_hit else estimate_cost(provider, model_name, prompt_tokens, completion_tokens),
+        "retries": usage.get("retries", 0),
+        "cache_hit": cache_hit,
+        "status": status,
+        "error_message": error_message,
+        "created_at": datetime.utcnow()
+    })
+
+
+def _percentile(ordered: List[float], pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index], 4)
+
+
+def usage_summary(
+    db: Session,
+    group_by: str = "contract",
+    contract_id: Optional[int] = None,
+    since: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    generation_logs'u group_by'a göre topla.
+
+    Toplamlar tek GROUP BY sorgusuyla, gecikme yüzdelikleri (SQLite'ta
+    percentile fonksiyonu olmadığı için) grup sıralı ikinci bir sorgudan hesaplanır.
+    """
+    if group_by not in GROUP_COLUMNS:
+        raise ValueError(f"Geçersiz group_by: {group_by} (geçerli: {', '.join(GROUP_COLUMNS)})")
+    key = GROUP_COLUMNS[group_by]
+
+    filters = []
+    if contract_id is not None:
+        filters.append(GenerationLog.contract_id == contract_id)
+    if since is not None:
+        filters.append(GenerationLog.created_at >= since)
+
+    rows = db.query(
+        key,
+        func.count(GenerationLog.id),
+        func.sum(case((GenerationLog.cache_hit == True, 1), else_=0)),
+        func.sum(case((GenerationLog.status != "success", 1), else_=0)),
+        func.sum(GenerationLog.question_count),
+        func.sum(GenerationLog.retries),
+        func.sum(GenerationLog.prompt_tokens),
+        func.sum(GenerationLog.completion_tokens),
+        func.sum(GenerationLog.total_tokens),
+        func.sum(GenerationLog.cost_usd),
+        func.sum(GenerationLog.generation_time)
+    ).filter(*filters).group_by(key).all()
+
+    latencies: Dict[Any, List[float]] = {}
+    for group, latency in db.query(key, GenerationLog.generation_time).filter(
+        *filters,
+        GenerationLog.cache_hit == False,
+        GenerationLog.status == "success",
+        GenerationLog.generation_time.isnot(None)
+    ).order_by(key, GenerationLog.generation_time):
+        latencies.setdefault(group, []).append(latency)
+
+    labels: Dict[Any, str] = {}
+    group_ids = [row[0] for row in rows if row[0] is not None]
+    if group_by == "contract" and group_ids:
+        labels = dict(db.query(Contract.id, Contract.title).filter(Contract.id.in_(group_ids)))
+    elif group_by == "role" and group_ids:
+        labels = dict(db.query(Role.id, Role.name).filter(Role.id.in_(group_ids)))
+
+    groups = []
+    for group, calls, cache_hits, errors, questions, retries, prompt_tokens, completion_tokens, total_tokens, cost, total_time in rows:
+        ordered = latencies.get(group, [])
+        groups.append({
+            "key": group,
+            "label": labels.get(group),
+            "calls": calls,
+            "cache_hits": cache_hits or 0,
+            "errors": errors or 0,
+            "questions": questions or 0,
+            "retries": retries or 0,
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "total_tokens": total_tokens or 0,
+            "cost_usd": round(cost or 0.0, 6),
+            "total_time_s": round(total_time or 0.0, 3),
+            "latency_p50_s": _percentile(ordered, 50),
+            "latency_p95_s": _percentile(ordered, 95)
+        })
+    groups.sort(key=lambda item: item["cost_usd"], reverse=True)
+
+    totals = {
+        name: sum(item[name] for item in groups)
+        for name in ("calls", "cache_hits", "errors", "questions", "retries",
+                     "prompt_tokens", "completion_tokens", "total_tokens")
+    }
+    totals["cost_usd"] = round(sum(item["cost_usd"] for item in groups), 6)
+    return {"group_by": group_by, "groups": groups, "totals": totals}
@@ -21,7 +21,7 @@ ve JSON parse işlemleri bu dosyada gerçekleştirilir.
 3. 🔍 SORU ÜRETİMİ:
    - Dinamik soru tipi yönetimi
    - Konu çeşitliliği algoritması
-   - JSON format düzeltme mekanizmaları
+   - JSON format düzeltme mekanizmaları (llm_parser.py)
 
 4. 🗄️ VERİTABANI ENTEGRASYONU:
    - Aktif soru tiplerini çekme
@@ -42,8 +42,13 @@ GİRİŞ: İlan bilgileri, rol verileri, soru konfigürasyonları
 ⚙️ TEKNİK ÖZELLİKLER:
 - OpenAI API timeout: 60 saniye
 - Maksimum retry: 3 defa
-- JSON parse gelişmiş hata düzeltme
-- Regex tabanlı format temizleme
+- Eşzamanlı üretim: OPENAI_MAX_CONCURRENCY (varsayılan 8) paralel çağrı (süreç geneli sınır)
+- Batch üretim: çağrı başına en fazla MAX_BATCH_SIZE soru, max_tokens ≤ OPENAI_MAX_OUTPUT_TOKENS
+- Kalıcı yanıt cache'i: llm_cache.py (use_cache=False ile bypass)
+- LLM sağlayıcısı: llm_providers.py (LLM_PROVIDER veya istek bazında provider)
+- Yanıt parse/onarım: llm_parser.py (tekil, batch ve düzeltme ortak)
+- Yapılandırılmış çıktı: LLM_STRUCTURED_OUTPUT (off/json_object/json_schema) ile response_format
+- Token/gecikme/maliyet telemetrisi: her çağrı telemetry.py tamponuna kaydedilir
 - Logging sistemi entegrasyonu
 
 🚫 KURAL SİSTEMİ:
@@ -56,16 +61,21 @@ GİRİŞ: İlan bilgileri, rol verileri, soru konfigürasyonları
 📅 TARİH: 2025
 🔄 VERSİYON: 1.0.0
 """
-from openai import OpenAI
-import json
 import logging
-import re
-from typing import Dict, Any, List
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple, Callable, Union
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import sys
 import os
-from sqlalchemy.orm import Session
-from .models import QuestionType
-from .database import SessionLocal
+from .question_types import question_type_registry
+from .llm_cache import response_cache
+from .llm_providers import get_provider
+from .telemetry import record_llm_call
+from .metrics import generations_in_progress
+from .llm_parser import (
+    parse_question, parse_question_list, strip_code_fences, response_format, structured_output_enabled
+)
 
 def get_difficulty_distribution_by_multiplier(salary_multiplier):
     """Maaş katsayısına göre güncellenmiş zorluk dağılımı hesapla"""
@@ -107,14 +117,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def get_active_question_types():
-    """Aktif soru tiplerini veri tabanından çek"""
-    db = SessionLocal()
+    """Aktif soru tiplerini (kod, isim) olarak getir - kayıt defterinden, veritabanına gitmeden"""
     try:
-        question_types = db.query(QuestionType).filter(
-            QuestionType.is_active == True
-        ).order_by(QuestionType.order_index).all()
-        
-        return [(qt.code, qt.name) for qt in question_types]
+        return question_type_registry.pairs()
     except Exception as e:
         logger.error(f"Soru tipleri alınırken hata: {str(e)}")
         # Fallback: hardcoded values
@@ -123,31 +128,25 @@ def get_active_question_types():
             ("theoretical_knowledge", "Teorik Bilgi Soruları"),
             ("practical_application", "Pratik Uygulama Soruları")
         ]
-    finally:
-        db.close()
-
-# OpenAI API configuration
-client = OpenAI(
-    api_key="your_api_key_here",
-    timeout=60.0,
-    max_retries=3
-)
 
-def check_4o_mini_status():
-    """Check if OpenAI API is available."""
+def check_4o_mini_status(provider: Optional[str] = None):
+    """Check if the LLM provider (default: LLM_PROVIDER) is available."""
     try:
+        llm = get_provider(provider)
         # Test API connection
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        test_response = llm.complete(
+            model_name="gpt-4o-mini",
             messages=[{"role": "user", "content": "test"}],
-            max_tokens=10
+            max_tokens=10,
+            max_retries=0
         )
         
         return {
             "api_available": True,
+            "provider": llm.name,
             "model": "gpt-4o-mini",
             "status": "connected",
-            "test_response": response.choices[0].message.content
+            "test_response": test_response
         }
         
     except Exception as e:
@@ -188,55 +187,113 @@ def get_available_4o_mini_models():
         ]
 
 
-def generate_questions_with_4o_mini(
-    model_name: str,
+# Eşzamanlı üretim ayarları - aynı anda en fazla kaç API çağrısı yapılacağı
+MAX_CONCURRENT_REQUESTS = max(1, int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")))
+
+# Süreç genelinde uçuştaki LLM çağrısı sınırı: eşzamanlı istekler, arka plan işleri
+# ve düzeltmeler aynı OPENAI_MAX_CONCURRENCY bütçesini paylaşır
+_llm_call_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+# Batch üretim - tek çağrıda kaç soru isteneceği (1 = her soru ayrı çağrı)
+DEFAULT_QUESTION_BATCH_SIZE = int(os.getenv("OPENAI_QUESTION_BATCH_SIZE", "1"))
+
+# Soru başına çıktı token bütçesi ve modelin tek yanıttaki çıktı token sınırı
+QUESTION_MAX_TOKENS = 1000
+OPENAI_MAX_OUTPUT_TOKENS = int(os.getenv("OPENAI_MAX_OUTPUT_TOKENS", "16384"))
+
+# Tek çağrıdaki en fazla soru; daha büyük istekler birden fazla batch'e bölünür.
+# Çıktı token sınırına sığmayan batch'ler API'den reddedilip tekil çağrıya düşerdi.
+MAX_BATCH_SIZE = max(1, min(
+    int(os.getenv("MAX_BATCH_SIZE", "10")),
+    OPENAI_MAX_OUTPUT_TOKENS // QUESTION_MAX_TOKENS
+))
+
+# Soru üretimi system prompt'u (her çağrıda aynı)
+QUESTION_SYSTEM_PROMPT = (
+    "Sen bir İnsan Kaynakları uzmanısın. Görevin, kamu kurumunda sözleşmeli bilişim personeli alımı için mülakat sürecine uygun, "
+    "değerlendirilebilir ve yapılandırılmış sorular üretmektir. Hazırlayacağın her soru, belirli bir pozisyona, belirli bir kategoriye "
+    "(örn. Teorik Bilgi, Pratik Uygulama, Mesleki Deneyim) ve belirlenmiş zorluk seviyesine göre şekillenmelidir. "
+
+    "Sorular sadece açıklama, yorum, analiz veya deneyim temelli olmalıdır. Kod yazdırmak, algoritma istemek, fonksiyon yazımı, script talebi gibi "
+    "uygulamalı programlama içeren hiçbir içerik sorulmamalıdır. Bu tür sorular kesinlikle yasaktır ve üretmeyeceksin. "
+
+    "Mülakat soruları, adayların ilgili pozisyonla ilişkili teknolojiler hakkında bilgi düzeyini, analitik becerilerini ve deneyimlerini anlamaya yönelik olmalıdır. "
+    "Soru konuları, pozisyonun özel şartlarında belirtilen teknolojiler veya araçlar arasından rastgele seçilmelidir. Aynı konudan birden fazla soru üretilmemelidir. "
+
+    "Ayrıca, her sorunun zorluk seviyesi pozisyonun maaş katsayısına (örn. 2x, 3x, 4x) göre değişir. Bu katsayılar, adayın kıdem düzeyine göre "
+    "sorunun bilgi derinliği ve analitik gereksinimini belirler. Örneğin; 2x adaydan temel kavramsal açıklama beklenirken, 4x adaydan mimari tasarım "
+    "veya stratejik karar analizleri beklenebilir. Bu seviye dağılımı önceden sana verilecektir. "
+
+    "Hazırlayacağın her soru, tek bir teknolojiye odaklanmalı ve net bir başlık/konu içermelidir. Sorunun sonunda ise, jüriye yönelik açıklayıcı bir 'beklenen cevap' "
+    "vermelisin. Bu cevap, adayın ne tür bilgi, beceri ya da yaklaşımı göstermesinin beklendiğini açıklar. Cevap adayın ağzından değil, değerlendirme "
+    "perspektifinden yazılmalı, öğretici ve açıklayıcı olmalıdır. Son olarak da anahtar kavramlar listelenmelidir."
+
+    "Tüm çıktı, sana verilen formata uygun olarak, JSON yapısında döndürülmelidir. Görevin, bu yapıya tam uyarak açık, anlaşılır ve kurum ciddiyetine uygun "
+    "mülakat soruları üretmektir."
+)
+
+
+def _build_question_prompt(
     job_context: str,
-    roles: List[Dict[str, Any]],
-    question_config: Dict[str, Any]
-) -> Dict[str, Any]:
+    role_name: str,
+    position_count: int,
+    salary_coefficient: float,
+    difficulty: str,
+    special_requirements: str,
+    type_name: str,
+    question_number: int,
+    batch_count: int = 1
+) -> str:
     """
-    Generate questions using OpenAI API - tek tek soru üretimi.
+    Kullanıcı prompt'unu oluştur - AKTİF KATSAYILARLA (KOD SORUSU YOK!)
+
+    batch_count > 1 ise question_number'dan başlayan batch_count adet soru
+    JSON dizisi olarak istenir; aksi halde tek soru JSON nesnesi istenir.
     """
-    logger.info("OpenAI API ile soru üretimi başlatılıyor.")
-    
-    try:
-        # Her soru tipi için ayrı ayrı soru üret
-        all_questions = {
-            "professional_experience": [],
-            "theoretical_knowledge": [],
-            "practical_application": []
-        }
-        
-        # Her rol için soruları üret
-        for role in roles:
-            role_name = role.get("name", "Unknown Role")
-            position_count = role.get("position_count", 1)
-            salary_coefficient = role.get("salary_coefficient", 2)
-            special_requirements = role.get("special_requirements", "")
-            
-            # Zorluk seviyesini question_config'den al
-            difficulty = question_config.get("difficulty_level", "orta")
-            
-            # Dinamik soru tiplerini veri tabanından al
-            active_question_types = get_active_question_types()
-            
-            # Her soru tipi için soruları üret  
-            for question_type, type_name in active_question_types:
-                # question_config bir dict değilse default değer kullan
-                if isinstance(question_config, dict):
-                    question_count = question_config.get(question_type, 5)
-                else:
-                    question_count = 5
-                
-                if question_count > 0:
-                    logger.info(f"{type_name} soruları üretiliyor: {question_count} adet")
-                    
-                    for i in range(question_count):
-                        # Zorluk dağılımını hesapla
-                        difficulty_distribution = get_difficulty_distribution_by_multiplier(salary_coefficient)
-                        
-                        # Her soru için ayrı prompt oluştur - AKTİF KATSAYILARLA (KOD SORUSU YOK!)
-                        prompt = f"""
+    # Zorluk dağılımını hesapla
+    difficulty_distribution = get_difficulty_distribution_by_multiplier(salary_coefficient)
+
+    if batch_count > 1:
+        last_number = question_number + batch_count - 1
+        task_line = (
+            f"Bu pozisyona ait {type_name} kategorisinde {question_number}.–{last_number}. soruları "
+            f"(toplam {batch_count} adet) ve her birinin beklenen cevabını üret. "
+            "Bu sorular birbirinden farklı konulara odaklanmalıdır."
+        )
+    else:
+        task_line = f"Bu pozisyona ait {type_name} kategorisinde {question_number}. soruyu ve beklenen cevabını üret."
+
+    # Görev satırı ortak; yalnızca çıktı formatı talimatı değişir
+    if batch_count > 1 and structured_output_enabled():
+        # Yapılandırılmış modda kök her zaman nesne (json_object kök dizi kabul etmez)
+        output_format = f"""Sonuç kesinlikle "questions" alanında tam olarak {batch_count} elemanlı dizi bulunan bir JSON nesnesi olarak, şu formatta döndürülmelidir (başka format kabul edilmez):
+
+{{
+  "questions": [
+    {{
+      "question": "soru metni burada",
+      "expected_answer": "beklenen cevap burada\\n\\nAnahtar kelimeler: kelime1, kelime2, kelime3, kelime4"
+    }}
+  ]
+}}"""
+    elif batch_count > 1:
+        output_format = f"""Sonuç kesinlikle tam olarak {batch_count} elemanlı bir JSON dizisi olarak, şu formatta döndürülmelidir (başka format kabul edilmez):
+
+[
+  {{
+    "question": "soru metni burada",
+    "expected_answer": "beklenen cevap burada\\n\\nAnahtar kelimeler: kelime1, kelime2, kelime3, kelime4"
+  }}
+]"""
+    else:
+        output_format = """Sonuç kesinlikle şu formatta JSON olarak döndürülmelidir (başka format kabul edilmez):
+
+{
+  "question": "soru metni burada",
+  "expected_answer": "beklenen cevap burada\\n\\nAnahtar kelimeler: kelime1, kelime2, kelime3, kelime4"
+}"""
+
+    return f"""
 İlan Başlığı: {job_context}
 Pozisyon: {role_name}
 Pozisyon Sayısı: {position_count}
@@ -244,7 +301,7 @@ Maaş Katsayısı: {salary_coefficient}x
 Zorluk Seviyesi: {difficulty}
 Özel Şartlar: {special_requirements}
 
-Bu pozisyona ait {type_name} kategorisinde {i+1}. soruyu ve beklenen cevabını üret.
+{task_line}
 
 Kod yazdırmak kesinlikle yasaktır. Soru içerisinde herhangi bir kod, algoritma, script, fonksiyon isteme ya da kod tamamlama ifadesi olmamalıdır. Adaydan sadece açıklama, analiz, yorum, yaklaşım veya deneyim paylaşımı beklenmelidir.
 
@@ -266,158 +323,393 @@ Beklenen cevap jüri için bilgilendirici tonda yazılmalı, adayın ağzından
 
 Cevabın sonunda bir satır boşluk bırakılarak 4–5 anahtar kelime verilmelidir.
 
-Sonuç kesinlikle şu formatta JSON olarak döndürülmelidir (başka format kabul edilmez):
-
-{{
-  "question": "soru metni burada",
-  "expected_answer": "beklenen cevap burada\\n\\nAnahtar kelimeler: kelime1, kelime2, kelime3, kelime4"
-}}
+{output_format}
 
 DİKKAT: Anahtar kelimeler expected_answer içinde olmalı, ayrı bir alan olmamalı!
 """
 
 
-                        try:
-                            response = client.chat.completions.create(
-                                model=model_name,
-                                messages=[
-                                    {"role": "system", "content": (
-                                        "Sen bir İnsan Kaynakları uzmanısın. Görevin, kamu kurumunda sözleşmeli bilişim personeli alımı için mülakat sürecine uygun, "
-                                        "değerlendirilebilir ve yapılandırılmış sorular üretmektir. Hazırlayacağın her soru, belirli bir pozisyona, belirli bir kategoriye "
-                                        "(örn. Teorik Bilgi, Pratik Uygulama, Mesleki Deneyim) ve belirlenmiş zorluk seviyesine göre şekillenmelidir. "
-                                        
-                                        "Sorular sadece açıklama, yorum, analiz veya deneyim temelli olmalıdır. Kod yazdırmak, algoritma istemek, fonksiyon yazımı, script talebi gibi "
-                                        "uygulamalı programlama içeren hiçbir içerik sorulmamalıdır. Bu tür sorular kesinlikle yasaktır ve üretmeyeceksin. "
-                                        
-                                        "Mülakat soruları, adayların ilgili pozisyonla ilişkili teknolojiler hakkında bilgi düzeyini, analitik becerilerini ve deneyimlerini anlamaya yönelik olmalıdır. "
-                                        "Soru konuları, pozisyonun özel şartlarında belirtilen teknolojiler veya araçlar arasından rastgele seçilmelidir. Aynı konudan birden fazla soru üretilmemelidir. "
-                                        
-                                        "Ayrıca, her sorunun zorluk seviyesi pozisyonun maaş katsayısına (örn. 2x, 3x, 4x) göre değişir. Bu katsayılar, adayın kıdem düzeyine göre "
-                                        "sorunun bilgi derinliği ve analitik gereksinimini belirler. Örneğin; 2x adaydan temel kavramsal açıklama beklenirken, 4x adaydan mimari tasarım "
-                                        "veya stratejik karar analizleri beklenebilir. Bu seviye dağılımı önceden sana verilecektir. "
-
-                                        "Hazırlayacağın her soru, tek bir teknolojiye odaklanmalı ve net bir başlık/konu içermelidir. Sorunun sonunda ise, jüriye yönelik açıklayıcı bir 'beklenen cevap' "
-                                        "vermelisin. Bu cevap, adayın ne tür bilgi, beceri ya da yaklaşımı göstermesinin beklendiğini açıklar. Cevap adayın ağzından değil, değerlendirme "
-                                        "perspektifinden yazılmalı, öğretici ve açıklayıcı olmalıdır. Son olarak da anahtar kavramlar listelenmelidir."
-
-                                        "Tüm çıktı, sana verilen formata uygun olarak, JSON yapısında döndürülmelidir. Görevin, bu yapıya tam uyarak açık, anlaşılır ve kurum ciddiyetine uygun "
-                                        "mülakat soruları üretmektir."
-                                    )},
-                                    {"role": "user", "content": prompt}
-                                ],
-                                temperature=0.8,
-                                max_tokens=1000
-                            )
-                            logger.info(f"OpenAI API response received for {type_name} sorusu {i+1}")
-                        except Exception as api_error:
-                            logger.error(f"OpenAI API error for {type_name} sorusu {i+1}: {str(api_error)}")
-                            # Fallback: basit soru oluştur
-                            all_questions[question_type].append({
-                                "question": f"{type_name} sorusu {i+1} - API hatası nedeniyle basit soru",
-                                "difficulty": "orta"
-                            })
+def _chat_completion(
+    model_name: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    cache_slot: Any = None,
+    use_cache: bool = True,
+    cacheable: Optional[Callable[[str], bool]] = None,
+    provider: Optional[str] = None,
+    output_format: Optional[Dict[str, Any]] = None,
+    usage_tags: Optional[Dict[str, Any]] = None,
+    call_kind: str = "single",
+    question_count: int = 1
+) -> str:
+    """
+    Seçilen LLM sağlayıcısıyla chat completion çağrısı yap ve yanıt metnini döndür.
+
+    use_cache açıksa yanıt önce kalıcı cache'te aranır (anahtar: sağlayıcı, model,
+    mesajlar, örnekleme parametreleri ve cache_slot). use_cache=False cache'i okumaz ama
+    yeni yanıtla kaydı tazeler. Yeni yanıtlar, cacheable verilmişse yalnızca onu
+    geçtiğinde cache'e yazılır. output_format sağlayıcıya response_format olarak
+    iletilir ve cache anahtarına dahildir.
+
+    Her çağrı (cache hit'ler dahil) usage_tags (contract_id, role_id, question_type)
+    ile telemetriye kaydedilir.
+    """
+    llm = get_provider(provider)
+    cache_model = f"{llm.name}:{model_name}"
+    cache_key = None
+    started = time.perf_counter()
+    prompt_length = sum(len(message.get("content") or "") for message in messages)
+    call_info = {
+        "provider": llm.name, "model_name": model_name, "call_kind": call_kind,
+        "prompt_length": prompt_length, "tags": usage_tags, "question_count": question_count
+    }
+    if response_cache.enabled:
+        params = {"temperature": temperature, "max_tokens": max_tokens}
+        if output_format is not None:
+            params["response_format"] = output_format
+        cache_key = response_cache.make_key(cache_model, messages, params, cache_slot)
+        if use_cache:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                record_llm_call(
+                    latency=time.perf_counter() - started, response_length=len(cached), cache_hit=True, **call_info
+                )
+                return cached
+
+    try:
+        with _llm_call_slots:
+            # Gecikme, slot beklemesi hariç yalnızca sağlayıcı çağrısını ölçer
+            started = time.perf_counter()
+            generated_text, usage = llm.complete_with_usage(
+                model_name=model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format=output_format
+            )
+    except Exception as e:
+        record_llm_call(latency=time.perf_counter() - started, status="failed", error_message=str(e), **call_info)
+        raise
+    record_llm_call(
+        latency=time.perf_counter() - started, response_length=len(generated_text or ""), usage=usage, **call_info
+    )
+
+    if cache_key and (cacheable is None or cacheable(generated_text)):
+        response_cache.set(cache_key, cache_model, generated_text)
+    return generated_text
+
+
+def _generate_single_question(
+    model_name: str,
+    prompt: str,
+    type_name: str,
+    question_number: int,
+    difficulty: str,
+    role_name: str,
+    use_cache: bool = True,
+    provider: Optional[str] = None,
+    usage_tags: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Tek bir soruyu API'den (veya cache'ten) üret ve parse et (thread pool içinde çalışır)"""
+    try:
+        generated_text = _chat_completion(
+            model_name,
+            [
+                {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.8,
+            max_tokens=QUESTION_MAX_TOKENS,
+            cache_slot=question_number,
+            use_cache=use_cache,
+            provider=provider,
+            output_format=response_format(),
+            usage_tags=usage_tags
+        )
+        logger.info(f"OpenAI API response received for {type_name} sorusu {question_number}")
+    except Exception as api_error:
+        logger.error(f"OpenAI API error for {type_name} sorusu {question_number}: {str(api_error)}")
+        # Fallback: basit soru oluştur
+        return {
+            "question": f"{type_name} sorusu {question_number} - API hatası nedeniyle basit soru",
+            "difficulty": "orta",
+            "question_number": question_number,
+            "api_error": str(api_error)
+        }
+
+    parsed = parse_question(generated_text, structured=structured_output_enabled())
+    if parsed:
+        question_text = parsed["question"]
+        expected_answer = parsed["expected_answer"]
+    else:
+        # JSON bulunamadı: düz metin olarak kullan
+        question_text = strip_code_fences(generated_text)
+        expected_answer = ''
+        logger.warning(f"JSON parse edilemedi, düz metin kullanılıyor: {question_text[:100]}...")
+
+    logger.info(f"{type_name} sorusu {question_number} ve cevabı başarıyla üretildi")
+
+    return {
+        "question": question_text,
+        "expected_answer": expected_answer,
+        "difficulty": difficulty,
+        "role": role_name,
+        "question_number": question_number
+    }
+
+
+def _generate_question_batch(
+    model_name: str,
+    prompt: str,
+    type_name: str,
+    first_number: int,
+    batch_count: int,
+    difficulty: str,
+    role_name: str,
+    use_cache: bool = True,
+    provider: Optional[str] = None,
+    usage_tags: Optional[Dict[str, Any]] = None
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Tek çağrıda batch_count adet soru üret (thread pool içinde çalışır).
+
+    batch_count uzunluğunda liste döner; API hatası veya eksik/bozuk yanıt
+    nedeniyle doldurulamayan slotlar None olur ve tekil çağrıyla yeniden üretilir.
+    """
+    structured = structured_output_enabled()
+    try:
+        generated_text = _chat_completion(
+            model_name,
+            [
+                {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.8,
+            max_tokens=min(QUESTION_MAX_TOKENS * batch_count, OPENAI_MAX_OUTPUT_TOKENS),
+            cache_slot=f"{first_number}+{batch_count}",
+            use_cache=use_cache,
+            # Eksik/bozuk batch yanıtları cache'e yazılmaz
+            cacheable=lambda text: len(parse_question_list(text, structured)) >= batch_count,
+            provider=provider,
+            output_format=response_format(batch=True),
+            usage_tags=usage_tags,
+            call_kind="batch",
+            question_count=batch_count
+        )
+        logger.info(f"OpenAI API batch response received for {type_name} soruları {first_number}-{first_number + batch_count - 1}")
+    except Exception as api_error:
+        logger.error(f"OpenAI API batch error for {type_name} soruları {first_number}+: {str(api_error)} - tekil üretime düşülüyor")
+        return [None] * batch_count
+
+    items = parse_question_list(generated_text, structured)
+    if len(items) < batch_count:
+        logger.warning(f"Batch yanıtında {batch_count} yerine {len(items)} soru bulundu - eksikler tekil üretilecek")
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for offset, item in enumerate(items[:batch_count]):
+        results.append({
+            "question": item["question"],
+            "expected_answer": item["expected_answer"],
+            "difficulty": difficulty,
+            "role": role_name,
+            "question_number": first_number + offset
+        })
+    results.extend([None] * (batch_count - len(results)))
+    return results
+
+
+def _resolve_batch_size(question_type: str, batch_sizes: Optional[Union[int, Dict[str, int]]]) -> int:
+    """Soru tipi için batch boyutunu belirle (parametre → OPENAI_QUESTION_BATCH_SIZE, en fazla MAX_BATCH_SIZE)"""
+    if isinstance(batch_sizes, dict):
+        size = batch_sizes.get(question_type, DEFAULT_QUESTION_BATCH_SIZE)
+    elif batch_sizes:
+        size = batch_sizes
+    else:
+        size = DEFAULT_QUESTION_BATCH_SIZE
+    return max(1, min(int(size), MAX_BATCH_SIZE))
+
+
+def planned_question_counts(question_config: Dict[str, Any]) -> List[Tuple[str, str, int]]:
+    """Aktif soru tipleri için üretilecek soru sayılarını (kod, isim, adet) olarak döndür"""
+    planned = []
+    for question_type, type_name in get_active_question_types():
+        # question_config bir dict değilse default değer kullan
+        if isinstance(question_config, dict):
+            question_count = question_config.get(question_type, 5)
+        else:
+            question_count = 5
+        if question_count > 0:
+            planned.append((question_type, type_name, question_count))
+    return planned
+
+
+def generate_questions_with_4o_mini(
+    model_name: str,
+    job_context: str,
+    roles: List[Dict[str, Any]],
+    question_config: Dict[str, Any],
+    max_concurrency: Optional[int] = None,
+    progress_callback: Optional[Callable[[str, int, bool], None]] = None,
+    batch_sizes: Optional[Union[int, Dict[str, int]]] = None,
+    use_cache: bool = True,
+    start_numbers: Optional[Dict[str, int]] = None,
+    question_callback: Optional[Callable[[str, int, Dict[str, Any]], None]] = None,
+    provider: Optional[str] = None,
+    usage_tags: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Generate questions using OpenAI API - çağrılar eşzamanlı.
+
+    Çağrılar en fazla `max_concurrency` (varsayılan: OPENAI_MAX_CONCURRENCY) adet
+    aynı anda çalışacak şekilde thread pool'a dağıtılır. Sağlayıcı çağrıları ayrıca
+    süreç genelindeki OPENAI_MAX_CONCURRENCY slotunu bekler; aynı anda çalışan
+    üretimler ve işler toplamda bu sınırı aşmaz. Sonuçlar slot indeksine
+    yazıldığı için her soru tipinin çıktı sırası seri üretimle aynıdır.
+
+    batch_sizes (int veya soru tipi → int) 1'den büyükse her çağrıda o kadar
+    (en fazla MAX_BATCH_SIZE) soru JSON dizisi olarak istenir; parse edilemeyen
+    slotlar tekil çağrıyla yeniden üretilir.
+
+    use_cache=False verilirse cache okunmaz (yeni sorular zorla üretilir ve cache tazelenir).
+
+    start_numbers ({soru_tipi: n}) verilirse o tipin soru numaraları n+1'den
+    başlar (artımlı üretimde mevcut soruların devamı için).
+
+    progress_callback verilirse her soru tamamlandığında
+    (soru_tipi, soru_indeksi, başarılı_mı) ile çağrılır. question_callback ise
+    aynı anda (soru_tipi, soru_indeksi, soru) ile çağrılır (streaming için).
+
+    provider verilmezse LLM_PROVIDER ortam değişkenindeki sağlayıcı kullanılır
+    (openai, local, mock - bkz. llm_providers.py).
+
+    usage_tags ({contract_id, role_id}) her çağrının telemetri kaydına soru
+    tipiyle birlikte eklenir (bkz. telemetry.py).
+    """
+    logger.info("OpenAI API ile soru üretimi başlatılıyor.")
+
+    try:
+        api_used = get_provider(provider).name
+    except ValueError as e:
+        return {"success": False, "error": str(e), "api_used": provider}
+
+    max_workers = max(1, max_concurrency or MAX_CONCURRENT_REQUESTS)
+
+    generations_in_progress.inc()
+    try:
+        # Her soru tipi için ayrı ayrı soru üret
+        all_questions = {
+            "professional_experience": [],
+            "theoretical_knowledge": [],
+            "practical_application": []
+        }
+
+        # (rol sırası, soru tipi) → slot listesi; sonuçlar üretim sırasından bağımsız yerleşir
+        slots_by_role_type = []
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # future → (tür, soru tipi, slot listesi, ilk indeks, adet, tekil üretim argümanları)
+            futures = {}
+
+            def submit_single(question_type, slots, i, prompt_args, type_name, difficulty, role_name, number_offset):
+                question_number = number_offset + i + 1
+                prompt = _build_question_prompt(**prompt_args, question_number=question_number)
+                future = executor.submit(
+                    _generate_single_question,
+                    model_name, prompt, type_name, question_number, difficulty, role_name, use_cache, provider,
+                    dict(usage_tags or {}, question_type=question_type)
+                )
+                futures[future] = (
+                    "single", question_type, slots, i, 1,
+                    (prompt_args, type_name, difficulty, role_name, number_offset)
+                )
+
+            # Her rol için soruları planla
+            for role in roles:
+                role_name = role.get("name", "Unknown Role")
+                position_count = role.get("position_count", 1)
+                salary_coefficient = role.get("salary_coefficient", 2)
+                special_requirements = role.get("special_requirements", "")
+
+                # Zorluk seviyesini question_config'den al
+                difficulty = question_config.get("difficulty_level", "orta")
+
+                # Dinamik soru tiplerine göre her tip için soruları üret
+                for question_type, type_name, question_count in planned_question_counts(question_config):
+                    batch_size = _resolve_batch_size(question_type, batch_sizes)
+                    logger.info(f"{type_name} soruları üretiliyor: {question_count} adet (batch: {batch_size})")
+
+                    slots = [None] * question_count
+                    slots_by_role_type.append((question_type, slots))
+
+                    prompt_args = {
+                        "job_context": job_context,
+                        "role_name": role_name,
+                        "position_count": position_count,
+                        "salary_coefficient": salary_coefficient,
+                        "difficulty": difficulty,
+                        "special_requirements": special_requirements,
+                        "type_name": type_name
+                    }
+                    number_offset = (start_numbers or {}).get(question_type, 0)
+                    single_args = (prompt_args, type_name, difficulty, role_name, number_offset)
+
+                    for start in range(0, question_count, batch_size):
+                        count = min(batch_size, question_count - start)
+                        if count == 1:
+                            submit_single(question_type, slots, start, *single_args)
                             continue
-                        
-                        # Parse the response
-                        generated_text = response.choices[0].message.content
-                        
-                        # Try to extract JSON from the response - IMPROVED
-                        try:
-                            # Markdown code block'ları ve diğer formatları temizle
-                            cleaned_text = generated_text.strip()
-                            
-                            # Farklı JSON başlangıçlarını temizle - REGEX ile güçlendirildi
-                            
-                            # ```json { ... } ``` formatını temizle
-                            if '```json' in cleaned_text and '```' in cleaned_text:
-                                # Regex ile ```json ile ``` arasındaki kısmı çıkar
-                                json_match = re.search(r'```json\s*(\{.*?\})\s*```', cleaned_text, re.DOTALL)
-                                if json_match:
-                                    cleaned_text = json_match.group(1).strip()
-                            elif cleaned_text.startswith('```json'):
-                                cleaned_text = cleaned_text.replace('```json', '').replace('```', '').strip()
-                            elif cleaned_text.startswith('```'):
-                                cleaned_text = cleaned_text.replace('```', '').strip()
-                            elif cleaned_text.startswith('json ('):
-                                cleaned_text = cleaned_text.replace('json (', '{', 1).strip()
-                            elif cleaned_text.startswith('"json ('):
-                                cleaned_text = cleaned_text.replace('"json (', '{', 1).strip()
-                            
-                            # JSON içinde başlangıç/bitiş karakterlerini düzelt
-                            if not cleaned_text.startswith('{') and '{' in cleaned_text:
-                                # İlk { karakterinden başla
-                                start_idx = cleaned_text.find('{')
-                                cleaned_text = cleaned_text[start_idx:]
-                            
-                            if not cleaned_text.endswith('}') and '}' in cleaned_text:
-                                # Son } karakterinde bitir
-                                end_idx = cleaned_text.rfind('}')
-                                cleaned_text = cleaned_text[:end_idx+1]
-                            
-                            # JSON içindeki yanlış anahtar kelimeler formatını düzelt - SÜPER GÜÇLENDİRİLDİ
-                            # AI'ın ürettiği en yaygın hatalı formatları yakala ve düzelt:
-                            
-                            # Format 1: "expected_answer": "text", "\n\nAnahtar kelimeler: words" }
-                            pattern1 = r'("expected_answer":\s*"[^"]*"),\s*"(\\n\\nAnahtar kelimeler:[^"]*)"(\s*\})'
-                            if re.search(pattern1, cleaned_text):
-                                cleaned_text = re.sub(pattern1, r'\1\2"\3', cleaned_text)
-                                logger.info("JSON Format 1 düzeltildi")
-                            
-                            # Format 2: "text", "\n\nAnahtar kelimeler: words" 
-                            pattern2 = r'",\s*"(\\n\\nAnahtar kelimeler:[^"]*)"'
-                            if re.search(pattern2, cleaned_text):
-                                cleaned_text = re.sub(pattern2, r'\1"', cleaned_text)
-                                logger.info("JSON Format 2 düzeltildi")
-                                
-                            # Format 3: Çift quotes düzeltme
-                            cleaned_text = cleaned_text.replace('""', '"')
-                            
-                            # Eğer JSON formatında geldiyse parse et
-                            if cleaned_text.startswith('{') and cleaned_text.endswith('}'):
-                                question_data = json.loads(cleaned_text)
-                                question_text = question_data.get('question', cleaned_text)
-                                expected_answer = question_data.get('expected_answer', '')
-                            else:
-                                # Düz metin olarak gelirse direkt kullan
-                                question_text = cleaned_text
-                                expected_answer = ''
-                                logger.warning(f"JSON parse edilemedi, düz metin kullanılıyor: {cleaned_text[:100]}...")
-                            
-                            # Soruyu ekle
-                            all_questions[question_type].append({
-                                "question": question_text,
-                                "expected_answer": expected_answer,
-                                "difficulty": difficulty,
-                                "role": role_name
-                            })
-                            
-                            logger.info(f"{type_name} sorusu {i+1} ve cevabı başarıyla üretildi")
-                            
-                        except json.JSONDecodeError as e:
-                            logger.error(f"JSON parse hatası: {e}")
-                            # JSON parse hatası durumunda düz metin olarak kullan
-                            all_questions[question_type].append({
-                                "question": generated_text.strip(),
-                                "expected_answer": '',
-                                "difficulty": difficulty,
-                                "role": role_name
-                            })
-                            logger.info(f"{type_name} sorusu {i+1} başarıyla üretildi (düz metin)")
-        
+                        first_number = number_offset + start + 1
+                        prompt = _build_question_prompt(**prompt_args, question_number=first_number, batch_count=count)
+                        future = executor.submit(
+                            _generate_question_batch,
+                            model_name, prompt, type_name, first_number, count, difficulty, role_name, use_cache, provider,
+                            dict(usage_tags or {}, question_type=question_type)
+                        )
+                        futures[future] = ("batch", question_type, slots, start, count, single_args)
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, question_type, slots, start, count, single_args = futures.pop(future)
+                    results = future.result() if kind == "batch" else [future.result()]
+
+                    for offset, result in enumerate(results):
+                        i = start + offset
+                        if result is None:
+                            # Batch bu slotu dolduramadı - tekil çağrıya düş
+                            submit_single(question_type, slots, i, *single_args)
+                            continue
+                        slots[i] = result
+                        if progress_callback:
+                            progress_callback(question_type, i, "api_error" not in result)
+                        if question_callback:
+                            question_callback(question_type, i, result)
+
+                # Fallback olarak eklenen tekil çağrıları da bekle
+                pending |= set(futures) - pending
+
+        # Slotları rol ve soru tipi sırasıyla birleştir
+        for question_type, slots in slots_by_role_type:
+            all_questions.setdefault(question_type, []).extend(slots)
+
         logger.info("Tüm sorular üretildi")
         return {
             "success": True,
             "questions": all_questions,
-            "api_used": "openai"
+            "api_used": api_used
         }
-        
+
     except Exception as e:
         logger.error(f"Error generating questions with OpenAI API: {str(e)}")
         return {
             "success": False,
             "error": str(e),
-            "api_used": "openai"
+            "api_used": api_used
         }
+    finally:
+        generations_in_progress.dec()
 
 
 def generate_corrected_question_with_4o_mini(
@@ -425,15 +717,21 @@ def generate_corrected_question_with_4o_mini(
     original_question: str,
     correction_instruction: str,
     job_context: str,
-    question_type: str
+    question_type: str,
+    provider: Optional[str] = None,
+    usage_tags: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Tek bir soruyu düzeltme talimatına göre yeniden üret
     """
     logger.info("Tekil soru düzeltme başlatılıyor.")
+    api_used = provider or "openai"
     
     try:
-        # Dinamik soru tiplerini veri tabanından al ve tür isimlerini belirle
+        llm = get_provider(provider)
+        api_used = llm.name
+        
+        # Dinamik soru tiplerini kayıt defterinden al ve tür isimlerini belirle
         active_question_types = get_active_question_types()
         type_names = {code: name for code, name in active_question_types}
         type_name = type_names.get(question_type, question_type)
@@ -467,115 +765,65 @@ DİKKAT: Anahtar kelimeler expected_answer içinde olmalı, ayrı alan olmamalı
 
 Düzeltilmiş Soru ve Cevap:"""
 
+        messages = [
+            {"role": "system", "content": "Sen bir İnsan Kaynakları uzmanısın ve sözleşmeli bilişim personeli alımı için kaliteli mülakat soruları hazırlıyorsun. Kavramsal, deneyimsel ve teorik sorular sor."},
+            {"role": "user", "content": prompt}
+        ]
+        call_info = {
+            "provider": llm.name, "model_name": model_name, "call_kind": "correction",
+            "prompt_length": sum(len(message["content"]) for message in messages),
+            "tags": dict(usage_tags or {}, question_type=question_type)
+        }
+        started = time.perf_counter()
         try:
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": "Sen bir İnsan Kaynakları uzmanısın ve sözleşmeli bilişim personeli alımı için kaliteli mülakat soruları hazırlıyorsun. Kavramsal, deneyimsel ve teorik sorular sor."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=1000
+            with _llm_call_slots:
+                started = time.perf_counter()
+                generated_text, usage = llm.complete_with_usage(
+                    model_name=model_name,
+                    messages=messages,
+                    temperature=0.8,
+                    max_tokens=1000,
+                    response_format=response_format()
+                )
+            record_llm_call(
+                latency=time.perf_counter() - started, response_length=len(generated_text or ""), usage=usage, **call_info
             )
             logger.info("OpenAI API response received for corrected question")
         except Exception as api_error:
+            record_llm_call(
+                latency=time.perf_counter() - started, status="failed", error_message=str(api_error), **call_info
+            )
             logger.error(f"OpenAI API error for corrected question: {str(api_error)}")
             return {
                 "success": False,
                 "error": f"API hatası: {str(api_error)}",
-                "api_used": "openai"
+                "api_used": api_used
             }
         
-        # Parse the response
-        generated_text = response.choices[0].message.content
+        parsed = parse_question(generated_text, structured=structured_output_enabled())
+        if parsed:
+            question_text = parsed["question"]
+            expected_answer = parsed["expected_answer"]
+        else:
+            # JSON bulunamadı: düz metin olarak kullan
+            question_text = strip_code_fences(generated_text)
+            expected_answer = ''
+            logger.warning(f"JSON parse edilemedi, düz metin kullanılıyor: {question_text[:100]}...")
         
-        # Try to extract JSON from the response - IMPROVED
-        try:
-            # Markdown code block'ları ve diğer formatları temizle
-            cleaned_text = generated_text.strip()
-            
-            # Farklı JSON başlangıçlarını temizle - REGEX ile güçlendirildi
-            
-            # ```json { ... } ``` formatını temizle
-            if '```json' in cleaned_text and '```' in cleaned_text:
-                # Regex ile ```json ile ``` arasındaki kısmı çıkar
-                json_match = re.search(r'```json\s*(\{.*?\})\s*```', cleaned_text, re.DOTALL)
-                if json_match:
-                    cleaned_text = json_match.group(1).strip()
-            elif cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text.replace('```json', '').replace('```', '').strip()
-            elif cleaned_text.startswith('```'):
-                cleaned_text = cleaned_text.replace('```', '').strip()
-            elif cleaned_text.startswith('json ('):
-                cleaned_text = cleaned_text.replace('json (', '{', 1).strip()
-            elif cleaned_text.startswith('"json ('):
-                cleaned_text = cleaned_text.replace('"json (', '{', 1).strip()
-            
-            # JSON içinde başlangıç/bitiş karakterlerini düzelt
-            if not cleaned_text.startswith('{') and '{' in cleaned_text:
-                # İlk { karakterinden başla
-                start_idx = cleaned_text.find('{')
-                cleaned_text = cleaned_text[start_idx:]
-            
-            if not cleaned_text.endswith('}') and '}' in cleaned_text:
-                # Son } karakterinde bitir
-                end_idx = cleaned_text.rfind('}')
-                cleaned_text = cleaned_text[:end_idx+1]
-            
-            # JSON içindeki yanlış anahtar kelimeler formatını düzelt - SÜPER GÜÇLENDİRİLDİ
-            # AI'ın ürettiği en yaygın hatalı formatları yakala ve düzelt:
-            
-            # Format 1: "expected_answer": "text", "\n\nAnahtar kelimeler: words" }
-            pattern1 = r'("expected_answer":\s*"[^"]*"),\s*"(\\n\\nAnahtar kelimeler:[^"]*)"(\s*\})'
-            if re.search(pattern1, cleaned_text):
-                cleaned_text = re.sub(pattern1, r'\1\2"\3', cleaned_text)
-                logger.info("JSON Format 1 düzeltildi (corrected question)")
-            
-            # Format 2: "text", "\n\nAnahtar kelimeler: words" 
-            pattern2 = r'",\s*"(\\n\\nAnahtar kelimeler:[^"]*)"'
-            if re.search(pattern2, cleaned_text):
-                cleaned_text = re.sub(pattern2, r'\1"', cleaned_text)
-                logger.info("JSON Format 2 düzeltildi (corrected question)")
-                
-            # Format 3: Çift quotes düzeltme
-            cleaned_text = cleaned_text.replace('""', '"')
-            
-            # Eğer JSON formatında geldiyse parse et
-            if cleaned_text.startswith('{') and cleaned_text.endswith('}'):
-                question_data = json.loads(cleaned_text)
-                question_text = question_data.get('question', cleaned_text)
-                expected_answer = question_data.get('expected_answer', '')
-            else:
-                # Düz metin olarak gelirse direkt kullan
-                question_text = cleaned_text
-                expected_answer = ''
-                logger.warning(f"JSON parse edilemedi, düz metin kullanılıyor: {cleaned_text[:100]}...")
-            
-            logger.info("Tekil soru düzeltme başarıyla tamamlandı")
-            
-            return {
-                "success": True,
-                "question": question_text,
-                "expected_answer": expected_answer,
-                "api_used": "openai"
-            }
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse hatası: {e}")
-            # JSON parse hatası durumunda düz metin olarak kullan
-            return {
-                "success": True,
-                "question": generated_text.strip(),
-                "expected_answer": '',
-                "api_used": "openai"
-            }
-    
+        logger.info("Tekil soru düzeltme başarıyla tamamlandı")
+        
+        return {
+            "success": True,
+            "question": question_text,
+            "expected_answer": expected_answer,
+            "api_used": api_used
+        }
     except Exception as e:
         logger.error(f"Error generating corrected question with OpenAI API: {str(e)}")
         return {
             "success": False,
             "error": str(e),
-            "api_used": "openai"
+            "api_used": api_used
         }
 
 
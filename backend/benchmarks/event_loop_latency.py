@@ -0,0 +1,164 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - EVENT LOOP GECİKME BENCHMARK'I
+==================================================================
+
+📋 DOSYA AMACI:
+Büyük bir soru üretimi (/api/step4/generate-questions) devam ederken diğer
+endpoint'lerin (/health, /api/step2/roles) normal gecikmeyle cevap vermeye
+devam ettiğini ölçer. Üretim event loop'u bloklarsa bu endpoint'lerin
+gecikmesi üretim süresi kadar uzar.
+
+🔧 ÇALIŞMA ŞEKLİ:
+- Geçici bir SQLite veritabanı kullanılır (gerçek veriye dokunulmaz)
+- Üretim, her çağrıda --llm-latency kadar bekleyen "mock" LLM sağlayıcısı
+  ile yapılır (ağ/API anahtarı gerekmez)
+- Tek event loop üzerinde httpx ASGITransport ile üretim isteği ve
+  periyodik /health istekleri aynı anda gönderilir
+
+🚀 KULLANIM:
+    cd backend
+    python -m benchmarks.event_loop_latency --questions 60 --llm-latency 0.2
+
+📊 ÇIKTI:
+Baseline ve üretim sırasındaki /health gecikmeleri (p50/p95/max, ms) JSON
+olarak stdout'a yazılır.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Uygulama import edilmeden önce geçici veritabanına yönlendir
+_tmp_dir = tempfile.mkdtemp(prefix="mulakat-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ["LLM_CACHE_PATH"] = os.path.join(_tmp_dir, "llm_cache.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app import utils
+from app.llm_providers import MockProvider, register_provider
+from app.main import app, create_default_question_types
+from app.database import SessionLocal
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(latencies_ms):
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": round(_percentile(latencies_ms, 50), 2),
+        "p95_ms": round(_percentile(latencies_ms, 95), 2),
+        "max_ms": round(max(latencies_ms), 2) if latencies_ms else 0.0,
+        "mean_ms": round(statistics.mean(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+async def _probe(client, path, stop_event, interval):
+    """stop_event set edilene kadar path'e istek at, gecikmeleri topla"""
+    latencies = []
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def _run(args):
+    db = SessionLocal()
+    create_default_question_types(db)
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        contract = (await client.post("/api/step1/save-contract", json={
+            "title": f"Benchmark İlanı {time.time()}",
+            "content": "Benchmark",
+            "general_requirements": "Genel şartlar"
+        })).json()["contract"]
+        role = (await client.post("/api/step2/add-role", json={
+            "contract_id": contract["id"],
+            "name": "Yazılım Geliştirici",
+            "salary_multiplier": 2,
+            "position_count": 1,
+            "special_requirements": "Python, SQL, Docker"
+        })).json()["role"]
+
+        # Her soru tipine eşit pay düşecek şekilde rol konfigürasyonunu kaydet
+        question_types = (await client.get("/api/question-types")).json()["question_types"]
+        per_type = max(1, args.questions // len(question_types))
+        await client.post("/api/step3/save-all-role-configs", json={
+            "contract_id": contract["id"],
+            "role_configs": [{
+                "role_id": role["id"],
+                "question_types": [
+                    {"question_type_id": qt["id"], "question_count": per_type}
+                    for qt in question_types
+                ]
+            }]
+        })
+
+        # Baseline: üretim yokken /health gecikmesi
+        stop = asyncio.Event()
+        baseline_task = asyncio.create_task(_probe(client, "/health", stop, args.probe_interval))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        baseline = await baseline_task
+
+        # Üretim sırasında /health ve /api/step2/roles gecikmesi
+        stop = asyncio.Event()
+        health_task = asyncio.create_task(_probe(client, "/health", stop, args.probe_interval))
+        roles_task = asyncio.create_task(
+            _probe(client, f"/api/step2/roles/{contract['id']}", stop, args.probe_interval)
+        )
+        started = time.perf_counter()
+        response = await client.post("/api/step4/generate-questions", json={
+            "contract_id": contract["id"],
+            "model_name": "gpt-4o-mini",
+            "provider": "mock",
+            "use_cache": False
+        })
+        generation_seconds = time.perf_counter() - started
+        stop.set()
+        during_health = await health_task
+        during_roles = await roles_task
+        response.raise_for_status()
+
+    return {
+        "questions_requested": per_type * len(question_types),
+        "llm_latency_s": args.llm_latency,
+        "max_concurrency": utils.MAX_CONCURRENT_REQUESTS,
+        "generation_wall_time_s": round(generation_seconds, 3),
+        "health_baseline": _summary(baseline),
+        "health_during_generation": _summary(during_health),
+        "roles_during_generation": _summary(during_roles),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soru üretimi sırasında event loop gecikmesini ölç")
+    parser.add_argument("--questions", type=int, default=60, help="Toplam üretilecek soru sayısı")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Sahte LLM çağrısı başına gecikme (sn)")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="Probe istekleri arası bekleme (sn)")
+    parser.add_argument("--baseline-seconds", type=float, default=1.0, help="Baseline ölçüm süresi (sn)")
+    args = parser.parse_args()
+
+    register_provider("mock", MockProvider(latency=args.llm_latency))
+    result = asyncio.run(_run(args))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - LLM YANIT PARSER BENCHMARK'I
+================================================================
+
+📋 DOSYA AMACI:
+app/llm_parser.py'yi gerçek model çıktılarından derlenmiş bozuk/temiz yanıt
+korpusu (llm_parser_corpus.jsonl) üzerinde doğrular ve hızını ölçer. Karşılaştırma
+için utils.py'deki eski regex/replace onarım zinciri burada birebir tutulur.
+
+🔧 ÇALIŞMA ŞEKLİ:
+- Her korpus kaydı: name, kind (single/batch), response (ham model çıktısı),
+  expected (beklenen {"question", "expected_answer"}, liste veya düz metin
+  fallback'i için null)
+- Doğruluk: yeni parser her kayıtta expected'ı üretmeli; eski zincirin kaç
+  kaydı doğru ayrıştırdığı da raporlanır
+  (yeni parser'ın doğruluğu tests/test_llm_parser.py'de de denetlenir)
+- Hız: tüm korpus --rounds kez ayrıştırılır, yanıt başına mikrosaniye
+
+🚀 KULLANIM:
+    cd backend
+    python -m benchmarks.llm_parser_bench --rounds 2000
+
+📊 ÇIKTI:
+Doğruluk ve hız özeti JSON olarak stdout'a yazılır; yeni parser herhangi bir
+kayıtta beklenenden farklı sonuç verirse hatalı kayıtlar listelenir ve çıkış
+kodu 1 olur.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.llm_parser import parse_question, parse_question_list
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_parser_corpus.jsonl")
+
+
+def _legacy_parse_question(generated_text):
+    """utils.py'deki eski tekil yanıt onarım zinciri (karşılaştırma için)"""
+    try:
+        cleaned_text = generated_text.strip()
+        if '```json' in cleaned_text and '```' in cleaned_text:
+            json_match = re.search(r'```json\s*(\{.*?\})\s*```', cleaned_text, re.DOTALL)
+            if json_match:
+                cleaned_text = json_match.group(1).strip()
+        elif cleaned_text.startswith('```json'):
+            cleaned_text = cleaned_text.replace('```json', '').replace('```', '').strip()
+        elif cleaned_text.startswith('```'):
+            cleaned_text = cleaned_text.replace('```', '').strip()
+        elif cleaned_text.startswith('json ('):
+            cleaned_text = cleaned_text.replace('json (', '{', 1).strip()
+        elif cleaned_text.startswith('"json ('):
+            cleaned_text = cleaned_text.replace('"json (', '{', 1).strip()
+        if not cleaned_text.startswith('{') and '{' in cleaned_text:
+            cleaned_text = cleaned_text[cleaned_text.find('{'):]
+        if not cleaned_text.endswith('}') and '}' in cleaned_text:
+            cleaned_text = cleaned_text[:cleaned_text.rfind('}') + 1]
+        pattern1 = r'("expected_answer":\s*"[^"]*"),\s*"(\\n\\nAnahtar kelimeler:[^"]*)"(\s*\})'
+        if re.search(pattern1, cleaned_text):
+            cleaned_text = re.sub(pattern1, r'\1\2"\3', cleaned_text)
+        pattern2 = r'",\s*"(\\n\\nAnahtar kelimeler:[^"]*)"'
+        if re.search(pattern2, cleaned_text):
+            cleaned_text = re.sub(pattern2, r'\1"', cleaned_text)
+        cleaned_text = cleaned_text.replace('""', '"')
+        if cleaned_text.startswith('{') and cleaned_text.endswith('}'):
+            question_data = json.loads(cleaned_text)
+            return {
+                "question": question_data.get('question', cleaned_text),
+                "expected_answer": question_data.get('expected_answer', '')
+            }
+        return None
+    except json.JSONDecodeError:
+        return None
+
+
+def _legacy_parse_question_list(generated_text):
+    """utils.py'deki eski batch ayrıştırıcısı (karşılaştırma için)"""
+    cleaned_text = generated_text.strip()
+    fence_match = re.search(r'```(?:json)?\s*(.*?)```', cleaned_text, re.DOTALL)
+    if fence_match:
+        cleaned_text = fence_match.group(1).strip()
+    try:
+        data = json.loads(cleaned_text)
+    except json.JSONDecodeError:
+        start_idx = cleaned_text.find('[')
+        end_idx = cleaned_text.rfind(']')
+        if start_idx == -1 or end_idx <= start_idx:
+            return []
+        try:
+            data = json.loads(cleaned_text[start_idx:end_idx + 1])
+        except json.JSONDecodeError:
+            return []
+    if isinstance(data, dict):
+        data = data.get("questions", [])
+    if not isinstance(data, list):
+        return []
+    items = []
+    for item in data:
+        if isinstance(item, dict) and isinstance(item.get("question"), str) and item["question"].strip():
+            items.append({
+                "question": item["question"].strip(),
+                "expected_answer": str(item.get("expected_answer") or "")
+            })
+    return items
+
+
+PARSERS = {
+    "new": {"single": parse_question, "batch": parse_question_list},
+    "legacy": {"single": _legacy_parse_question, "batch": _legacy_parse_question_list},
+}
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check(corpus, parser_name):
+    """Beklenen sonuçtan farklı ayrıştırılan kayıtların isimleri"""
+    parsers = PARSERS[parser_name]
+    failures = []
+    for case in corpus:
+        try:
+            result = parsers[case["kind"]](case["response"])
+        except Exception as e:
+            result = f"exception: {e}"
+        if result != case["expected"]:
+            failures.append(case["name"])
+    return failures
+
+
+def measure(corpus, parser_name, rounds):
+    """Korpusu rounds kez ayrıştır, yanıt başına ortalama süre (µs)"""
+    parsers = PARSERS[parser_name]
+    calls = [(parsers[case["kind"]], case["response"]) for case in corpus]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for parse, response in calls:
+            try:
+                parse(response)
+            except Exception:
+                pass
+    elapsed = time.perf_counter() - started
+    return round(elapsed / (rounds * len(calls)) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM yanıt parser'ını korpus üzerinde doğrula ve ölç")
+    parser.add_argument("--rounds", type=int, default=2000, help="Korpusun kaç kez ayrıştırılacağı")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="JSONL korpus dosyası")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    clean = [case for case in corpus if case["name"] in ("single_clean", "batch_clean")]
+    failures = check(corpus, "new")
+    legacy_failures = check(corpus, "legacy")
+
+    result = {
+        "corpus_size": len(corpus),
+        "rounds": args.rounds,
+        "new": {
+            "correct": len(corpus) - len(failures),
+            "failures": failures,
+            "us_per_response": measure(corpus, "new", args.rounds),
+            "us_per_clean_response": measure(clean, "new", args.rounds) if clean else None
+        },
+        "legacy": {
+            "correct": len(corpus) - len(legacy_failures),
+            "failures": legacy_failures,
+            "us_per_response": measure(corpus, "legacy", args.rounds),
+            "us_per_clean_response": measure(clean, "legacy", args.rounds) if clean else None
+        }
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
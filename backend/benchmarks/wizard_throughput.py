@@ -0,0 +1,390 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - SİHİRBAZ UÇTAN UCA THROUGHPUT BENCHMARK'I
+=============================================================================
+
+📋 DOSYA AMACI:
+Beş adımlı sihirbazı (ilan → roller → konfigürasyon → soru üretimi → Word)
+gerçekçi ölçeklerde uçtan uca çalıştırır ve sonuçları commit'ler arasında
+karşılaştırılabilecek JSON olarak yazar.
+
+🔧 ÇALIŞMA ŞEKLİ:
+- Geçici SQLite veritabanı ve LLM cache'i kullanılır (gerçek veriye dokunulmaz)
+- Üretim, --llm-latency kadar bekleyen deterministik "mock" LLM sağlayıcısı
+  ile yapılır (ağ/API anahtarı gerekmez)
+- Adımlar FastAPI TestClient üzerinden gerçek endpoint'lerle sürülür
+- Her senaryo "ROLxSORU" biçimindedir: 20x100 = 20 rol, rol başına 100 soru
+
+📊 ÖLÇÜLENLER:
+- Endpoint başına gecikme (p50/p95/max/ortalama, ms) ve SQL sorgu sayısı
+- Toplam soru üretimi ve Word/ZIP üretimi duvar süresi
+- Senaryo başına toplam SQL sorgu sayısı (SQLAlchemy engine event'leri)
+- Tepe RSS (resource.getrusage; süreç boyunca monoton artar, senaryolar
+  büyükten küçüğe değil küçükten büyüğe sıralanmalıdır)
+
+📈 BÜYÜK TABLOLAR:
+- --seed-questions N: senaryolardan önce başka ilanlara ait N soru (ve
+  rolleri/konfigürasyonları) toplu eklenir; okuma endpoint'lerinin tablo
+  büyüdükçe sabit kalıp kalmadığı görülür
+- --drop-indexes: migrations.HOT_PATH_INDEXES kaldırılır (index'siz karşılaştırma)
+
+🚀 KULLANIM:
+    cd backend
+    python -m benchmarks.wizard_throughput
+    python -m benchmarks.wizard_throughput --scenarios 1x10,20x100,200x1000 --skip-word
+    python -m benchmarks.wizard_throughput --output bench_before.json
+    python -m benchmarks.wizard_throughput --scenarios 20x100 --seed-questions 1000000 --skip-word
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Uygulama import edilmeden önce geçici veritabanına yönlendir
+_tmp_dir = tempfile.mkdtemp(prefix="mulakat-wizard-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ["LLM_CACHE_PATH"] = os.path.join(_tmp_dir, "llm_cache.db")
+os.environ["EXPORT_CACHE_DIR"] = os.path.join(_tmp_dir, "export_cache")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, text
+
+from app import utils
+from app.database import engine, SessionLocal
+from app.llm_providers import MockProvider, register_provider
+from app.main import app, create_default_question_types
+from app.migrations import HOT_PATH_INDEXES
+from app.models import Contract, Role, RoleQuestionConfig, Question
+
+
+class _QueryCounter:
+    """Engine üzerinde çalışan SQL ifadelerini sayar"""
+
+    def __init__(self, bind):
+        self.count = 0
+        event.listen(bind, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+class _EndpointRecorder:
+    """Endpoint (method + yol şablonu) bazında gecikme ve sorgu sayısı toplar"""
+
+    def __init__(self, client, counter):
+        self.client = client
+        self.counter = counter
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(int)
+
+    def call(self, method, template, expected_status=200, **kwargs):
+        path_params = kwargs.pop("path_params", {})
+        path = template.format(**path_params)
+        queries_before = self.counter.count
+        started = time.perf_counter()
+        response = self.client.request(method, path, **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        key = f"{method} {template}"
+        self.latencies[key].append(elapsed_ms)
+        self.queries[key] += self.counter.count - queries_before
+        if response.status_code != expected_status:
+            raise RuntimeError(f"{key} → {response.status_code}: {response.text[:300]}")
+        return response
+
+    def summary(self):
+        return {
+            key: {
+                **_summary(latencies),
+                "queries_total": self.queries[key],
+                "queries_per_call": round(self.queries[key] / len(latencies), 2)
+            }
+            for key, latencies in self.latencies.items()
+        }
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(latencies_ms):
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": round(_percentile(latencies_ms, 50), 2),
+        "p95_ms": round(_percentile(latencies_ms, 95), 2),
+        "max_ms": round(max(latencies_ms), 2) if latencies_ms else 0.0,
+        "mean_ms": round(statistics.mean(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+def _peak_rss_mb():
+    """Sürecin tepe RSS değeri (Linux'ta KB, macOS'ta byte döner)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _parse_scenarios(value):
+    scenarios = []
+    for item in value.split(","):
+        roles, questions = item.lower().split("x")
+        scenarios.append((int(roles), int(questions)))
+    return scenarios
+
+
+def _split_count(total, parts):
+    """total'ı parts adet tipe olabildiğince eşit dağıt"""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def _seed_background(question_count, questions_per_role=1000, roles_per_contract=20, chunk_size=50000):
+    """Benchmark senaryolarından bağımsız ilan/rol/konfigürasyon/soru satırlarını toplu ekle"""
+    role_count = max(1, -(-question_count // questions_per_role))
+    contract_count = max(1, -(-role_count // roles_per_contract))
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        type_rows = conn.execute(text("SELECT id, code FROM question_types")).fetchall()
+        first_contract = min(conn.execute(insert(Contract).returning(Contract.id), [
+            {"title": f"Arka plan ilanı {i}", "content": "Benchmark dolgu verisi", "general_requirements": ""}
+            for i in range(contract_count)
+        ]).scalars().all())
+        first_role = min(conn.execute(insert(Role).returning(Role.id), [
+            {
+                "contract_id": first_contract + i // roles_per_contract,
+                "name": f"Arka plan rolü {i}",
+                "salary_multiplier": 2 + i % 3,
+                "position_count": 1,
+                "requirements": ""
+            }
+            for i in range(role_count)
+        ]).scalars().all())
+        conn.execute(insert(RoleQuestionConfig), [
+            {"role_id": first_role + i, "question_type_id": type_id, "question_count": 5, "difficulty_level": "Orta"}
+            for i in range(role_count) for type_id, _ in type_rows
+        ])
+        for start in range(0, question_count, chunk_size):
+            conn.execute(insert(Question), [
+                {
+                    "role_id": first_role + n // questions_per_role,
+                    "contract_id": first_contract + (n // questions_per_role) // roles_per_contract,
+                    "question_text": f"Arka plan sorusu {n}",
+                    "question_type": type_rows[n % len(type_rows)][1],
+                    "difficulty": "2x",
+                    "expected_answer": "Dolgu cevabı",
+                    "llm_model": "seed",
+                    "generation_metadata": {}
+                }
+                for n in range(start, min(start + chunk_size, question_count))
+            ])
+    print(
+        f"▶ Arka plan verisi: {contract_count} ilan, {role_count} rol, {question_count} soru "
+        f"({time.perf_counter() - started:.1f} sn)",
+        file=sys.stderr
+    )
+    return {"contracts": contract_count, "roles": role_count, "questions": question_count}
+
+
+def _run_scenario(client, counter, role_count, questions_per_role, args):
+    recorder = _EndpointRecorder(client, counter)
+    queries_at_start = counter.count
+    scenario_started = time.perf_counter()
+
+    # Adım 1: İlan
+    contract = recorder.call("POST", "/api/step1/save-contract", json={
+        "title": f"Benchmark İlanı {role_count}x{questions_per_role} {time.time()}",
+        "content": "Benchmark ilan metni",
+        "general_requirements": "Genel şartlar: lisans mezunu, en az 3 yıl deneyim"
+    }).json()["contract"]
+    contract_id = contract["id"]
+    for _ in range(args.read_repeats):
+        recorder.call("GET", "/api/step1/contract/{contract_id}", path_params={"contract_id": contract_id})
+
+    # Adım 2: Roller
+    role_ids = []
+    for i in range(role_count):
+        role = recorder.call("POST", "/api/step2/add-role", json={
+            "contract_id": contract_id,
+            "name": f"Benchmark Rolü {i + 1}",
+            "salary_multiplier": 2 + i % 3,
+            "position_count": 1 + i % 2,
+            "special_requirements": "Python, SQL, Docker, Kubernetes, Linux"
+        }).json()["role"]
+        role_ids.append(role["id"])
+    for _ in range(args.read_repeats):
+        recorder.call("GET", "/api/step2/roles/{contract_id}", path_params={"contract_id": contract_id})
+
+    # Adım 3: Global ve rol bazlı konfigürasyon
+    global_config = recorder.call(
+        "GET", "/api/step3/global-config/{contract_id}", path_params={"contract_id": contract_id}
+    ).json()
+    question_types = global_config["available_question_types"]
+    recorder.call("POST", "/api/step3/save-global-config", json={
+        "contract_id": contract_id,
+        "candidate_multiplier": 10,
+        "questions_per_candidate": len(question_types),
+        "question_type_distribution": {qt["code"]: 1 for qt in question_types}
+    })
+    type_counts = _split_count(questions_per_role, len(question_types))
+    recorder.call("POST", "/api/step3/save-all-role-configs", json={
+        "contract_id": contract_id,
+        "role_configs": [{
+            "role_id": role_id,
+            "question_types": [
+                {"question_type_id": qt["id"], "question_count": count}
+                for qt, count in zip(question_types, type_counts)
+            ]
+        } for role_id in role_ids]
+    })
+    for _ in range(args.read_repeats):
+        recorder.call(
+            "GET", "/api/step3/role-question-configs/{contract_id}", path_params={"contract_id": contract_id}
+        )
+
+    # Adım 4: Soru üretimi
+    generation_request = {
+        "contract_id": contract_id,
+        "model_name": "gpt-4o-mini",
+        "provider": "mock",
+        "use_cache": False
+    }
+    if args.batch_size:
+        generation_request["batch_sizes"] = args.batch_size
+    generation_started = time.perf_counter()
+    generation = recorder.call("POST", "/api/step4/generate-questions", json=generation_request).json()
+    generation_seconds = time.perf_counter() - generation_started
+    generated = sum(
+        len(q_list)
+        for role_result in generation["questions"]
+        for q_list in role_result.get("questions", {}).values()
+    )
+    for _ in range(args.read_repeats):
+        recorder.call("GET", "/api/step4/questions/{contract_id}", path_params={"contract_id": contract_id})
+    for i in range(min(args.regenerate_samples, role_count)):
+        recorder.call("POST", "/api/step4/regenerate-single-question", json={
+            "contract_id": contract_id,
+            "role_id": role_ids[i],
+            "question_type": question_types[0]["code"],
+            "question_index": 0,
+            "correction_instruction": "Soruyu daha somut bir senaryoya dayandır",
+            "model_name": "gpt-4o-mini",
+            "provider": "mock"
+        })
+
+    # Adım 5: Word/ZIP
+    word_seconds = None
+    zip_bytes = None
+    if not args.skip_word:
+        word_started = time.perf_counter()
+        response = recorder.call("POST", "/api/step5/generate-word", json={"contract_id": contract_id})
+        word_seconds = time.perf_counter() - word_started
+        zip_bytes = len(response.content)
+
+    return {
+        "roles": role_count,
+        "questions_per_role": questions_per_role,
+        "questions_generated": generated,
+        "wall_time_s": round(time.perf_counter() - scenario_started, 3),
+        "generation_wall_time_s": round(generation_seconds, 3),
+        "generation_questions_per_s": round(generated / generation_seconds, 2) if generation_seconds else None,
+        "word_wall_time_s": round(word_seconds, 3) if word_seconds is not None else None,
+        "zip_bytes": zip_bytes,
+        "db_queries_total": counter.count - queries_at_start,
+        "peak_rss_mb": _peak_rss_mb(),
+        "endpoints": recorder.summary()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beş adımlı sihirbazı uçtan uca benchmark et")
+    parser.add_argument("--scenarios", default="1x10,20x100,200x10",
+                        help="Virgülle ayrılmış ROLxSORU listesi (örn. 1x10,20x100,200x1000)")
+    parser.add_argument("--llm-latency", type=float, default=0.01, help="Mock LLM çağrısı başına gecikme (sn)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Mock LLM hata oranı (0-1)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Çağrı başına soru (batch_sizes)")
+    parser.add_argument("--read-repeats", type=int, default=5, help="GET endpoint'lerinin tekrar sayısı")
+    parser.add_argument("--regenerate-samples", type=int, default=3, help="Tekil soru düzeltme örnek sayısı")
+    parser.add_argument("--skip-word", action="store_true", help="5. adımı (Word/ZIP) atla")
+    parser.add_argument("--seed-questions", type=int, default=0,
+                        help="Senaryolardan önce eklenecek arka plan soru sayısı (büyük tablo testi)")
+    parser.add_argument("--drop-indexes", action="store_true",
+                        help="Sıcak sorgu index'lerini kaldır (index'siz karşılaştırma için)")
+    parser.add_argument("--output", default="wizard_throughput.json", help="Sonuç JSON dosyası")
+    parser.add_argument("--verbose", action="store_true", help="Uygulama INFO loglarını göster")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    register_provider("mock", MockProvider(latency=args.llm_latency, failure_rate=args.failure_rate))
+
+    db = SessionLocal()
+    create_default_question_types(db)
+    db.close()
+
+    if args.drop_indexes:
+        with engine.begin() as conn:
+            for name, _, _ in HOT_PATH_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    seeded = _seed_background(args.seed_questions) if args.seed_questions > 0 else None
+
+    counter = _QueryCounter(engine)
+    results = []
+    with TestClient(app) as client:
+        for role_count, questions_per_role in _parse_scenarios(args.scenarios):
+            print(f"▶ Senaryo {role_count} rol × {questions_per_role} soru", file=sys.stderr)
+            result = _run_scenario(client, counter, role_count, questions_per_role, args)
+            print(
+                f"  üretim {result['generation_wall_time_s']} sn, "
+                f"{result['db_queries_total']} sorgu, tepe RSS {result['peak_rss_mb']} MB",
+                file=sys.stderr
+            )
+            results.append(result)
+
+    report = {
+        "benchmark": "wizard_throughput",
+        "git_commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "llm_latency_s": args.llm_latency,
+            "failure_rate": args.failure_rate,
+            "batch_size": args.batch_size,
+            "max_concurrency": utils.MAX_CONCURRENT_REQUESTS,
+            "read_repeats": args.read_repeats,
+            "skip_word": args.skip_word,
+            "drop_indexes": args.drop_indexes,
+            "seeded": seeded
+        },
+        "scenarios": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
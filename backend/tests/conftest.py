@@ -0,0 +1,83 @@
+"""
+MÜLAKAT SORU HAZIRLAMASI SİSTEMİ - TEST ORTAMI
+===============================================
+
+📋 DOSYA AMACI:
+Testler uygulamayı geçici bir SQLite veritabanı, LLM cache'i ve export
+deposuyla, mock LLM sağlayıcısı üzerinden çalıştırır. Ortam değişkenleri
+app modülleri import edilmeden önce ayarlanmalıdır (modüller ayarlarını
+import anında okur).
+
+🚀 KULLANIM:
+    cd backend
+    python -m pytest tests
+
+- TEST_POSTGRES_URL verilirse PostgreSQL testleri de çalışır (bkz. test_postgres.py)
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="mulakat-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/test.db"
+os.environ["LLM_CACHE_PATH"] = f"{_TMP_DIR}/llm_cache.db"
+os.environ["EXPORT_CACHE_DIR"] = f"{_TMP_DIR}/export_cache"
+os.environ["LLM_PROVIDER"] = "mock"
+# Seri render: testlerde süreç havuzu başlatılmaz
+os.environ["EXPORT_WORKERS"] = "0"
+# Arka plan telemetri yazımı sorgu sayılarını etkilemesin; telemetri testleri kendi tamponunu kurar
+os.environ["TELEMETRY_ENABLED"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+    from app.llm_providers import MockProvider, register_provider
+    register_provider("mock", MockProvider())
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+# İlan başlıkları benzersiz olmalı (save-contract aynı başlığı reddeder)
+_contract_numbers = itertools.count(1)
+
+
+def create_contract(client, role_count: int, questions_per_type: int = 2) -> int:
+    """role_count rollü, soru konfigürasyonları kaydedilmiş bir ilan oluştur ve id'sini döndür"""
+    contract_id = client.post("/api/step1/save-contract", json={
+        "title": f"Test İlanı {next(_contract_numbers)} ({role_count} rol)",
+        "content": "Sözleşmeli bilişim personeli alımı",
+        "general_requirements": "Lisans mezunu olmak"
+    }).json()["contract"]["id"]
+    for index in range(role_count):
+        response = client.post("/api/step2/add-role", json={
+            "contract_id": contract_id,
+            "name": f"Yazılım Geliştirici {index}",
+            "salary_multiplier": 2 + index % 3,
+            "position_count": 1,
+            "special_requirements": "Python, PostgreSQL"
+        })
+        assert response.status_code == 200, response.text
+    question_types = client.get("/api/question-types").json()["question_types"]
+    roles = client.get(f"/api/step2/roles/{contract_id}").json()["roles"]
+    response = client.post("/api/step3/save-all-role-configs", json={
+        "contract_id": contract_id,
+        "role_configs": [
+            {
+                "role_id": role["id"],
+                "question_types": [
+                    {"question_type_id": qt["id"], "question_count": questions_per_type}
+                    for qt in question_types
+                ]
+            }
+            for role in roles
+        ]
+    })
+    assert response.status_code == 200, response.text
+    return contract_id
@@ -0,0 +1,39 @@
+"""
+Word/ZIP dışa aktarım endpoint'i (/api/step5/generate-word) testleri.
+"""
+from conftest import create_contract
+
+
+def test_generate_word_client_errors_keep_status(client):
+    assert client.post("/api/step5/generate-word", json={}).status_code == 400
+    assert client.post("/api/step5/generate-word", json={"contract_id": 999999}).status_code == 404
+
+    contract_id = create_contract(client, role_count=1)
+    response = client.post("/api/step5/generate-word", json={"contract_id": contract_id, "role_id": 999999})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Rol bulunamadı"
+
+
+def test_cached_zip_survives_eviction_while_serving(client, monkeypatch):
+    from app import main
+    from app.artifacts import artifact_store
+
+    contract_id = create_contract(client, role_count=2)
+    assert client.post("/api/step4/generate-questions", json={"contract_id": contract_id}).status_code == 200
+    first = client.post("/api/step5/generate-word", json={"contract_id": contract_id})
+    assert first.headers["x-export-cache"] == "miss"
+
+    original = main.cached_word_zip
+
+    def cached_then_evicted(booklets):
+        # Eşzamanlı bir export'un tahliyesi: dosya bulunduktan sonra, gönderimden önce silinir
+        result = original(booklets)
+        artifact_store.clear()
+        return result
+
+    monkeypatch.setattr(main, "cached_word_zip", cached_then_evicted)
+    second = client.post("/api/step5/generate-word", json={"contract_id": contract_id})
+    assert second.status_code == 200
+    assert second.headers["x-export-cache"] == "hit"
+    assert int(second.headers["content-length"]) == len(first.content)
+    assert second.content == first.content
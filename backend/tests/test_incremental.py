@@ -0,0 +1,66 @@
+"""
+Artımlı soru üretimi (generation.plan_incremental_generation) testleri.
+
+Geçersiz sayılıp silinen bir sorunun yerine üretilen soru, korunan bir
+sorunun numarasını (dolayısıyla prompt'unu ve LLM cache anahtarını)
+almamalıdır; aksi halde aynı soru ikinci kez kaydedilir.
+"""
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.database import SessionLocal
+from app.models import Question
+from conftest import create_contract
+
+
+def _generate(client, contract_id: int, **options):
+    response = client.post("/api/step4/generate-questions", json={
+        "contract_id": contract_id, "provider": "mock", **options
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _questions(contract_id: int):
+    db = SessionLocal()
+    try:
+        return db.query(Question).filter(Question.contract_id == contract_id).order_by(Question.id).all()
+    finally:
+        db.close()
+
+
+def _mark_api_error(question_id: int):
+    db = SessionLocal()
+    try:
+        question = db.get(Question, question_id)
+        question.generation_metadata = {**(question.generation_metadata or {}), "api_error": True}
+        flag_modified(question, "generation_metadata")
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_refilled_middle_question_is_not_a_duplicate(client):
+    contract_id = create_contract(client, 1, questions_per_type=5)
+    _generate(client, contract_id)
+    before = _questions(contract_id)
+    question_type = before[0].question_type
+    of_type = [q for q in before if q.question_type == question_type]
+    assert len(of_type) == 5
+
+    # Ortadaki soru (#3) geçersiz: artımlı üretim yalnızca onu yeniden üretir
+    _mark_api_error(of_type[2].id)
+    result = _generate(client, contract_id, mode="incremental")
+    assert result["questions"][0]["incremental"] == {"kept": len(before) - 1, "generated": 1, "deleted": 1}
+
+    after = _questions(contract_id)
+    texts = [q.question_text for q in after]
+    assert len(after) == len(before)
+    assert len(texts) == len(set(texts)), "artımlı üretim mevcut bir soruyu tekrar kaydetti"
+    refilled = [q for q in after if q.question_type == question_type and q.id not in {p.id for p in of_type}]
+    assert [q.generation_metadata["question_number"] for q in refilled] == [6]
+
+    # İkinci tur: yeniden doldurulan #6'dan sonra numaralanır
+    _mark_api_error(of_type[0].id)
+    _generate(client, contract_id, mode="incremental")
+    texts = [q.question_text for q in _questions(contract_id)]
+    assert len(texts) == len(set(texts))
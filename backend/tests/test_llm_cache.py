@@ -0,0 +1,96 @@
+"""
+LLM yanıt cache'i (llm_cache.py) testleri.
+
+Hit'ler yazma kilidini almamalı ve her seferinde diske yazmamalıdır:
+last_access yalnızca çözünürlükten eskiyse güncellenir ve toplu yazılır.
+"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app import llm_cache
+from app.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(path=str(tmp_path / "llm_cache.db"), enabled=True)
+
+
+def _last_access(cache: LLMResponseCache, key: str) -> float:
+    with sqlite3.connect(cache.path) as conn:
+        return conn.execute("SELECT last_access FROM llm_responses WHERE key = ?", (key,)).fetchone()[0]
+
+
+def _age(cache: LLMResponseCache, key: str, seconds: float):
+    with sqlite3.connect(cache.path) as conn:
+        conn.execute("UPDATE llm_responses SET last_access = last_access - ? WHERE key = ?", (seconds, key))
+
+
+def test_recent_hit_does_not_write(cache):
+    cache.set("k", "model", "yanıt")
+    stored = _last_access(cache, "k")
+    for _ in range(5):
+        assert cache.get("k") == "yanıt"
+    assert cache.stats()["pending_touches"] == 0
+    assert _last_access(cache, "k") == stored
+    assert cache.stats()["hits"] == 5
+
+
+def test_stale_last_access_is_batched(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "TOUCH_BATCH_SIZE", 3)
+    keys = ["a", "b", "c"]
+    for key in keys:
+        cache.set(key, "model", key)
+        _age(cache, key, 3600)
+    old = {key: _last_access(cache, key) for key in keys}
+
+    cache.get("a")
+    cache.get("b")
+    # Henüz yazılmadı: bellekte bekliyor
+    assert cache.stats()["pending_touches"] == 2
+    assert all(_last_access(cache, key) == old[key] for key in keys)
+
+    cache.get("c")
+    assert cache.stats()["pending_touches"] == 0
+    assert all(_last_access(cache, key) > old[key] for key in keys)
+
+
+def test_set_flushes_pending_touches(cache):
+    cache.set("a", "model", "a")
+    _age(cache, "a", 3600)
+    old = _last_access(cache, "a")
+    cache.get("a")
+    assert _last_access(cache, "a") == old
+
+    cache.set("b", "model", "b")
+    assert _last_access(cache, "a") > old
+
+
+def test_hit_does_not_wait_for_write_lock(cache):
+    cache.set("k", "model", "yanıt")
+    result = {}
+
+    def reader():
+        result["value"] = cache.get("k")
+
+    # Yazma kilidi tutulurken (ör. uzun bir set/tahliye) okuma tamamlanmalı
+    with cache._lock:
+        thread = threading.Thread(target=reader)
+        thread.start()
+        thread.join(timeout=2)
+        finished = not thread.is_alive()
+    thread.join()
+    assert finished, "cache okuması yazma kilidini bekledi"
+    assert result["value"] == "yanıt"
+
+
+def test_expired_entry_is_a_miss(cache):
+    cache.set("k", "model", "yanıt")
+    with sqlite3.connect(cache.path) as conn:
+        conn.execute("UPDATE llm_responses SET created_at = ?", (time.time() - cache.ttl_seconds - 1,))
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["entries"] == 0
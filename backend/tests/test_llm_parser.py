@@ -0,0 +1,38 @@
+"""
+LLM yanıt parser'ı (llm_parser.py) testleri.
+
+benchmarks/llm_parser_corpus.jsonl'deki her temiz/bozuk model çıktısı
+beklenen sonuca ayrıştırılmalıdır (expected null: parse edilemez, düz
+metin fallback'i). Benchmark'taki doğruluk kontrolünün aynısı; _repair /
+_salvage_objects gerilemeleri elle benchmark çalıştırmadan yakalanır.
+"""
+import json
+import os
+
+import pytest
+
+from app.llm_parser import parse_question, parse_question_list
+
+CORPUS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "llm_parser_corpus.jsonl"
+)
+
+PARSERS = {"single": parse_question, "batch": parse_question_list}
+
+
+def _load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+CORPUS = _load_corpus()
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[case["name"] for case in CORPUS])
+def test_corpus_case_parses_to_expected(case):
+    assert PARSERS[case["kind"]](case["response"]) == case["expected"]
+
+
+def test_corpus_covers_both_kinds():
+    assert {case["kind"] for case in CORPUS} == set(PARSERS)
+    assert len({case["name"] for case in CORPUS}) == len(CORPUS)
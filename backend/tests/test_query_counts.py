@@ -0,0 +1,69 @@
+"""
+Sorgu sayısı testleri.
+
+Wizard'ın ilan bazlı uç noktaları rol sayısından bağımsız sayıda SQL
+ifadesi çalıştırmalıdır (N+1 olmamalı). SQLAlchemy before_cursor_execute
+dinleyicisiyle 5 ve 20 rollü iki ilan için ifade sayıları karşılaştırılır.
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from conftest import create_contract
+
+
+@contextmanager
+def count_statements():
+    """Blok içinde çalışan SQL ifadelerini say (executemany tek ifade sayılır)"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _call(client, method: str, path: str, json=None):
+    response = client.request(method, path, json=json)
+    assert response.status_code == 200, response.text
+    return response
+
+
+ENDPOINTS = [
+    ("GET", "/api/step3/role-question-configs/{contract_id}", None),
+    ("GET", "/api/step4/questions/{contract_id}", None),
+    ("POST", "/api/step4/generate-questions", {"provider": "mock", "use_cache": False}),
+    ("POST", "/api/step5/generate-word", {}),
+]
+
+
+@pytest.fixture(scope="module")
+def contracts(client):
+    contract_ids = {role_count: create_contract(client, role_count) for role_count in (1, 5, 20)}
+    # Listeleme uç noktaları dolu ilanları ölçsün
+    for contract_id in contract_ids.values():
+        _call(client, "POST", "/api/step4/generate-questions", json={"contract_id": contract_id, "provider": "mock"})
+    # Soru tipi registry'si vb. tek seferlik yüklemeler ölçüme girmesin
+    warmup = contract_ids.pop(1)
+    for method, path, body in ENDPOINTS:
+        _call(client, method, path.format(contract_id=warmup),
+              json=None if body is None else {**body, "contract_id": warmup})
+    return contract_ids
+
+
+@pytest.mark.parametrize("method, path, body", ENDPOINTS)
+def test_statement_count_does_not_grow_with_roles(client, contracts, method, path, body):
+    counts = {}
+    for role_count, contract_id in contracts.items():
+        json = None if body is None else {**body, "contract_id": contract_id}
+        with count_statements() as statements:
+            _call(client, method, path.format(contract_id=contract_id), json=json)
+        counts[role_count] = len(statements)
+
+    assert counts[5] == counts[20], f"{method} {path}: {counts}"
@@ -0,0 +1,213 @@
+"""
+LLM zamanlayıcısı (rate_limiter.py) testleri.
+
+OpenAI uyumlu sahte bir HTTP sunucusu RPM/TPM bütçesini kendi token
+bucket'ıyla uygular ve aşımda 429 döner. Aynı limitlerle yapılandırılmış
+OpenAIProvider'a eşzamanlı çağrılar gönderilir: istemci bütçe dolunca
+beklemeli, sunucu hiç 429 döndürmemelidir.
+
+Bütçe testlerinde zamanlayıcı ve sunucu aynı sanal saati paylaşır: saat
+yalnızca zamanlayıcı beklerken ilerler, istek sunucuya ulaşana kadar
+geçen gerçek süre (thread/HTTP gecikmesi) sonucu etkilemez.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.llm_providers import OpenAIProvider
+from app.metrics import registry
+from app.rate_limiter import RateLimiter, rate_limiter
+
+
+class VirtualClock:
+    """Yalnızca sleep() ile ilerleyen, thread-safe sanal monotonic saat"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def monotonic(self) -> float:
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            self.now += seconds
+        # Diğer thread'ler ilerlesin (sanal süre gerçekte beklenmez)
+        time.sleep(0.001)
+
+
+class _StubBucket:
+    """Sunucu tarafı dakikalık bütçe (limit 0 ise sınırsız)"""
+
+    # Kayan nokta yuvarlaması payı (zaman toleransı değil)
+    EPSILON = 1e-6
+
+    def __init__(self, per_minute: int, clock):
+        self.capacity = per_minute
+        self.level = float(per_minute)
+        self.clock = clock
+        self.updated = clock()
+
+    def take(self, amount: float) -> bool:
+        if self.capacity <= 0:
+            return True
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+        if self.level + self.EPSILON < amount:
+            return False
+        self.level -= amount
+        return True
+
+
+class StubOpenAIServer:
+    """/v1/chat/completions taklidi: RPM/TPM aşımında 429, ilk rate_limit_first istekte zorla 429"""
+
+    def __init__(self, rpm_limit: int = 0, tpm_limit: int = 0, rate_limit_first: int = 0, clock=time.monotonic):
+        self.requests = _StubBucket(rpm_limit, clock)
+        self.tokens = _StubBucket(tpm_limit, clock)
+        self.rate_limit_first = rate_limit_first
+        self.accepted = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                prompt_chars = sum(len(m.get("content") or "") for m in body["messages"])
+                tokens = prompt_chars // 4 + body["max_tokens"]
+                with stub.lock:
+                    forced = stub.rejected < stub.rate_limit_first
+                    allowed = not forced and stub.requests.take(1) and stub.tokens.take(tokens)
+                    if allowed:
+                        stub.accepted += 1
+                    else:
+                        stub.rejected += 1
+                if not allowed:
+                    self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                               {"retry-after-ms": "200"})
+                    return
+                self._send(200, {
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                        "role": "assistant", "content": '{"question": "q", "expected_answer": "a"}'
+                    }}],
+                    "usage": {"prompt_tokens": tokens - body["max_tokens"], "completion_tokens": body["max_tokens"],
+                              "total_tokens": tokens}
+                })
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+MESSAGES = [{"role": "user", "content": "x" * 20}]  # 20 karakter → 5 token + max_tokens
+
+
+def _run_concurrent(provider: OpenAIProvider, calls: int, max_tokens: int, workers: int = 16):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(provider.complete_with_usage, "gpt-4o-mini", MESSAGES, max_tokens=max_tokens)
+            for _ in range(calls)
+        ]
+        for future in futures:
+            future.result()
+
+
+@pytest.mark.parametrize("rpm_limit, tpm_limit, max_tokens", [
+    (120, 0, 95),       # istek bütçesi: 120 anlık, sonra 2/sn
+    (0, 12000, 95)      # token bütçesi: çağrı başına 100 token → 120 anlık, sonra 2/sn
+])
+def test_concurrent_calls_respect_budget_without_429(rpm_limit, tpm_limit, max_tokens):
+    calls = 126
+    clock = VirtualClock()
+    with StubOpenAIServer(rpm_limit=rpm_limit, tpm_limit=tpm_limit, clock=clock.monotonic) as server:
+        limiter = RateLimiter(
+            rpm_limit=rpm_limit, tpm_limit=tpm_limit, max_retries=3, backoff_base=0.05,
+            clock=clock.monotonic, sleep=clock.sleep
+        )
+        provider = OpenAIProvider(name="stub", api_key="test", base_url=server.base_url, limiter=limiter)
+        _run_concurrent(provider, calls, max_tokens)
+
+    stats = limiter.stats()
+    assert server.rejected == 0, f"sunucu {server.rejected} kez 429 döndü"
+    assert server.accepted == calls
+    assert stats["rate_limited_responses"] == 0
+    # Anlık bütçeyi aşan 6 çağrı dakikalık dolum hızıyla (2/sn) beklemiş olmalı (sanal saniye)
+    assert clock.now >= (calls - 120) / 2.0 - _StubBucket.EPSILON
+    assert stats["throttled_calls"] > 0
+    assert stats["queue_depth"] == 0 and stats["in_flight"] == 0
+
+
+def test_rate_limited_response_pauses_and_retries():
+    with StubOpenAIServer(rate_limit_first=1) as server:
+        limiter = RateLimiter(rpm_limit=0, tpm_limit=0, max_retries=3, backoff_base=0.05)
+        provider = OpenAIProvider(name="stub", api_key="test", base_url=server.base_url, limiter=limiter)
+        started = time.monotonic()
+        text, usage = provider.complete_with_usage("gpt-4o-mini", MESSAGES, max_tokens=10)
+        elapsed = time.monotonic() - started
+
+    assert json.loads(text)["question"] == "q"
+    assert usage["retries"] == 1
+    # retry-after-ms: 200 en az o kadar beklenmeli
+    assert elapsed >= 0.2
+    stats = limiter.stats()
+    assert stats["rate_limited_responses"] == 1
+    assert stats["retries"] == 1
+
+
+def _sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    raise AssertionError(f"{name} metriği bulunamadı")
+
+
+def test_scheduler_stats_are_exported_to_metrics():
+    before = registry.render()
+    rate_limiter.acquire(10)
+    try:
+        during = registry.render()
+        assert _sample(during, "llm_scheduler_in_flight") == _sample(before, "llm_scheduler_in_flight") + 1
+    finally:
+        rate_limiter.release(10, 10)
+    rate_limiter.on_rate_limited({})
+    rate_limiter.backoff_delay(0)
+    after = registry.render()
+
+    assert "# TYPE llm_scheduler_rate_limited_responses_total counter" in after
+    assert _sample(after, "llm_scheduler_calls_total") == _sample(before, "llm_scheduler_calls_total") + 1
+    assert _sample(after, "llm_scheduler_rate_limited_responses_total") == \
+        _sample(before, "llm_scheduler_rate_limited_responses_total") + 1
+    assert _sample(after, "llm_scheduler_retries_total") == _sample(before, "llm_scheduler_retries_total") + 1
+    assert _sample(after, "llm_scheduler_queue_depth") == rate_limiter.stats()["queue_depth"]
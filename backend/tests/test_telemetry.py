@@ -0,0 +1,115 @@
+"""
+Telemetri (telemetry.py) testleri.
+
+generation_logs yalnızca eklenen bir tablodur: kayıtların ilan/rolü yazımdan
+önce silinmiş olsa da toplu INSERT başarılı olmalı, log'u olan rol silinebilmelidir.
+Foreign key'ler SQLite'ta varsayılan olarak denetlenmediği için testler
+PRAGMA foreign_keys=ON ile açılmış ayrı bir veritabanında çalışır.
+"""
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app.migrations import run_migrations
+from app.models import Contract, GenerationLog, Role
+from app.telemetry import TelemetryBuffer
+
+
+def _log_row(contract_id, role_id):
+    return {
+        "contract_id": contract_id, "role_id": role_id, "question_type": "professional_experience",
+        "model_name": "mock-model", "provider": "mock", "call_kind": "single", "question_count": 1,
+        "prompt_length": 10, "response_length": 20, "generation_time": 0.1, "prompt_tokens": 5,
+        "completion_tokens": 5, "total_tokens": 10, "cost_usd": None, "retries": 0, "cache_hit": False,
+        "status": "success", "error_message": None
+    }
+
+
+def _enforce_foreign_keys(engine):
+    @event.listens_for(engine, "connect")
+    def _foreign_keys_on(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+@pytest.fixture
+def fk_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/telemetry.db")
+    _enforce_foreign_keys(engine)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+def _create_role(engine):
+    session = sessionmaker(bind=engine)()
+    contract = Contract(title="Telemetri İlanı", content="İlan metni")
+    session.add(contract)
+    session.flush()
+    role = Role(contract_id=contract.id, name="Analist", salary_multiplier=2, position_count=1)
+    session.add(role)
+    session.commit()
+    return session, contract.id, role.id
+
+
+def test_flush_writes_rows_of_deleted_roles_and_contracts(fk_engine):
+    session, contract_id, role_id = _create_role(fk_engine)
+    buffer = TelemetryBuffer(enabled=True, bind=fk_engine)
+    buffer.record(_log_row(contract_id, role_id))
+    buffer.record(_log_row(contract_id + 1000, role_id + 1000))  # hiç var olmamış ilan/rol
+    buffer.record(_log_row(None, None))
+
+    assert buffer.flush() == 3
+    assert buffer.stats()["flush_errors"] == 0
+    assert session.query(GenerationLog).count() == 3
+    session.close()
+
+
+def test_role_with_logs_can_be_deleted(fk_engine):
+    session, contract_id, role_id = _create_role(fk_engine)
+    buffer = TelemetryBuffer(enabled=True, bind=fk_engine)
+    buffer.record(_log_row(contract_id, role_id))
+    assert buffer.flush() == 1
+
+    session.delete(session.get(Role, role_id))
+    session.commit()
+
+    # Log silinen rolün id'siyle kalır (raporlarda etiketsiz grup)
+    assert session.query(GenerationLog.role_id).scalar() == role_id
+    session.close()
+
+
+def test_migration_drops_generation_log_foreign_keys(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/legacy.db")
+    _enforce_foreign_keys(engine)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        # Eski şema: generation_logs foreign key'li ve 5. migrasyon uygulanmamış
+        conn.execute(text("DROP TABLE generation_logs"))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = 5"))
+        conn.execute(text(
+            "CREATE TABLE generation_logs (id INTEGER PRIMARY KEY, "
+            "contract_id INTEGER REFERENCES contracts (id), role_id INTEGER REFERENCES roles (id), "
+            "question_type VARCHAR(100), model_name VARCHAR(100), provider VARCHAR(50), call_kind VARCHAR(20), "
+            "question_count INTEGER, prompt_length INTEGER, response_length INTEGER, generation_time FLOAT, "
+            "prompt_tokens INTEGER, completion_tokens INTEGER, total_tokens INTEGER, cost_usd FLOAT, "
+            "retries INTEGER, cache_hit BOOLEAN, status VARCHAR(50), error_message TEXT, raw_prompt TEXT, "
+            "raw_response TEXT, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX ix_generation_logs_contract_created ON generation_logs (contract_id, created_at)"
+        ))
+        conn.execute(text("INSERT INTO generation_logs (id, model_name, status) VALUES (7, 'eski', 'success')"))
+
+    assert run_migrations(engine) == 1
+    inspector = inspect(engine)
+    assert inspector.get_foreign_keys("generation_logs") == []
+    assert {index["name"] for index in inspector.get_indexes("generation_logs")} >= {
+        "ix_generation_logs_contract_created", "ix_generation_logs_role_id"
+    }
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT model_name FROM generation_logs WHERE id = 7")).scalar() == "eski"
+    assert run_migrations(engine) == 0
+    engine.dispose()